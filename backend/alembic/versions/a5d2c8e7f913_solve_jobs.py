@@ -0,0 +1,48 @@
+"""Add solve_jobs queue
+
+Revision ID: a5d2c8e7f913
+Revises: f3c9d0e4a817
+Create Date: 2026-10-19 09:12:40.118276
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5d2c8e7f913'
+down_revision: Union[str, None] = 'f3c9d0e4a817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'solve_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('lease_owner', sa.String(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('stop_request', sa.String(), nullable=True),
+        sa.Column('progress', sa.JSON(), nullable=True),
+        sa.Column('version_id', sa.Integer(), nullable=True),
+        sa.Column('error', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['version_id'], ['versions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_solve_jobs_id'), 'solve_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_solve_jobs_status'), 'solve_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_solve_jobs_status'), table_name='solve_jobs')
+    op.drop_index(op.f('ix_solve_jobs_id'), table_name='solve_jobs')
+    op.drop_table('solve_jobs')
@@ -0,0 +1,44 @@
+"""Add pinned flag to timetable events and scope slot uniqueness to a version
+
+Revision ID: b7e3c1d9a2f4
+Revises: 75b6d8a9f123
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3c1d9a2f4'
+down_revision: Union[str, None] = '75b6d8a9f123'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('timetable_events') as batch_op:
+        # Pinned events are carried into new versions unchanged and are not re-optimised
+        batch_op.add_column(sa.Column('pinned', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+        # Slot uniqueness was global; every version holds a full timetable, so it must be per version
+        batch_op.drop_constraint('uq_room_timeslot', type_='unique')
+        batch_op.drop_constraint('uq_lecturer_timeslot', type_='unique')
+        batch_op.drop_constraint('uq_group_timeslot', type_='unique')
+        batch_op.create_unique_constraint('uq_room_timeslot', ['version_id', 'room_id', 'day', 'start'])
+        batch_op.create_unique_constraint('uq_lecturer_timeslot', ['version_id', 'lecturer_id', 'day', 'start'])
+        batch_op.create_unique_constraint('uq_group_timeslot', ['version_id', 'group_id', 'day', 'start'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('timetable_events') as batch_op:
+        batch_op.drop_constraint('uq_room_timeslot', type_='unique')
+        batch_op.drop_constraint('uq_lecturer_timeslot', type_='unique')
+        batch_op.drop_constraint('uq_group_timeslot', type_='unique')
+        batch_op.create_unique_constraint('uq_room_timeslot', ['room_id', 'day', 'start'])
+        batch_op.create_unique_constraint('uq_lecturer_timeslot', ['lecturer_id', 'day', 'start'])
+        batch_op.create_unique_constraint('uq_group_timeslot', ['group_id', 'day', 'start'])
+
+        batch_op.drop_column('pinned')
@@ -0,0 +1,29 @@
+"""Add solve_jobs.fingerprint for single-flight generation
+
+Revision ID: b7e4f1a2c605
+Revises: a5d2c8e7f913
+Create Date: 2026-10-19 11:40:03.514920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4f1a2c605'
+down_revision: Union[str, None] = 'a5d2c8e7f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('solve_jobs', sa.Column('fingerprint', sa.String(), nullable=True))
+    op.create_index('ix_solve_jobs_active_fingerprint', 'solve_jobs', ['fingerprint'], unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_solve_jobs_active_fingerprint', table_name='solve_jobs')
+    op.drop_column('solve_jobs', 'fingerprint')
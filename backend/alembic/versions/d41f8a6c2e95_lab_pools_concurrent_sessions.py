@@ -0,0 +1,42 @@
+"""Add concurrent session capacity to rooms for lab pools
+
+Revision ID: d41f8a6c2e95
+Revises: b7e3c1d9a2f4
+Create Date: 2026-10-18 11:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41f8a6c2e95'
+down_revision: Union[str, None] = 'b7e3c1d9a2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('rooms', sa.Column('concurrent_sessions', sa.Integer(), nullable=False, server_default='1'))
+
+    with op.batch_alter_table('timetable_events') as batch_op:
+        # A lab pool hosts several sessions at once, so a room may appear more than once per slot
+        batch_op.drop_constraint('uq_room_timeslot', type_='unique')
+        # Labs do not block lecturer time: a lecture and a lab of the same lecturer's course may coincide
+        batch_op.drop_constraint('uq_lecturer_timeslot', type_='unique')
+
+    # Virtual per-group lab rooms are no longer created by generation; drop the ones no event uses
+    op.execute(
+        "DELETE FROM rooms WHERE name LIKE 'LAB-G%' "
+        "AND id NOT IN (SELECT DISTINCT room_id FROM timetable_events)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('timetable_events') as batch_op:
+        batch_op.create_unique_constraint('uq_room_timeslot', ['version_id', 'room_id', 'day', 'start'])
+        batch_op.create_unique_constraint('uq_lecturer_timeslot', ['version_id', 'lecturer_id', 'day', 'start'])
+
+    op.drop_column('rooms', 'concurrent_sessions')
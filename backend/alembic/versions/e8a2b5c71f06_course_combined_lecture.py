@@ -0,0 +1,27 @@
+"""Add combined_lecture flag to courses
+
+Revision ID: e8a2b5c71f06
+Revises: d41f8a6c2e95
+Create Date: 2026-10-18 12:26:51.307714
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8a2b5c71f06'
+down_revision: Union[str, None] = 'd41f8a6c2e95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lectures of combined courses are scheduled once for all attached groups
+    op.add_column('courses', sa.Column('combined_lecture', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column('courses', 'combined_lecture')
@@ -0,0 +1,27 @@
+"""Add metrics to versions
+
+Revision ID: f3c9d0e4a817
+Revises: e8a2b5c71f06
+Create Date: 2026-10-18 14:05:12.664031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9d0e4a817'
+down_revision: Union[str, None] = 'e8a2b5c71f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Seat-hour utilisation and solve statistics recorded by generation
+    op.add_column('versions', sa.Column('metrics', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('versions', 'metrics')
@@ -0,0 +1,148 @@
+"""Solver benchmark on synthetic instances (no database needed).
+
+Usage (from the backend directory):
+
+    python -m app.cli.benchmark --departments 4 --variants baseline,cuts --repeats 3 --time-limit 30
+
+Each variant builds the model from the same synthetic SolverInput with different builder options and
+runs the staged solve; the table reports model size, build time and per-stage timings.
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from ..solver import build_model, solver_parameters, solve_staged
+from ..solver_input import SolverInput, build_time_grid
+from ..services.decomposition import solve_decomposed
+
+# Builder options per named variant; add new entries when a model feature needs measuring
+VARIANTS: Dict[str, Dict[str, Any]] = {
+    "baseline": {"redundant_cuts": False, "weekly_patterns": "off"},
+    "cuts": {"redundant_cuts": True, "weekly_patterns": "off"},
+    "day-patterns": {"redundant_cuts": False, "weekly_patterns": "days"},
+    "hour-patterns": {"redundant_cuts": False, "weekly_patterns": "hours"},
+    # Not a builder option: day-then-slot decomposition (services/decomposition.py) with default builder options
+    "decomposed": {"engine": "decomposed"},
+}
+
+DEPARTMENTS = ["AEN", "CEE", "EEE", "MEC", "GEE", "MIN", "CHE", "ABE"]
+
+
+def synthetic_dataset(departments: int = 4, years: int = 3, courses_per_year: int = 5,
+                      seed: int = 0, session_minutes: int = 60) -> Dict[str, List[Dict[str, Any]]]:
+    """A faculty-shaped dataset: cohorts per department/year, a few lecturers each, mixed room stock."""
+    rnd = random.Random(seed)
+    rooms: List[Dict[str, Any]] = []
+    sizes = [40, 40, 60, 60, 80, 100, 120, 150, 200, 300]
+    # At least one room of every size, so each cohort (40-160 students) has a lecture room that seats it
+    for i in range(max(len(sizes), departments * 3)):
+        rooms.append({"id": i + 1, "name": f"R{i + 1:02d}", "capacity": sizes[i % len(sizes)], "building": None,
+                      "furniture_type": "LECTURE", "equipment": ["PROJECTOR"] if i % 3 else ["PROJECTOR", "CAD"],
+                      "availability": None, "concurrent_sessions": 1})
+    groups: List[Dict[str, Any]] = []
+    lecturers: List[Dict[str, Any]] = []
+    courses: List[Dict[str, Any]] = []
+    for dept in DEPARTMENTS[:departments]:
+        dept_lecturers = []
+        for k in range(years + 2):
+            lid = len(lecturers) + 1
+            avail = None
+            if rnd.random() < 0.2:
+                # Part-time lecturer: mornings only
+                avail = {d: [["08:00", "13:00"]] for d in settings.week_days}
+            lecturers.append({"id": lid, "name": f"{dept}-L{k}", "department": dept, "max_daily_load": 240,
+                              "availability": avail})
+            dept_lecturers.append(lid)
+        for year in range(2, 2 + years):
+            gid = len(groups) + 1
+            groups.append({"id": gid, "name": f"{dept}-{year}Y", "size": rnd.randint(40, 160), "year": year,
+                           "department": dept, "lecture_group": None, "subgroup": None, "track": None})
+            for k in range(courses_per_year):
+                cid = len(courses) + 1
+                has_lab = k == 0
+                courses.append({
+                    "id": cid, "code": f"{dept} {year}{k:02d}{cid % 10}", "name": f"{dept} course {cid}",
+                    "department": dept, "weekly_hours": rnd.choice([2, 3, 3, 4]), "session_minutes": session_minutes,
+                    "requirements": {"equipment": ["CAD"]} if k == courses_per_year - 1 else None,
+                    "is_project": False, "has_lab": has_lab, "lab_weekly_sessions": 1 if has_lab else 0,
+                    "lab_session_minutes": 2 * session_minutes, "lab_requirements": None,
+                    "group_ids": [gid], "lecturer_ids": [rnd.choice(dept_lecturers)],
+                })
+    # Shared lab pools, each hosting a few lab sessions at once
+    for k in range(max(1, departments // 2)):
+        rooms.append({"id": len(rooms) + 1, "name": f"LAB{k + 1}", "capacity": 60, "building": None,
+                      "furniture_type": "LAB", "equipment": [], "availability": None, "concurrent_sessions": 3})
+    return {"rooms": rooms, "groups": groups, "lecturers": lecturers, "courses": courses}
+
+
+def run_variant(dataset: Dict[str, List[Dict[str, Any]]], options: Dict[str, Any],
+                params: Dict[str, Any]) -> Dict[str, Any]:
+    options = dict(options)
+    engine = options.pop("engine", "monolithic")
+    t0 = time.perf_counter()
+    inp = SolverInput(dataset, build_time_grid())
+    t1 = time.perf_counter()
+    if engine == "decomposed":
+        solution, stats = solve_decomposed(inp, params)
+        return {"sessions": len(inp.sessions), "variables": 0, "constraints": 0, "input_s": t1 - t0,
+                "build_s": 0.0, "feasible": solution is not None, "stages": stats}
+    built = build_model(inp, **options)
+    t2 = time.perf_counter()
+    # Size before solving: deferred objectives add their variables when their stage starts
+    proto = built.model.Proto()
+    variables, constraints = len(proto.variables), len(proto.constraints)
+    solution, stats = solve_staged(built, params)
+    return {
+        "sessions": len(inp.sessions),
+        "variables": variables,
+        "constraints": constraints,
+        "input_s": t1 - t0,
+        "build_s": t2 - t1,
+        "feasible": solution is not None,
+        "stages": stats,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark model-builder variants on synthetic instances")
+    parser.add_argument("--departments", type=int, default=4)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--courses-per-year", type=int, default=5)
+    parser.add_argument("--session-minutes", type=int, default=60,
+                        help="lecture length (labs are twice as long); use 90 to compare PERIODS with SLOT_MINUTES=30")
+    parser.add_argument("--seed", type=int, default=0, help="first dataset seed; repeats use seed+1, seed+2, ...")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"comma separated, from {', '.join(VARIANTS)}")
+    parser.add_argument("--time-limit", type=float, default=settings.solver_feasibility_time_limit,
+                        help="feasibility stage budget")
+    parser.add_argument("--stage-time-limit", type=float, default=settings.solver_stage_time_limit)
+    parser.add_argument("--workers", type=int, default=settings.solver_workers)
+    args = parser.parse_args(argv)
+
+    settings.solver_stage_time_limit = args.stage_time_limit
+    params = solver_parameters({"max_time_in_seconds": args.time_limit})
+    if args.workers:
+        params["num_search_workers"] = args.workers
+
+    names = [v.strip() for v in args.variants.split(",") if v.strip()]
+    header = (f"{'variant':<16} {'seed':>4} {'sessions':>8} {'vars':>8} {'cons':>8} {'build(s)':>8} "
+              f"{'feasible(s)':>11} stages")
+    print(header)
+    print("-" * len(header))
+    for rep in range(args.repeats):
+        seed = args.seed + rep
+        dataset = synthetic_dataset(args.departments, args.years, args.courses_per_year, seed, args.session_minutes)
+        for name in names:
+            res = run_variant(dataset, VARIANTS[name], params)
+            first = res["stages"][0]
+            stages = "  ".join(f"{st['stage']}={st['status']}/{st['wall_time']:.2f}s"
+                               + (f"/{st['objective']:.0f}" if st["objective"] is not None else "")
+                               for st in res["stages"][1:])
+            print(f"{name:<16} {seed:>4} {res['sessions']:>8} {res['variables']:>8} {res['constraints']:>8} "
+                  f"{res['build_s']:>8.2f} {first['status'][:4] + '/' + format(first['wall_time'], '.2f'):>11} {stages}")
+
+
+if __name__ == "__main__":
+    main()
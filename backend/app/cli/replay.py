@@ -0,0 +1,84 @@
+"""Replay solver dumps written by `POST /timetable/generate` with `dump_model=true`.
+
+Usage (from the backend directory):
+
+    python -m app.cli.replay solver_dumps/solve-v12-*.json.gz --workers 1,8 --seeds 0,1,2 --time-limit 60
+
+Extra SatParameters fields are passed as `--param linearization_level=2`.
+"""
+import argparse
+import json
+from typing import Any, Dict, List, Optional
+
+from ..services.solver_dump import read_dump, replay
+
+
+def _parse_value(raw: str) -> Any:
+    # Accept JSON literals (numbers, true/false) and fall back to plain strings for enum names
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return raw
+
+
+def parse_params(items: List[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    for item in items or []:
+        if "=" not in item:
+            raise SystemExit(f"--param expects key=value, got {item!r}")
+        key, raw = item.split("=", 1)
+        params[key.strip()] = _parse_value(raw.strip())
+    return params
+
+
+def _int_list(raw: str) -> List[int]:
+    return [int(x) for x in raw.split(",") if x.strip()]
+
+
+def _fmt(v: Any, width: int) -> str:
+    if v is None:
+        s = "-"
+    elif isinstance(v, float):
+        s = f"{v:.2f}"
+    else:
+        s = str(v)
+    return s.rjust(width)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay dumped CP-SAT timetable models with different parameters")
+    parser.add_argument("dumps", nargs="+", help="dump files (.json.gz)")
+    parser.add_argument("--time-limit", type=float, default=None, help="override max_time_in_seconds")
+    parser.add_argument("--workers", type=_int_list, default=None, help="comma separated num_search_workers values")
+    parser.add_argument("--seeds", type=_int_list, default=None, help="comma separated random_seed values")
+    parser.add_argument("--param", action="append", default=[], help="extra SatParameters field as key=value")
+    parser.add_argument("--keep-dump-params", action="store_true",
+                        help="start from the parameters recorded in the dump instead of CP-SAT defaults")
+    args = parser.parse_args(argv)
+
+    overrides = parse_params(args.param)
+    if args.time_limit is not None:
+        overrides["max_time_in_seconds"] = args.time_limit
+
+    header = f"{'dump':<40} {'workers':>7} {'seed':>5} {'status':>10} {'first(s)':>9} {'wall(s)':>8} {'objective':>10} {'bound':>10}"
+    print(header)
+    print("-" * len(header))
+    for path in args.dumps:
+        payload = read_dump(path)
+        base = dict(payload.get("parameters") or {}) if args.keep_dump_params else {}
+        base.setdefault("max_time_in_seconds", (payload.get("parameters") or {}).get("max_time_in_seconds", 20.0))
+        base.update(overrides)
+        for workers in args.workers or [base.get("num_search_workers", 0)]:
+            for seed in args.seeds or [base.get("random_seed", 0)]:
+                params = dict(base, num_search_workers=workers, random_seed=seed)
+                res = replay(payload, params)
+                name = path if len(path) <= 40 else "..." + path[-37:]
+                print(
+                    f"{name:<40} {_fmt(workers, 7)} {_fmt(seed, 5)} {_fmt(res['status'], 10)} "
+                    f"{_fmt(res['first_solution_time'], 9)} {_fmt(res['wall_time'], 8)} "
+                    f"{_fmt(res['objective'], 10)} {_fmt(res['bound'], 10)}"
+                )
+
+
+if __name__ == "__main__":
+    main()
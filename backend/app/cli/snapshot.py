@@ -0,0 +1,97 @@
+"""Export the scheduling dataset, solve it without a database, import the result as a version.
+
+Usage (from the backend directory):
+
+    python -m app.cli.snapshot export dataset.json.gz [--department CSE --year 3] [--base-version 12]
+    python -m app.cli.snapshot solve dataset.json.gz events.json.gz [--time-limit 600 --workers 32]
+    python -m app.cli.snapshot import events.json.gz --name "batch run" [--force]
+
+`solve` needs neither the database nor its settings: the grid, solver settings and CP-SAT parameters come
+from the snapshot. Use `.msgpack` or `.msgpack.gz` file names for MessagePack (requires msgpack).
+"""
+import argparse
+import json
+import logging
+import sys
+from typing import List, Optional
+
+from ..services.snapshot import export_snapshot, import_events, read_file, solve_snapshot, write_file
+from .replay import parse_params
+
+
+def _export(args: argparse.Namespace) -> None:
+    from ..database import SessionLocal
+    db = SessionLocal()
+    try:
+        snapshot = export_snapshot(db, base_version_id=args.base_version, pin_event_ids=args.pin,
+                                   department=args.department, year=args.year)
+    finally:
+        db.close()
+    write_file(args.path, snapshot)
+    ds = snapshot["dataset"]
+    print(f"Wrote {args.path}: {len(ds['rooms'])} rooms, {len(ds['groups'])} groups, {len(ds['lecturers'])} "
+          f"lecturers, {len(ds['courses'])} courses, {len(ds['fixed'])} kept events")
+
+
+def _solve(args: argparse.Namespace) -> None:
+    overrides = parse_params(args.param)
+    if args.time_limit is not None:
+        overrides["max_time_in_seconds"] = args.time_limit
+    if args.workers is not None:
+        overrides["num_search_workers"] = args.workers
+    result = solve_snapshot(read_file(args.snapshot, "snapshot"), overrides)
+    write_file(args.out, result)
+    for st in result["metrics"]["stages"]:
+        print(f"{st['stage']:<16} {st['status']:<10} {st['wall_time']:>8}s objective={st['objective']}")
+    if result["status"] == "infeasible":
+        print(json.dumps(result["findings"], indent=2))
+    print(f"{result['status']}: wrote {len(result['events'])} events to {args.out}")
+    if result["status"] != "solved":
+        sys.exit(2)
+
+
+def _import(args: argparse.Namespace) -> None:
+    from ..database import SessionLocal
+    db = SessionLocal()
+    try:
+        version = import_events(db, read_file(args.path, "events"), args.name, force=args.force)
+        print(f"Imported version {version.id} ({version.name})")
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finally:
+        db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Solve timetables from dataset snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="write the dataset a generation would solve")
+    p.add_argument("path")
+    p.add_argument("--base-version", type=int, default=None, help="version whose pinned events are kept")
+    p.add_argument("--pin", type=int, action="append", default=[], help="further event id of the base to keep")
+    p.add_argument("--department", default=None)
+    p.add_argument("--year", type=int, default=None)
+    p.set_defaults(func=_export)
+
+    p = sub.add_parser("solve", help="solve a snapshot into an events file (no database)")
+    p.add_argument("snapshot")
+    p.add_argument("out")
+    p.add_argument("--time-limit", type=float, default=None, help="override max_time_in_seconds")
+    p.add_argument("--workers", type=int, default=None, help="override num_search_workers")
+    p.add_argument("--param", action="append", default=[], help="extra SatParameters field as key=value")
+    p.set_defaults(func=_solve)
+
+    p = sub.add_parser("import", help="import an events file as a new version")
+    p.add_argument("path")
+    p.add_argument("--name", default="imported")
+    p.add_argument("--force", action="store_true", help="import even if the data changed since the export")
+    p.set_defaults(func=_import)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
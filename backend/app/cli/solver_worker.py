@@ -0,0 +1,28 @@
+"""Standalone solver worker (SOLVER_WORKER=external).
+
+Usage (from the backend directory):
+
+    SOLVER_WORKER_ADDRESS=127.0.0.1:50055 python -m app.cli.solver_worker
+
+Loads the reference data once, keeps it warm and runs the generations the API sends over the local queue;
+the API forwards entity changes so the warm data is refreshed incrementally.
+"""
+import argparse
+import logging
+from typing import List, Optional
+
+from ..config import settings
+from ..services.solver_worker import serve
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the solver worker")
+    parser.add_argument("--address", default=settings.solver_worker_address, help="host:port of the local queue")
+    args = parser.parse_args(argv)
+    settings.solver_worker_address = args.address
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Tune CP-SAT parameters over a corpus of recorded solve dumps.
+
+Usage (from the backend directory):
+
+    python -m app.cli.tune solver_dumps/*.json.gz --mode random --samples 30 --time-limit 30
+
+Every configuration is run on every dump. For each run we record the time to the first
+feasible solution and the time to reach the target objective (best objective seen on
+that dump across all runs, within --target-gap). Configurations are ranked by their mean
+time-to-target, counting failures as twice the time limit, and the winner is written to
+SOLVER_PRESET_PATH where `solver_parameters()` picks it up by default.
+"""
+import argparse
+import itertools
+import json
+import random
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..config import settings
+from ..services.solver_dump import read_dump, replay
+from .replay import parse_params
+
+SEARCH_SPACE: Dict[str, List[Any]] = {
+    "search_branching": ["AUTOMATIC_SEARCH", "FIXED_SEARCH", "PORTFOLIO_SEARCH", "LP_SEARCH", "PSEUDO_COST_SEARCH"],
+    "linearization_level": [0, 1, 2],
+    "cp_model_presolve": [True, False],
+    "symmetry_level": [0, 1, 2, 4],
+}
+
+
+def _int_list(raw: str) -> List[int]:
+    return [int(x) for x in raw.split(",") if x.strip()]
+
+
+def configurations(mode: str, samples: int, workers: List[int], seed: int) -> List[Dict[str, Any]]:
+    space = dict(SEARCH_SPACE, num_search_workers=workers)
+    keys = list(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if mode == "grid" or samples >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, samples)
+
+
+def _time_to_target(timeline: List[List[float]], target: Optional[float]) -> Optional[float]:
+    if target is None:
+        return None
+    for wall, objective in timeline:
+        if objective <= target:
+            return wall
+    return None
+
+
+def _target(best: Optional[float], gap: float) -> Optional[float]:
+    if best is None:
+        return None
+    return best + abs(best) * gap
+
+
+def _label(cfg: Dict[str, Any]) -> str:
+    return " ".join(f"{k}={v}" for k, v in cfg.items())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Grid/random search over CP-SAT parameters on recorded models")
+    parser.add_argument("dumps", nargs="+", help="dump files (.json.gz) forming the tuning corpus")
+    parser.add_argument("--mode", choices=["grid", "random"], default="random")
+    parser.add_argument("--samples", type=int, default=20, help="configurations to try in random mode")
+    parser.add_argument("--workers", type=_int_list, default=[1, 8], help="comma separated num_search_workers values")
+    parser.add_argument("--time-limit", type=float, default=settings.solver_time_limit)
+    parser.add_argument("--target-gap", type=float, default=0.0,
+                        help="relative slack over the best objective that still counts as reaching the target")
+    parser.add_argument("--seed", type=int, default=0, help="seed for random mode and for CP-SAT")
+    parser.add_argument("--param", action="append", default=[], help="fixed SatParameters field as key=value")
+    parser.add_argument("--output", default=settings.solver_preset_path, help="where to write the winning preset")
+    parser.add_argument("--dry-run", action="store_true", help="print the ranking without writing the preset")
+    args = parser.parse_args(argv)
+
+    fixed = parse_params(args.param)
+    configs = configurations(args.mode, args.samples, args.workers, args.seed)
+    corpus = [(path, read_dump(path)) for path in args.dumps]
+    print(f"Tuning {len(configs)} configurations over {len(corpus)} models ({args.time_limit:.0f}s limit each)")
+
+    # runs[config index][dump index] -> replay result
+    runs: List[List[Dict[str, Any]]] = []
+    for ci, cfg in enumerate(configs):
+        params = dict(fixed, **cfg, max_time_in_seconds=args.time_limit, random_seed=args.seed)
+        row = []
+        for path, payload in corpus:
+            res = replay(payload, params)
+            row.append(res)
+            print(f"[{ci + 1}/{len(configs)}] {path}: {res['status']} first={res['first_solution_time']} obj={res['objective']}")
+        runs.append(row)
+
+    # Per-model target = best objective any configuration reached on it
+    targets: List[Optional[float]] = []
+    for di in range(len(corpus)):
+        objectives = [row[di]["objective"] for row in runs if row[di]["objective"] is not None]
+        targets.append(_target(min(objectives), args.target_gap) if objectives else None)
+
+    penalty = 2 * args.time_limit
+    ranking = []
+    for cfg, row in zip(configs, runs):
+        ttf = [r["first_solution_time"] if r["first_solution_time"] is not None else penalty for r in row]
+        ttt = []
+        for di, r in enumerate(row):
+            # Models without an objective report 0 for every solution, so the first one hits the target
+            reached = _time_to_target(r["timeline"], targets[di])
+            ttt.append(reached if reached is not None else penalty)
+        ranking.append((sum(ttt) / len(ttt), sum(ttf) / len(ttf), cfg))
+    ranking.sort(key=lambda t: (t[0], t[1]))
+
+    print()
+    print(f"{'time-to-target':>14} {'time-to-first':>13}  configuration")
+    for mean_ttt, mean_ttf, cfg in ranking:
+        print(f"{mean_ttt:>14.2f} {mean_ttf:>13.2f}  {_label(cfg)}")
+
+    best_ttt, best_ttf, best_cfg = ranking[0]
+    if args.dry_run:
+        return
+    if all(t is None for t in targets):
+        raise SystemExit("No configuration found a feasible solution on any model; preset not written")
+    preset = {
+        "parameters": dict(fixed, **best_cfg),
+        "tuned_at": datetime.utcnow().isoformat(),
+        "corpus": [path for path, _ in corpus],
+        "time_limit": args.time_limit,
+        "mean_time_to_target": best_ttt,
+        "mean_time_to_first": best_ttf,
+    }
+    with open(args.output, "w") as f:
+        json.dump(preset, f, indent=2)
+    print(f"\nWrote winning preset to {args.output}: {_label(best_cfg)}")
+
+
+if __name__ == "__main__":
+    main()
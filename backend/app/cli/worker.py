@@ -0,0 +1,27 @@
+"""Solve-job worker: drains the solve_jobs table.
+
+Usage (from the backend directory):
+
+    python -m app.cli.worker [--owner NAME] [--once]
+
+Run as many as there are machines or containers to spare; they share the queue through Postgres row locks
+(no broker), and a worker that dies mid-solve has its job requeued once its lease expires.
+"""
+import argparse
+import logging
+from typing import List, Optional
+
+from ..services.job_queue import default_owner, work
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run queued timetable generations")
+    parser.add_argument("--owner", default=default_owner(), help="lease owner name (default host:pid)")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty instead of polling")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    work(owner=args.owner, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import List, Tuple
 
 class Settings:
     def __init__(self) -> None:
@@ -17,9 +17,52 @@ class Settings:
         self.day_start = os.getenv("DAY_START", "08:00")
         self.day_end = os.getenv("DAY_END", "17:00")
         self.slot_minutes = int(os.getenv("SLOT_MINUTES", "60"))
+        # Period table, e.g. "08:00-09:30,09:30-11:00,11:00-12:30": when set, the solver grid is these periods on
+        # every week day instead of uniform SLOT_MINUTES slots (DAY_START/DAY_END are then not used)
+        self.periods: List[Tuple[str, str]] = [tuple(p.strip().split("-", 1)) for p in os.getenv("PERIODS", "").split(",") if p.strip()]
+        # Longest break between two periods that a multi-period session may run across
+        self.period_break_minutes = int(os.getenv("PERIOD_BREAK_MINUTES", "15"))
         # Lunch window (reserved): slots starting at/after this time and before LUNCH_END will be treated as lunch
         self.lunch_start = os.getenv("LUNCH_START", "13:00")
         self.lunch_end = os.getenv("LUNCH_END", "14:00")
+        # CP-SAT search: time budget (seconds) and worker count (0 lets CP-SAT pick from available cores)
+        self.solver_time_limit = float(os.getenv("SOLVER_TIME_LIMIT", "20"))
+        self.solver_workers = int(os.getenv("SOLVER_WORKERS", "0"))
+        # Staged solving: feasibility first under its own budget, then each objective lexicographically
+        self.solver_feasibility_time_limit = float(os.getenv("SOLVER_FEASIBILITY_TIME_LIMIT", str(self.solver_time_limit)))
+        self.solver_stage_time_limit = float(os.getenv("SOLVER_STAGE_TIME_LIMIT", "10"))
+        self.solver_stages: List[str] = [s.strip() for s in os.getenv("SOLVER_STAGES", "lecturer_load,spread,room_fit,compactness").split(",") if s.strip()]
+        # Lecturer max_daily_load: "hard" constraint, "soft" (overload minutes become the lecturer_load objective) or "off"
+        self.solver_lecturer_load = os.getenv("SOLVER_LECTURER_LOAD", "hard").lower()
+        # Engine: "monolithic" (one placement model) or "decomposed" (sessions to days first, then one model per day)
+        self.solver_engine = os.getenv("SOLVER_ENGINE", "monolithic").lower()
+        # Day subproblems solved at once by the decomposed engine (0 = one per core)
+        self.solver_day_workers = int(os.getenv("SOLVER_DAY_WORKERS", "0"))
+        # How day subproblems run side by side: "threads" or "processes" (spawned workers that attach the solver
+        # input from a shared memory-mapped file; model building then runs in parallel too)
+        self.solver_day_executor = os.getenv("SOLVER_DAY_EXECUTOR", "threads").lower()
+        # Implied per-slot room-class and per-group-day capacity cuts (do not change the solution set)
+        self.solver_redundant_cuts = os.getenv("SOLVER_REDUNDANT_CUTS", "0") == "1"
+        # Repeated sessions of a course-group choose a weekly pattern: "days" (distinct days), "hours" (distinct days,
+        # same hour) or "off" (free slots)
+        self.solver_weekly_patterns = os.getenv("SOLVER_WEEKLY_PATTERNS", "days").lower()
+        # Directory where solve dumps (model proto + session mapping + parameters) are written
+        self.solver_dump_dir = os.getenv("SOLVER_DUMP_DIR", "solver_dumps")
+        # Tuned CP-SAT parameter preset (written by `python -m app.cli.tune`), loaded by default when present
+        self.solver_preset_path = os.getenv("SOLVER_PRESET_PATH", "solver_preset.json")
+        # Solver worker: "off" (generate inside the API process), "app" (the API starts a worker process) or
+        # "external" (connect to `python -m app.cli.solver_worker`), reached over a local queue at this address
+        self.solver_worker = os.getenv("SOLVER_WORKER", "off").lower()
+        self.solver_worker_address = os.getenv("SOLVER_WORKER_ADDRESS", "127.0.0.1:50055")
+        self.solver_worker_authkey = os.getenv("SOLVER_WORKER_AUTHKEY", "timetable-solver")
+        # solve_jobs queue (`python -m app.cli.worker`): lease length, heartbeat interval, idle poll interval and
+        # how often an expired job is requeued before it is marked failed
+        self.solver_job_lease_seconds = int(os.getenv("SOLVER_JOB_LEASE_SECONDS", "60"))
+        self.solver_job_heartbeat_seconds = float(os.getenv("SOLVER_JOB_HEARTBEAT_SECONDS", "10"))
+        self.solver_job_poll_seconds = float(os.getenv("SOLVER_JOB_POLL_SECONDS", "2"))
+        self.solver_job_max_attempts = int(os.getenv("SOLVER_JOB_MAX_ATTEMPTS", "3"))
+        # What-if scenarios solved at once in the scenario process pool (0 = one per core)
+        self.scenario_workers = int(os.getenv("SCENARIO_WORKERS", "0"))
 
         # Email settings
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
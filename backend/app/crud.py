@@ -89,6 +89,7 @@ def _norm_room_payload(data: schemas.RoomCreate) -> Dict[str, Any]:
         "furniture_type": _upper_or_none(data.furniture_type),
         "equipment": _upper_list(data.equipment),
         "availability": data.availability,
+        "concurrent_sessions": max(1, data.concurrent_sessions or 1),
     }
 
 
@@ -138,6 +139,7 @@ def _norm_course_payload(data: schemas.CourseCreate) -> Dict[str, Any]:
         "session_minutes": data.session_minutes,
         "requirements": _norm_requirements(data.requirements),
         "is_project": getattr(data, 'is_project', False),
+        "combined_lecture": getattr(data, 'combined_lecture', False),
         "has_lab": data.has_lab,
         "lab_weekly_sessions": data.lab_weekly_sessions,
         "lab_session_minutes": data.lab_session_minutes,
@@ -7,9 +7,24 @@ from .routers import core, entities, timetable, export
 from .routers import auth as auth_router
 from .routers import validation as validation_router
 from .routers import issues as issues_router
+from .services.solver_worker import solver_worker
+from .services.scenarios import scenario_service
 
 app = FastAPI(title="Automated Timetable System", version="0.1.0")
 
+
+@app.on_event("startup")
+def start_solver_worker():
+    # SOLVER_WORKER=app|external: generations run in a long-lived worker with warm solver input
+    solver_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_solver_worker():
+    solver_worker.stop()
+    scenario_service.shutdown()
+
+
 # In production, we don't need CORS as frontend and backend are served from the same origin
 if os.getenv("ENVIRONMENT") == "development":
     app.add_middleware(
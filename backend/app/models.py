@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Time, ForeignKey, Table, UniqueConstraint, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, Time, ForeignKey, Table, UniqueConstraint, JSON, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -26,6 +26,7 @@ class Room(Base):
     furniture_type = Column(String, nullable=True)
     equipment = Column(JSON, nullable=True)  # e.g., ["projector", "lab"]
     availability = Column(JSON, nullable=True)  # e.g., {"Mon": [["08:00","17:00"]], ...}
+    concurrent_sessions = Column(Integer, nullable=False, default=1)  # sessions hosted at once (lab pools > 1)
 
     events = relationship("TimetableEvent", back_populates="room")
 
@@ -42,6 +43,8 @@ class Course(Base):
     requirements = Column(JSON, nullable=True)  # lecture requirements {"furniture_type": "lecture", "equipment": ["projector"]}
     # Project course flag: true for capstone/project courses (typically year 5); these are not assigned venues by the solver
     is_project = Column(Boolean, nullable=False, default=False)
+    # Schedule each lecture once for all attached groups together (shared service courses) instead of per group
+    combined_lecture = Column(Boolean, nullable=False, default=False)
 
     # Lab configuration
     has_lab = Column(Boolean, nullable=False, default=False)
@@ -85,9 +88,38 @@ class Version(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Summary written by generation, e.g. seat-hour utilisation and solve stage statistics
+    metrics = Column(JSON, nullable=True)
 
     events = relationship("TimetableEvent", back_populates="version")
 
+class SolveJob(Base):
+    """A queued generation; solver workers lease one row at a time and keep the lease alive by heartbeat."""
+    __tablename__ = "solve_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued | running | done | failed | cancelled
+    params = Column(JSON, nullable=False)  # GenerateRequest fields
+    # Input fingerprint; at most one queued or running job per fingerprint, identical requests attach to it
+    fingerprint = Column(String, nullable=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # None, "accept" or "cancel"; the worker holding the lease picks it up at its next heartbeat
+    stop_request = Column(String, nullable=True)
+    progress = Column(JSON, nullable=True)  # latest progress update of the running solve
+    version_id = Column(Integer, ForeignKey("versions.id", ondelete="SET NULL"), nullable=True)
+    error = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_solve_jobs_active_fingerprint", "fingerprint", unique=True,
+              postgresql_where=text("status IN ('queued', 'running')"),
+              sqlite_where=text("status IN ('queued', 'running')")),
+    )
+
 class TimetableEvent(Base):
     __tablename__ = "timetable_events"
     id = Column(Integer, primary_key=True, index=True)
@@ -101,6 +133,8 @@ class TimetableEvent(Base):
     end = Column(Time, nullable=False)
 
     version_id = Column(Integer, ForeignKey("versions.id"), nullable=False)
+    # Pinned events are copied into new versions as-is and enter the solver as fixed occupancy
+    pinned = Column(Boolean, nullable=False, default=False)
 
     course = relationship("Course", back_populates="events")
     room = relationship("Room", back_populates="events")
@@ -109,9 +143,7 @@ class TimetableEvent(Base):
     version = relationship("Version", back_populates="events")
 
     __table_args__ = (
-        UniqueConstraint("room_id", "day", "start", name="uq_room_timeslot"),
-        UniqueConstraint("lecturer_id", "day", "start", name="uq_lecturer_timeslot"),
-        UniqueConstraint("group_id", "day", "start", name="uq_group_timeslot"),
+        UniqueConstraint("version_id", "group_id", "day", "start", name="uq_group_timeslot"),
     )
 
 class User(Base):
@@ -78,8 +78,6 @@ def export_html(version_id: Optional[int] = None, db: Session = Depends(get_db))
     from collections import defaultdict
     cells = defaultdict(lambda: defaultdict(dict))
 
-    slot_minutes = settings.slot_minutes
-
     # Place events into cells
     for ev in events:
         g = groups.get(ev.group_id)
@@ -104,7 +102,8 @@ def export_html(version_id: Optional[int] = None, db: Session = Depends(get_db))
             # Non-aligned event; skip in export
             continue
         duration = (datetime.combine(datetime.today(), ev.end) - datetime.combine(datetime.today(), ev.start)).seconds // 60
-        span = max(1, duration // slot_minutes)
+        # Rows covered: every slot of the day starting inside the event (periods may differ in length)
+        span = max(1, sum(1 for st, _ in day_slots[ev.day] if ev.start <= st < ev.end))
         label_type = "Lab" if (getattr(c, 'has_lab', False) and duration == (c.lab_session_minutes or 180)) else "Lec"
         title = f"{c.code} {label_type}<br/><span style='font-size:11px;color:#374151'>{r.name}</span>"
         if y in years_present:
@@ -1,23 +1,258 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from datetime import time
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
+import logging
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from .. import schemas, models, crud
-from ..solver import generate_timetable
+from ..solver import input_fingerprint, prepare_input
+from ..services.progress import SolveRun, progress_service
+from ..services.solver_worker import run_generation, solver_worker
+from ..services import job_queue
+from ..services.scenarios import scenario_service
+from ..services.capacity import analyze_capacity
+from ..services.domains import profile_domains
 from ..utils import check_conflicts
 from ..services.pdf import pdf_service
 from ..services.email import email_service
 
 router = APIRouter(prefix="/timetable", tags=["timetable"])
 
+logger = logging.getLogger(__name__)
+
+def _fingerprint(req: schemas.GenerateRequest, db: Session) -> Optional[str]:
+    # Requests that dump their model always get a run of their own
+    if req.dump_model:
+        return None
+    try:
+        return input_fingerprint(db, base_version_id=req.base_version_id, pin_event_ids=req.pin_event_ids,
+                                 department=req.department, year=req.year)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _start(req: schemas.GenerateRequest, db: Session,
+           background_tasks: Optional[BackgroundTasks] = None) -> Tuple[SolveRun, bool]:
+    # Single flight within this API process: a request with the same input fingerprint as an unfinished run
+    # attaches to that run (same progress, same resulting version, named by the first request) instead of
+    # starting another solve. Other API processes do not see these runs; /jobs dedupes across processes.
+    # Returns the run and whether this request started it.
+    run, leader = progress_service.single_flight(req.version_name, _fingerprint(req, db))
+    if not leader:
+        logger.info("Request %r attached to run %s (version %r)", req.version_name, run.id, run.version_name)
+    elif solver_worker.enabled:
+        solver_worker.submit(run, req)
+    elif background_tasks is not None:
+        background_tasks.add_task(_run_generation, run, req)
+    else:
+        _run_generation(run, req)
+    return run, leader
+
 @router.post("/generate", response_model=List[schemas.TimetableEvent])
-def generate(req: schemas.GenerateRequest, db: Session = Depends(get_db)):
-    version = crud.create_version(db, name=req.version_name)
-    events = generate_timetable(db, version)
-    return events
+def generate(req: schemas.GenerateRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    Generate a timetable and return its events. A request identical to one still solving in this API process
+    gets that run's version; X-Version-Id and X-Version-Name name the version the events belong to and
+    X-Joined-Run is 1 when the request attached to another request's run.
+    """
+    run, leader = _start(req, db)
+    run.wait()
+    if run.status != "done":
+        if isinstance(run.error, dict) and "findings" in run.error:
+            raise HTTPException(status_code=422, detail=run.error)
+        raise HTTPException(status_code=400, detail=run.error)
+    response.headers["X-Version-Id"] = str(run.version_id)
+    response.headers["X-Version-Name"] = run.version_name
+    response.headers["X-Joined-Run"] = "0" if leader else "1"
+    return crud.get_events(db, version_id=run.version_id)
+
+def _run_generation(run: SolveRun, req: schemas.GenerateRequest) -> None:
+    # Background generation with its own DB session
+    run_generation(run, req, SessionLocal)
+
+def _get_run(run_id: int) -> SolveRun:
+    run = progress_service.get(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+@router.post("/runs")
+def start_run(req: schemas.GenerateRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Start a generation in the background, or join the one running in this API process with identical input
+    (joined_existing_run; the version then takes that run's version_name); follow it at /runs/{run_id}/events
+    """
+    run, leader = _start(req, db, background_tasks)
+    return dict(run.summary(), joined_existing_run=not leader, requested_version_name=req.version_name)
+
+@router.get("/runs")
+def list_runs():
+    return [r.summary() for r in progress_service.list()]
+
+@router.get("/runs/{run_id}")
+def get_run(run_id: int):
+    return _get_run(run_id).summary()
+
+@router.get("/runs/{run_id}/events")
+async def stream_run(run_id: int, request: Request):
+    """
+    Server-Sent Events: stage starts, every improving solution (objective, bound, time, placed sessions)
+    and a final "finished" event. Reconnecting clients resume after Last-Event-ID.
+    """
+    run = _get_run(run_id)
+    last = request.headers.get("last-event-id")
+    start = int(last) + 1 if last and last.isdigit() else 0
+
+    async def stream():
+        seq = start
+        while True:
+            updates = await run_in_threadpool(run.since, seq, 15.0)
+            for u in updates:
+                yield f"id: {u['seq']}\nevent: {u['type']}\ndata: {json.dumps(u)}\n\n"
+            seq += len(updates)
+            if run.finished and seq >= len(run.updates):
+                break
+            if not updates:
+                yield ": keep-alive\n\n"
+            if await request.is_disconnected():
+                break
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.post("/runs/{run_id}/accept")
+def accept_run(run_id: int):
+    """
+    Stop the search and save the best timetable found so far as the run's version
+    """
+    run = _get_run(run_id)
+    if run.finished:
+        raise HTTPException(status_code=409, detail=f"Run already {run.status}")
+    run.request_stop(accept=True)
+    return run.summary()
+
+@router.post("/runs/{run_id}/cancel")
+def cancel_run(run_id: int):
+    """
+    Stop the search and discard the run
+    """
+    run = _get_run(run_id)
+    if run.finished:
+        raise HTTPException(status_code=409, detail=f"Run already {run.status}")
+    run.request_stop(accept=False)
+    return run.summary()
+
+@router.post("/jobs", response_model=schemas.SolveJob)
+def enqueue_job(req: schemas.GenerateRequest, db: Session = Depends(get_db)):
+    """
+    Queue a generation for the solve-job workers (`python -m app.cli.worker`); a queued or running
+    job with identical input is returned instead of a new one
+    """
+    return job_queue.enqueue(db, req, _fingerprint(req, db))
+
+@router.get("/jobs", response_model=List[schemas.SolveJob])
+def list_jobs(status: Optional[str] = None, limit: int = 50, db: Session = Depends(get_db)):
+    return job_queue.list_jobs(db, status=status, limit=limit)
+
+def _get_job(db: Session, job_id: int) -> models.SolveJob:
+    job = job_queue.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=schemas.SolveJob)
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Job status, lease and the latest progress update sent by the worker's heartbeat
+    """
+    return _get_job(db, job_id)
+
+def _stop_job(db: Session, job_id: int, mode: str) -> models.SolveJob:
+    _get_job(db, job_id)
+    try:
+        return job_queue.request_stop(db, job_id, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/jobs/{job_id}/accept", response_model=schemas.SolveJob)
+def accept_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Stop the search at the worker's next heartbeat and save the best timetable found so far; 409 while the
+    job is still queued or once it has finished
+    """
+    return _stop_job(db, job_id, "accept")
+
+@router.post("/jobs/{job_id}/cancel", response_model=schemas.SolveJob)
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Cancel a queued job, or stop a running one at its next heartbeat and discard it
+    """
+    return _stop_job(db, job_id, "cancel")
+
+@router.post("/scenarios")
+def evaluate_scenarios(req: schemas.ScenarioRequest, db: Session = Depends(get_db)):
+    """
+    Solve what-if variants of the current data in parallel (nothing is written); each result reports
+    feasibility, stage objectives, seat-hour utilisation and events moved against the base version
+    """
+    if not req.scenarios:
+        raise HTTPException(status_code=400, detail="No scenarios given")
+    try:
+        return scenario_service.evaluate(db, req)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/scenarios")
+def list_scenarios():
+    return scenario_service.list()
+
+def _get_scenario(scenario_id: int):
+    result = scenario_service.get(scenario_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    return result
+
+@router.get("/scenarios/{scenario_id}")
+def get_scenario(scenario_id: int):
+    """
+    A scenario result with its events
+    """
+    return _get_scenario(scenario_id)
+
+@router.post("/scenarios/{scenario_id}/promote", response_model=schemas.Version)
+def promote_scenario(scenario_id: int, req: schemas.PromoteScenarioRequest, db: Session = Depends(get_db)):
+    """
+    Save a solved scenario's timetable as a new version (the overrides are not applied to the data)
+    """
+    _get_scenario(scenario_id)
+    try:
+        return scenario_service.promote(db, scenario_id, req.version_name)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/versions", response_model=List[schemas.Version])
+def list_versions(db: Session = Depends(get_db)):
+    """
+    Versions newest first, with the metrics recorded when they were generated (seat-hour utilisation, solve stages)
+    """
+    return db.query(models.Version).order_by(models.Version.created_at.desc()).all()
+
+@router.get("/analysis/capacity")
+def capacity_analysis(db: Session = Depends(get_db)):
+    """
+    Demand vs supply per session, group, lecturer and room class; any finding means generation would be refused
+    """
+    findings = analyze_capacity(prepare_input(db))
+    return {"feasible": not findings, "findings": findings}
+
+@router.get("/analysis/domains")
+def domain_analysis(limit: Optional[int] = 50, db: Session = Depends(get_db)):
+    """
+    Feasible (room, slot) placements per session, smallest first, with per-slot and per-room contention
+    """
+    return profile_domains(prepare_input(db), limit=limit)
 
 @router.get("/events", response_model=List[schemas.TimetableEvent])
 def list_events(
@@ -139,6 +374,20 @@ async def publish_timetable(
     # save
     return crud.add_event(db, data)
 
+@router.post("/events/{event_id}/pin", response_model=schemas.TimetableEvent)
+def pin_event(event_id: int, pinned: bool = True, db: Session = Depends(get_db)):
+    """
+    Pin (or unpin with ?pinned=false) an event; pinned events keep their placement in later generations
+    """
+    ev = db.query(models.TimetableEvent).get(event_id)
+    if not ev:
+        raise HTTPException(status_code=404, detail="Event not found")
+    ev.pinned = pinned
+    db.add(ev)
+    db.commit()
+    db.refresh(ev)
+    return ev
+
 @router.post("/events/{event_id}/move", response_model=schemas.TimetableEvent)
 def move_event(event_id: int, req: schemas.MoveEventRequest, db: Session = Depends(get_db)):
     ev = db.query(models.TimetableEvent).get(event_id)
@@ -14,6 +14,8 @@ class RoomBase(BaseModel):
     furniture_type: Optional[str] = None
     equipment: Optional[List[str]] = None
     availability: Optional[Dict[str, List[List[str]]]] = None
+    # Sessions the room can host at the same time; lab pools (furniture_type LAB) may host several
+    concurrent_sessions: int = 1
 
 class RoomCreate(RoomBase):
     pass
@@ -46,6 +48,8 @@ class CourseBase(BaseModel):
     requirements: Optional[Dict[str, Any]] = None
     # Mark course as project/capstone; projects are not scheduled into rooms (handled separately)
     is_project: bool = False
+    # One lecture session for all attached groups together, in a room large enough for all of them
+    combined_lecture: bool = False
     # Lab configuration
     has_lab: bool = False
     lab_weekly_sessions: int = 0
@@ -132,6 +136,7 @@ class VersionBase(BaseModel):
 class Version(VersionBase):
     id: int
     created_at: datetime
+    metrics: Optional[Dict[str, Any]] = None
     model_config = ConfigDict(from_attributes=True)
 
 # -----------------
@@ -146,6 +151,7 @@ class TimetableEventBase(BaseModel):
     start: time
     end: time
     version_id: int
+    pinned: bool = False
 
 class TimetableEventCreate(TimetableEventBase):
     pass
@@ -159,6 +165,58 @@ class TimetableEvent(TimetableEventBase):
 # -----------------
 class GenerateRequest(BaseModel):
     version_name: str = Field(default="auto")
+    # Write the built CP-SAT model, session mapping and parameters to SOLVER_DUMP_DIR for offline replay
+    dump_model: bool = False
+    # Pinned events of the base version (default: the latest existing version) are kept as-is;
+    # pin_event_ids pins further events of that version for this run only
+    base_version_id: Optional[int] = None
+    pin_event_ids: List[int] = []
+    # Re-solve only this department's courses (optionally one year); other events of the base version are kept
+    department: Optional[str] = None
+    year: Optional[int] = None
+
+class SolveJob(BaseModel):
+    id: int
+    status: str
+    params: Dict[str, Any]
+    fingerprint: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    attempts: int
+    stop_request: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+    version_id: Optional[int] = None
+    error: Optional[Any] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class ScenarioOverride(BaseModel):
+    # "close" (rooms: removed from the data), "unavailable" (rooms/lecturers: block a day, or start-end of it)
+    # or "update" (replace entity fields, e.g. {"capacity": 40})
+    op: str
+    kind: str  # rooms | groups | lecturers | courses
+    id: int
+    day: Optional[str] = None
+    start: Optional[str] = None
+    end: Optional[str] = None
+    fields: Dict[str, Any] = {}
+
+class Scenario(BaseModel):
+    name: str
+    overrides: List[ScenarioOverride] = []
+
+class ScenarioRequest(BaseModel):
+    # Pinned events of the base version (default: the latest version) are kept, and moves are counted against it
+    base_version_id: Optional[int] = None
+    scenarios: List[Scenario]
+    # Feasibility budget per scenario in seconds (default SOLVER_FEASIBILITY_TIME_LIMIT)
+    time_limit: Optional[float] = None
+
+class PromoteScenarioRequest(BaseModel):
+    version_name: str = Field(default="scenario")
 
 class MoveEventRequest(BaseModel):
     day: str
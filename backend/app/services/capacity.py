@@ -0,0 +1,165 @@
+from typing import List, Dict, Any
+import numpy as np
+
+from ..config import settings
+from ..solver_input import SolverInput
+
+
+class InfeasibleInstanceError(RuntimeError):
+    """Raised before solving when simple demand/supply counting already proves the instance infeasible."""
+
+    def __init__(self, findings: List[Dict[str, Any]]) -> None:
+        self.findings = findings
+        super().__init__(f"Timetable is infeasible before solving: {len(findings)} capacity problem(s) found")
+
+
+def _by_day(inp: SolverInput, minutes_per_day: np.ndarray) -> Dict[str, int]:
+    return {d: int(m) for d, m in zip(inp.grid.days, minutes_per_day)}
+
+
+def _fmt_days(by_day: Dict[str, int]) -> str:
+    return ", ".join(f"{d} {m}" for d, m in by_day.items())
+
+
+def _room_class_label(inp: SolverInput, members: np.ndarray) -> str:
+    rooms = [inp.rooms[ri] for ri in np.flatnonzero(members)]
+    kinds = {(r.get("furniture_type") or "").upper() for r in rooms}
+    if len(kinds) == 1 and "" not in kinds:
+        return f"{kinds.pop()} rooms ({len(rooms)})"
+    names = [r["name"] for r in rooms[:5]]
+    more = f" +{len(rooms) - 5} more" if len(rooms) > 5 else ""
+    return f"rooms {', '.join(names)}{more}"
+
+
+def _session_reason(inp: SolverInput, si: int) -> str:
+    s = inp.sessions[si]
+    if inp.session_span[si] == 0:
+        return f"duration {s.minutes} min does not fit the {inp.grid.slot_minutes}-minute slot grid"
+    if not inp.grid.fits(s.minutes).any():
+        return f"duration {s.minutes} min does not fit any run of back-to-back periods"
+    if not inp.room_ok[si].any():
+        kind = "lab" if s.is_lab else "lecture"
+        return f"no {kind} room meets its requirements {s.requirements or {}}"
+    if not inp.session_starts[si].any():
+        who = "group" if s.is_lab else "group and lecturer"
+        return f"no {s.minutes}-minute window where the {who} are available"
+    return "no compatible room is free during any window where the group and lecturer are available"
+
+
+def analyze_capacity(inp: SolverInput) -> List[Dict[str, Any]]:
+    """Pigeonhole checks over the session list: demand vs supply per session, group, lecturer and room class.
+
+    All figures are minutes per week; per-day supply is included so the report shows where time is missing.
+    """
+    findings: List[Dict[str, Any]] = []
+    grid = inp.grid
+    minutes = grid.minutes.astype(np.int64)
+    # day_slots[d, t]: slot t lies on day d
+    day_slots = grid.day_index[None, :] == np.arange(len(grid.days))[:, None]
+    demand = inp.session_minutes.astype(np.int64)
+    if grid.periods:
+        # A session holds whole periods: count the least time it can occupy, not its own duration
+        for si, cands in enumerate(inp.candidates):
+            if len(cands):
+                demand[si] = grid.run_minutes(int(inp.session_span[si]))[cands[:, 1]].min()
+
+    # Sessions without a single feasible placement
+    for si, cands in enumerate(inp.candidates):
+        if len(cands):
+            continue
+        s = inp.sessions[si]
+        findings.append({
+            "kind": "session",
+            "course_id": s.course_id,
+            "group_id": s.group_id,
+            "lecturer_id": s.lecturer_id,
+            "message": f"{'Lab' if s.is_lab else 'Lecture'} session of {s.course_code} for group "
+                       f"{inp.groups[inp.session_group[si]]['name']} cannot be placed: {_session_reason(inp, si)}",
+        })
+
+    # Student sets: every session occupies all atoms of its group, so the sessions sharing an atom
+    # (a subgroup's own plus its cohort's) must fit into the time those groups can use
+    for members in inp.atom_members():
+        gis = np.flatnonzero(inp.session_group_mask[members].any(axis=0))
+        need = int(demand[members].sum())
+        have_day = (inp.group_avail[gis].any(axis=0) * minutes) @ day_slots.T
+        if need <= have_day.sum():
+            continue
+        # Report against the most specific group involved
+        gi = gis[np.argmin(inp.group_atoms[gis].sum(axis=1))]
+        g = inp.groups[gi]
+        by_day = _by_day(inp, have_day)
+        names = ", ".join(inp.groups[i]["name"] for i in gis)
+        findings.append({
+            "kind": "group",
+            "group_id": g["id"],
+            "group_ids": [inp.groups[i]["id"] for i in gis],
+            "demand_minutes": need,
+            "supply_minutes": int(have_day.sum()),
+            "supply_by_day": by_day,
+            "message": f"Students of group {g['name']} need {need} min/week of classes (groups {names}) but only "
+                       f"{int(have_day.sum())} min are usable ({_fmt_days(by_day)})",
+        })
+
+    # Lecturers: only lectures block lecturer time
+    lectures = ~inp.session_is_lab
+    lec_demand = np.bincount(inp.session_lecturer[lectures], weights=demand[lectures], minlength=len(inp.lecturers))
+    lec_supply_day = (inp.lecturer_avail * minutes) @ day_slots.T
+    # A hard max_daily_load also caps what each day can supply; the cap counts lecture minutes, which on a
+    # period grid may be less than the periods they hold, so the supply is scaled by that ratio
+    capped = settings.solver_lecturer_load == "hard"
+    if capped:
+        own = np.bincount(inp.session_lecturer[lectures], weights=inp.session_minutes[lectures],
+                          minlength=len(inp.lecturers))
+        for li in np.flatnonzero(inp.lecturer_max_daily):
+            caps = np.array([inp.lecturer_daily_cap(li, di) for di in range(len(grid.days))], dtype=np.float64)
+            if own[li]:
+                caps *= lec_demand[li] / own[li]
+            lec_supply_day[li] = np.minimum(lec_supply_day[li], caps)
+    for li in np.flatnonzero(lec_demand > lec_supply_day.sum(axis=1)):
+        l = inp.lecturers[li]
+        by_day = _by_day(inp, lec_supply_day[li])
+        limit = f", at most {l['max_daily_load']} min/day" if capped and l.get("max_daily_load") else ""
+        findings.append({
+            "kind": "lecturer",
+            "lecturer_id": l["id"],
+            "demand_minutes": int(lec_demand[li]),
+            "supply_minutes": int(lec_supply_day[li].sum()),
+            "supply_by_day": by_day,
+            "message": f"Lecturer {l['name']} teaches {int(lec_demand[li])} min/week but is available for only "
+                       f"{int(lec_supply_day[li].sum())} min ({_fmt_days(by_day)}{limit})",
+        })
+
+    # Room classes: for each distinct set of compatible rooms, the sessions confined to that set
+    # must fit into those rooms' available time (Hall's condition restricted to the observed sets)
+    if len(inp.sessions) and len(inp.rooms):
+        # Lab pools supply their minutes once per concurrent session
+        room_supply_day = (inp.room_capacity * minutes) @ day_slots.T
+        room_sets = np.unique(inp.room_ok, axis=0)
+        for members in room_sets:
+            if not members.any():
+                continue
+            confined = ~(inp.room_ok & ~members).any(axis=1) & inp.room_ok.any(axis=1)
+            need = int(demand[confined].sum())
+            have_day = room_supply_day[members].sum(axis=0)
+            if need > have_day.sum():
+                by_day = _by_day(inp, have_day)
+                label = _room_class_label(inp, members)
+                findings.append({
+                    "kind": "room_class",
+                    "room_ids": [inp.rooms[ri]["id"] for ri in np.flatnonzero(members)],
+                    "sessions": int(confined.sum()),
+                    "demand_minutes": need,
+                    "supply_minutes": int(have_day.sum()),
+                    "supply_by_day": by_day,
+                    "message": f"{int(confined.sum())} sessions can only use {label}: they need {need} min/week "
+                               f"but those rooms offer {int(have_day.sum())} min ({_fmt_days(by_day)})",
+                })
+
+    return findings
+
+
+def check_capacity(inp: SolverInput) -> None:
+    findings = analyze_capacity(inp)
+    if findings:
+        raise InfeasibleInstanceError(findings)
@@ -0,0 +1,259 @@
+from typing import List, Dict, Tuple, Any, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import logging
+import multiprocessing
+import os
+import numpy as np
+from ortools.sat.python import cp_model
+
+from ..config import settings
+from ..solver import (
+    VarKey, SolveCancelled, apply_solver_parameters, build_model, solve_staged, _stage_stats,
+)
+from ..solver_input import SolverInput
+from .shared_input import attach_input, share_input
+
+logger = logging.getLogger(__name__)
+
+# Settings read while solving a day (grid helpers, model building, staged solving). Day-solve processes are
+# spawned and read the environment, so the parent's current values are sent with every task: runtime changes
+# (a snapshot's settings, a benchmark variant) must reach them too. Extend when the solve path reads a new one.
+_DAY_SOLVE_SETTINGS = (
+    "week_days", "day_start", "day_end", "slot_minutes", "periods", "period_break_minutes", "lunch_start",
+    "lunch_end", "solver_stages", "solver_stage_time_limit", "solver_feasibility_time_limit", "solver_workers",
+    "solver_lecturer_load", "solver_redundant_cuts", "solver_weekly_patterns", "solver_preset_path",
+    "solver_dump_dir",
+)
+
+
+def _day_model(inp: SolverInput) -> Tuple[cp_model.CpModel, Dict[Tuple[int, int], cp_model.IntVar]]:
+    # y[(session, day)]: the session is held on that day. The constraints are relaxations of the full model
+    # (slot counts per day instead of exact slots), so a day assignment may still fail in its day subproblem.
+    grid = inp.grid
+    D = len(grid.days)
+    model = cp_model.CpModel()
+    day_slots = [grid.day_index == di for di in range(D)]
+    span = inp.session_span.astype(np.int64)
+
+    y: Dict[Tuple[int, int], cp_model.IntVar] = {}
+    by_day: List[List[int]] = [[] for _ in range(D)]
+    for si, cands in enumerate(inp.candidates):
+        days = np.unique(grid.day_index[cands[:, 1]]).tolist() if len(cands) else []
+        if not days:
+            model.AddBoolOr([])  # force UNSAT if no feasible placement
+            continue
+        for di in days:
+            y[(si, di)] = model.NewBoolVar(f"y_s{si}_{grid.days[di]}")
+            by_day[di].append(si)
+        model.AddExactlyOne([y[(si, di)] for di in days])
+
+    # Student sets and lecturers cannot be busy for more base slots than a day has free for them
+    atom_sessions = inp.session_atoms
+    lecture = ~inp.session_is_lab
+    for di in range(D):
+        members = by_day[di]
+        if not members:
+            continue
+        for a in range(atom_sessions.shape[1]):
+            load = [(int(span[si]), y[(si, di)]) for si in members if atom_sessions[si, a]]
+            free = int((day_slots[di] & ~inp.atom_fixed_busy[a]).sum())
+            if sum(w for w, _ in load) > free:
+                model.Add(sum(w * v for w, v in load) <= free)
+        by_lecturer: Dict[int, List[int]] = {}
+        for si in members:
+            if lecture[si]:
+                by_lecturer.setdefault(int(inp.session_lecturer[si]), []).append(si)
+        for li, sis in by_lecturer.items():
+            free = int((day_slots[di] & inp.lecturer_avail[li]).sum())
+            if sum(int(span[si]) for si in sis) > free:
+                model.Add(sum(int(span[si]) * y[(si, di)] for si in sis) <= free)
+            cap = inp.lecturer_daily_cap(li, di) if settings.solver_lecturer_load == "hard" else None
+            if cap is not None and sum(int(inp.session_minutes[si]) for si in sis) > cap:
+                model.Add(sum(int(inp.session_minutes[si]) * y[(si, di)] for si in sis) <= cap)
+        # Rooms: sessions that can only use rooms of one class need no more room-slots than the class offers
+        classes = {inp.room_ok[si].tobytes(): inp.room_ok[si] for si in members}
+        for rooms in classes.values():
+            inside = [si for si in members if not (inp.room_ok[si] & ~rooms).any()]
+            supply = int(inp.room_capacity[rooms][:, day_slots[di]].sum())
+            if sum(int(span[si]) for si in inside) > supply:
+                model.Add(sum(int(span[si]) * y[(si, di)] for si in inside) <= supply)
+
+    # Objective: repeated sessions of a course and audience on distinct days first, then the busiest
+    # day as light as possible (balanced days leave every day subproblem some slack)
+    blocks: Dict[Tuple[Any, ...], List[int]] = {}
+    for si, s in enumerate(inp.sessions):
+        blocks.setdefault((s.course_id, tuple(s.group_ids)), []).append(si)
+    excess = []
+    for key, members in blocks.items():
+        if len(members) < 2:
+            continue
+        for di in range(D):
+            vars_d = [y[(si, di)] for si in members if (si, di) in y]
+            if len(vars_d) > 1:
+                e = model.NewIntVar(0, len(vars_d) - 1, f"same_day_c{key[0]}_{len(excess)}")
+                model.Add(e >= sum(vars_d) - 1)
+                excess.append(e)
+    total = int(span.sum())
+    peak = model.NewIntVar(0, total, "peak_day_load")
+    for di in range(D):
+        if by_day[di]:
+            model.Add(sum(int(span[si]) * y[(si, di)] for si in by_day[di]) <= peak)
+    model.Minimize((total + 1) * sum(excess) + peak)
+    return model, y
+
+
+def _placement_events(inp: SolverInput, solution: Dict[VarKey, bool]) -> List[Dict[str, Any]]:
+    # Placed sessions as fixed-event dicts (one per attending group), for solving the rest around them
+    events = []
+    for (si, ri, ti), value in solution.items():
+        if not value:
+            continue
+        s = inp.sessions[si]
+        d, st, _ = inp.grid.slots[ti]
+        end = inp.grid.end_time(ti, s.minutes)
+        for gid in s.group_ids:
+            events.append({"id": None, "course_id": s.course_id, "room_id": inp.rooms[ri]["id"], "group_id": gid,
+                           "lecturer_id": s.lecturer_id, "day": d, "start": st.strftime("%H:%M"),
+                           "end": end.strftime("%H:%M")})
+    return events
+
+
+def _split_workers(params: Dict[str, Any], parallel: int) -> Dict[str, Any]:
+    # Day subproblems run side by side; share the configured (or all) cores between them
+    total = int(params.get("num_search_workers") or os.cpu_count() or 1)
+    return dict(params, num_search_workers=max(1, total // parallel))
+
+
+def _solve_day(inp: SolverInput, indices: List[int], di: int, params: Dict[str, Any],
+               stages: Optional[List[str]] = None) -> Tuple[int, Optional[Dict[VarKey, bool]], List[Dict[str, Any]]]:
+    # One day's sessions placed on that day; the solution keeps only the chosen placements
+    sub = inp.subset(indices, day=di)
+    solution, stats = solve_staged(build_model(sub, weekly_patterns="off"), params, stages=stages)
+    if solution is not None:
+        solution = {k: True for k, v in solution.items() if v}
+    return di, solution, [dict(st, stage=f"{inp.grid.days[di]}/{st['stage']}") for st in stats]
+
+
+def _solve_shared_day(handle: Dict[str, Any], indices: List[int], di: int, params: Dict[str, Any],
+                      solver_settings: Dict[str, Any],
+                      stages: Optional[List[str]] = None) -> Tuple[int, Optional[Dict[VarKey, bool]], List[Dict[str, Any]]]:
+    # Runs in a pool process: the input is attached from shared memory, the settings come from the parent
+    for name, value in solver_settings.items():
+        setattr(settings, name, value)
+    return _solve_day(attach_input(handle), indices, di, params, stages)
+
+
+def solve_decomposed(inp: SolverInput, params: Dict[str, Any],
+                     progress=None) -> Tuple[Optional[Dict[VarKey, bool]], List[Dict[str, Any]]]:
+    """Day-then-slot decomposition for instances too large for one placement model.
+
+    1. A small model assigns every session to a day (per-day capacity relaxations, repeated sessions on
+       distinct days, busiest day as light as possible).
+    2. Each day's sessions get rooms and slots in an independent staged solve; days run in parallel, in
+       threads or (SOLVER_DAY_EXECUTOR=processes) in worker processes that attach the input from shared
+       memory instead of receiving a copy.
+    3. Repair: sessions of days whose subproblem failed are re-solved over the whole week around
+       everything already placed.
+    Returns the same (assignment, stage statistics) pair as solve_staged; the assignment is None when
+    the day model or the repair fails. A progress run sees each phase and a solution update after the day
+    model, each day and the repair. A cancel request stops the day model and is honoured between phases.
+    An accept request stops the day model at its best assignment; from then on the remaining day solves
+    and the repair only look for a feasible placement (no objective stages), so the run finishes with a
+    complete timetable as soon as possible. Day solves already started (in process mode: all of them) finish
+    their stages.
+    """
+    stats: List[Dict[str, Any]] = []
+    grid = inp.grid
+
+    def cancelled() -> None:
+        if progress is not None and progress.stop_request == "cancel":
+            raise SolveCancelled("Generation was cancelled")
+
+    def accepted() -> Optional[List[str]]:
+        # Objective stages still to run: none once the coordinator accepted (None = the configured stages)
+        cancelled()
+        return [] if progress is not None and progress.stop_request == "accept" else None
+
+    def phase(name: str) -> None:
+        cancelled()
+        if progress is not None:
+            progress.publish({"type": "stage", "stage": name})
+
+    def placed(stage: str, count: int, objective: Optional[float] = None) -> None:
+        if progress is not None:
+            progress.publish({"type": "solution", "stage": stage, "solution": 1, "objective": objective,
+                              "bound": None, "stage_time": stats[-1]["wall_time"] if stats else None,
+                              "placed": count})
+
+    phase("days")
+    model, y = _day_model(inp)
+    solver = cp_model.CpSolver()
+    apply_solver_parameters(solver, params)
+    if progress is not None and accepted() is None:
+        progress.attach(solver)
+    try:
+        status = solver.Solve(model)
+    finally:
+        if progress is not None:
+            progress.attach(None)
+    stats.append(_stage_stats("days", solver, status))
+    cancelled()
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, stats
+    placed("days", 0, solver.ObjectiveValue())
+    day_sessions: Dict[int, List[int]] = {}
+    for (si, di), var in y.items():
+        if solver.BooleanValue(var):
+            day_sessions.setdefault(di, []).append(si)
+
+    # Repeated sessions already sit on distinct days, so patterns are not posted inside a day
+    phase("slots")
+    parallel = max(1, min(len(day_sessions), settings.solver_day_workers or os.cpu_count() or 1))
+    day_params = _split_workers(params, parallel)
+
+    solution: Dict[VarKey, bool] = {}
+    failed: List[int] = []
+    days = sorted(day_sessions)
+    if settings.solver_day_executor == "processes" and parallel > 1:
+        shared = share_input(inp)
+        solver_settings = {name: getattr(settings, name) for name in _DAY_SOLVE_SETTINGS}
+        pool = ProcessPoolExecutor(max_workers=parallel, mp_context=multiprocessing.get_context("spawn"))
+        results = pool.map(_solve_shared_day, [shared.handle] * len(days), [day_sessions[di] for di in days], days,
+                           [day_params] * len(days), [solver_settings] * len(days), [accepted()] * len(days))
+    else:
+        shared = None
+        pool = ThreadPoolExecutor(max_workers=parallel)
+        # The stages are read when a day starts, so days after an accept skip the objectives
+        results = pool.map(lambda di: _solve_day(inp, day_sessions[di], di, day_params, accepted()), days)
+    try:
+        with pool:
+            for di, sub_solution, sub_stats in results:
+                stats.extend(sub_stats)
+                if sub_solution is None:
+                    logger.info("Day %s subproblem failed; %d sessions go to repair", grid.days[di], len(day_sessions[di]))
+                    failed.extend(day_sessions[di])
+                    continue
+                origin = day_sessions[di]
+                for (si, ri, ti), value in sub_solution.items():
+                    if value:
+                        solution[(origin[si], ri, ti)] = True
+                placed(grid.days[di], len(solution))
+    finally:
+        if shared is not None:
+            shared.close()
+
+    cancelled()
+    if failed:
+        phase("repair")
+        fixed = list(inp.fixed) + _placement_events(inp, solution)
+        rep = SolverInput(dict(inp.dataset, fixed=fixed), grid, sessions=[inp.sessions[si] for si in failed])
+        rep_solution, rep_stats = solve_staged(build_model(rep), params, stages=accepted())
+        stats.extend(dict(st, stage=f"repair/{st['stage']}") for st in rep_stats)
+        if rep_solution is None:
+            return None, stats
+        for (si, ri, ti), value in rep_solution.items():
+            if value:
+                solution[(failed[si], ri, ti)] = True
+        placed("repair", len(solution))
+    cancelled()
+    return solution, stats
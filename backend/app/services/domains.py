@@ -0,0 +1,92 @@
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+from ..solver_input import SolverInput
+
+
+def _expand_coverage(inp: SolverInput):
+    # One row per (candidate, covered base slot): session index, room index, slot index
+    sess, room, slot = [], [], []
+    for si, cands in enumerate(inp.candidates):
+        if not len(cands):
+            continue
+        span = int(inp.session_span[si])
+        offsets = np.arange(span, dtype=np.int32)
+        sess.append(np.full(len(cands) * span, si, dtype=np.int32))
+        room.append(np.repeat(cands[:, 0], span))
+        slot.append((cands[:, 1][:, None] + offsets[None, :]).ravel())
+    if not sess:
+        empty = np.zeros(0, dtype=np.int32)
+        return empty, empty, empty
+    return np.concatenate(sess), np.concatenate(room), np.concatenate(slot)
+
+
+def profile_domains(inp: SolverInput, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Domain sizes after filtering: feasible (room, slot) placements per session, ranked smallest first,
+    plus per-slot and per-room contention (sessions that could use the slot/room vs its free capacity)."""
+    S, R, T = len(inp.sessions), len(inp.rooms), len(inp.grid)
+    sizes = np.array([len(c) for c in inp.candidates], dtype=np.int64)
+
+    ranked: List[Dict[str, Any]] = []
+    for si in np.argsort(sizes, kind="stable")[: limit or S]:
+        s = inp.sessions[si]
+        cands = inp.candidates[si]
+        ranked.append({
+            "session": int(si),
+            "course_id": s.course_id,
+            "course_code": s.course_code,
+            "group_id": s.group_id,
+            "group": inp.groups[inp.session_group[si]]["name"],
+            "lecturer_id": s.lecturer_id,
+            "is_lab": s.is_lab,
+            "minutes": s.minutes,
+            "candidates": int(sizes[si]),
+            "rooms": int(len(np.unique(cands[:, 0]))) if len(cands) else 0,
+            "start_slots": int(len(np.unique(cands[:, 1]))) if len(cands) else 0,
+        })
+
+    sess, room, slot = _expand_coverage(inp)
+    # Distinct sessions that have at least one candidate covering each slot / using each room
+    slot_pairs = np.unique(sess.astype(np.int64) * T + slot)
+    slot_demand = np.bincount(slot_pairs % T, minlength=T) if T else np.zeros(0, dtype=np.int64)
+    room_pairs = np.unique(sess.astype(np.int64) * R + room) if R else np.zeros(0, dtype=np.int64)
+    room_demand = np.bincount(room_pairs % R, minlength=R) if R else np.zeros(0, dtype=np.int64)
+    all_rooms = np.concatenate([c[:, 0] for c in inp.candidates]) if S else np.zeros(0, dtype=np.int32)
+    room_placements = np.bincount(all_rooms, minlength=R)
+    # Free capacity counts a lab pool once per concurrent session
+    rooms_free = inp.room_capacity.sum(axis=0) if R else np.zeros(T, dtype=np.int64)
+    slots_free = inp.room_capacity.sum(axis=1) if R else np.zeros(0, dtype=np.int64)
+
+    slots = []
+    for t, (d, st, en) in enumerate(inp.grid.slots):
+        slots.append({
+            "slot": t,
+            "day": d,
+            "start": st.strftime("%H:%M"),
+            "end": en.strftime("%H:%M"),
+            "sessions": int(slot_demand[t]),
+            "rooms_available": int(rooms_free[t]),
+            "contention": round(float(slot_demand[t]) / rooms_free[t], 2) if rooms_free[t] else None,
+        })
+    slots.sort(key=lambda e: -(e["contention"] if e["contention"] is not None else float(e["sessions"])))
+
+    rooms = []
+    for ri, r in enumerate(inp.rooms):
+        rooms.append({
+            "room_id": r["id"],
+            "room": r["name"],
+            "sessions": int(room_demand[ri]),
+            "slots_available": int(slots_free[ri]),
+            "placements": int(room_placements[ri]),
+            "contention": round(float(room_demand[ri]) / slots_free[ri], 2) if slots_free[ri] else None,
+        })
+    rooms.sort(key=lambda e: -(e["contention"] if e["contention"] is not None else float(e["sessions"])))
+
+    return {
+        "sessions_total": S,
+        "candidates_total": int(sizes.sum()),
+        "unplaceable": int((sizes == 0).sum()),
+        "sessions": ranked,
+        "slots": slots,
+        "rooms": rooms,
+    }
@@ -0,0 +1,313 @@
+"""solve_jobs: a generation queue in Postgres, drained by any number of `python -m app.cli.worker` processes.
+
+A worker claims the oldest queued job with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never
+claim the same row and never wait on each other's locks. The claim is a lease the worker extends by
+heartbeat; the heartbeat also carries the latest progress update out and the coordinator's stop request in.
+A job whose lease expires (worker killed, machine or network gone) is requeued by whichever worker polls
+next, up to SOLVER_JOB_MAX_ATTEMPTS claims.
+"""
+from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime, timedelta
+import logging
+import os
+import socket
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .. import models, schemas
+from .solver_worker import WarmState, run_generation
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(RuntimeError):
+    """The job was requeued or stopped under a worker that still thought it held the lease."""
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _active(db: Session, fingerprint: str) -> Optional[models.SolveJob]:
+    return (db.query(models.SolveJob)
+            .filter(models.SolveJob.fingerprint == fingerprint,
+                    models.SolveJob.status.in_(("queued", "running")))
+            .first())
+
+
+def enqueue(db: Session, req: schemas.GenerateRequest, fingerprint: Optional[str] = None) -> models.SolveJob:
+    # With a fingerprint, a queued or running job for the same input is returned instead of a new one
+    if fingerprint:
+        job = _active(db, fingerprint)
+        if job is not None:
+            return job
+    job = models.SolveJob(status="queued", params=req.dict(), fingerprint=fingerprint, attempts=0)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another API process queued the same input between the lookup and the insert
+        db.rollback()
+        job = _active(db, fingerprint) if fingerprint else None
+        if job is None:
+            raise
+        return job
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: int) -> Optional[models.SolveJob]:
+    return db.query(models.SolveJob).filter(models.SolveJob.id == job_id).first()
+
+
+def list_jobs(db: Session, status: Optional[str] = None, limit: int = 50) -> List[models.SolveJob]:
+    q = db.query(models.SolveJob)
+    if status:
+        q = q.filter(models.SolveJob.status == status)
+    return q.order_by(models.SolveJob.id.desc()).limit(limit).all()
+
+
+def request_stop(db: Session, job_id: int, mode: str) -> Optional[models.SolveJob]:
+    """Cancel a queued job on the spot, or record a stop request a running job picks up at its next heartbeat.
+
+    The row lock waits for a worker that is claiming the job right now, so the state checked is final.
+    Raises ValueError when the job cannot take the request: it has finished, or it is still queued and
+    asked to accept (there is no timetable to accept before a worker has started it).
+    """
+    job = db.query(models.SolveJob).filter(models.SolveJob.id == job_id).with_for_update().first()
+    if job is None:
+        db.rollback()
+        return None
+    if job.status not in ("queued", "running") or (job.status == "queued" and mode == "accept"):
+        status = job.status
+        db.rollback()
+        raise ValueError(f"Job {job_id} is {status}; accept needs a running job" if status == "queued"
+                         else f"Job already {status}")
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+    else:
+        job.stop_request = mode
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim(db: Session, owner: str) -> Optional[models.SolveJob]:
+    now = datetime.utcnow()
+    job = (db.query(models.SolveJob)
+           .filter(models.SolveJob.status == "queued")
+           .order_by(models.SolveJob.id)
+           .with_for_update(skip_locked=True)
+           .first())
+    if job is None:
+        db.rollback()
+        return None
+    job.status = "running"
+    job.lease_owner = owner
+    job.lease_expires_at = now + timedelta(seconds=settings.solver_job_lease_seconds)
+    job.heartbeat_at = now
+    job.attempts = (job.attempts or 0) + 1
+    job.started_at = now
+    job.progress = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def requeue_expired(db: Session) -> int:
+    """Give running jobs with an expired lease back to the queue; returns how many were released."""
+    now = datetime.utcnow()
+    expired = (db.query(models.SolveJob)
+               .filter(models.SolveJob.status == "running", models.SolveJob.lease_expires_at < now)
+               .with_for_update(skip_locked=True)
+               .all())
+    for job in expired:
+        logger.warning("Lease of job %s held by %s expired", job.id, job.lease_owner)
+        if job.stop_request == "cancel":
+            job.status = "cancelled"
+            job.finished_at = now
+        elif job.attempts >= settings.solver_job_max_attempts:
+            job.status = "failed"
+            job.error = f"Lease expired on each of {job.attempts} attempts"
+            job.finished_at = now
+        else:
+            # An accept was meant for the lost attempt's best timetable, which is gone with it; the next
+            # attempt runs with the full budget (accept it again once it is running)
+            job.status = "queued"
+            job.stop_request = None
+        job.lease_owner = None
+        job.lease_expires_at = None
+    db.commit()
+    return len(expired)
+
+
+def heartbeat(db: Session, job_id: int, owner: str, progress: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Extend the lease and store the latest progress update; returns the job's stop request."""
+    job = db.query(models.SolveJob).filter(models.SolveJob.id == job_id).with_for_update().first()
+    if job is None or job.status != "running" or job.lease_owner != owner:
+        db.rollback()
+        raise LeaseLost(f"Job {job_id} is no longer leased to {owner}")
+    now = datetime.utcnow()
+    job.heartbeat_at = now
+    job.lease_expires_at = now + timedelta(seconds=settings.solver_job_lease_seconds)
+    if progress is not None:
+        job.progress = progress
+    stop = job.stop_request
+    db.commit()
+    return stop
+
+
+def finish(db: Session, job_id: int, owner: str, status: str, version_id: Optional[int] = None,
+           error: Optional[Any] = None) -> bool:
+    # Only the lease holder may record the outcome; False means another worker owns the job now
+    job = db.query(models.SolveJob).filter(models.SolveJob.id == job_id).with_for_update().first()
+    if job is None or job.status != "running" or job.lease_owner != owner:
+        db.rollback()
+        return False
+    job.status = status
+    job.version_id = version_id
+    job.error = error
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.finished_at = datetime.utcnow()
+    db.commit()
+    return True
+
+
+class _JobRun:
+    """Progress target for a leased job: keeps the latest update for the heartbeat and applies stop requests."""
+
+    def __init__(self, job: models.SolveJob, owner: str) -> None:
+        self.id = job.id
+        self.owner = owner
+        self.stop_request: Optional[str] = None
+        self.latest: Optional[Dict[str, Any]] = None
+        self.outcome: Optional[Dict[str, Any]] = None
+        self.lost = False
+        self._solver = None
+        self._lock = threading.Lock()
+        if job.stop_request:
+            self.request_stop(job.stop_request)
+
+    def publish(self, update: Dict[str, Any]) -> None:
+        with self._lock:
+            self.latest = update
+
+    def attach(self, solver) -> None:
+        with self._lock:
+            self._solver = solver
+            if self.stop_request and solver is not None:
+                solver.StopSearch()
+
+    def request_stop(self, mode: str) -> None:
+        with self._lock:
+            if self.stop_request == "cancel":
+                return
+            self.stop_request = mode
+            if self._solver is not None:
+                self._solver.StopSearch()
+
+    def take_progress(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            update, self.latest = self.latest, None
+            return update
+
+    def finish(self, status: str, version_id: Optional[int] = None, error: Optional[Any] = None) -> None:
+        self.outcome = {"status": status, "version_id": version_id, "error": error}
+
+
+def _keep_alive(run: _JobRun, session_factory: Callable[[], Session], done: threading.Event) -> None:
+    while not done.wait(settings.solver_job_heartbeat_seconds):
+        db = session_factory()
+        try:
+            stop = heartbeat(db, run.id, run.owner, run.take_progress())
+            if stop:
+                run.request_stop(stop)
+        except LeaseLost:
+            logger.warning("Lost the lease on job %s; stopping it", run.id)
+            run.lost = True
+            run.request_stop("cancel")
+            return
+        except Exception:
+            # A missed heartbeat is retried; the lease is long enough to survive a few
+            logger.exception("Heartbeat for job %s failed", run.id)
+        finally:
+            db.close()
+
+
+def run_job(job: models.SolveJob, owner: str, session_factory: Callable[[], Session],
+            state: WarmState) -> Dict[str, Any]:
+    run = _JobRun(job, owner)
+    req = schemas.GenerateRequest(**job.params)
+    db = session_factory()
+    try:
+        # Other machines commit entity changes this process never sees, so the rows are re-read per job; the
+        # precomputed base input is kept unless they changed
+        changed = state.refresh(db)
+        if changed:
+            logger.info("Reference data changed since the last job: %s", ", ".join(changed))
+    finally:
+        db.close()
+    done = threading.Event()
+    beat = threading.Thread(target=_keep_alive, args=(run, session_factory, done), name=f"job-{job.id}-heartbeat",
+                            daemon=True)
+    beat.start()
+    try:
+        run_generation(run, req, session_factory, state.prepare)
+    finally:
+        done.set()
+        beat.join()
+    outcome = run.outcome or {"status": "failed", "version_id": None, "error": "Generation ended without an outcome"}
+    db = session_factory()
+    try:
+        recorded = not run.lost and finish(db, run.id, owner, **outcome)
+        if not recorded and outcome["version_id"] is not None:
+            # The job belongs to another worker now; its version is the one that counts. The version's events
+            # are already committed and do not cascade, so they go first.
+            version = db.query(models.Version).filter(models.Version.id == outcome["version_id"]).first()
+            if version is not None:
+                db.query(models.TimetableEvent).filter(models.TimetableEvent.version_id == version.id).delete()
+                db.delete(version)
+                db.commit()
+    finally:
+        db.close()
+    return outcome
+
+
+def work(session_factory: Optional[Callable[[], Session]] = None, owner: Optional[str] = None,
+         once: bool = False) -> int:
+    """Worker loop: requeue expired leases, claim the next job, run it; with once=True stop when the queue is empty.
+
+    Returns the number of jobs run.
+    """
+    if session_factory is None:
+        from ..database import SessionLocal
+        session_factory = SessionLocal
+    owner = owner or default_owner()
+    state = WarmState()
+    ran = 0
+    logger.info("Worker %s polling solve_jobs", owner)
+    while True:
+        db = session_factory()
+        try:
+            requeue_expired(db)
+            job = claim(db, owner)
+            if job is not None:
+                db.expunge(job)
+        finally:
+            db.close()
+        if job is None:
+            if once:
+                return ran
+            time.sleep(settings.solver_job_poll_seconds)
+            continue
+        logger.info("Job %s claimed (attempt %d)", job.id, job.attempts)
+        t0 = time.perf_counter()
+        outcome = run_job(job, owner, session_factory, state)
+        ran += 1
+        logger.info("Job %s %s in %.1fs", job.id, outcome["status"], time.perf_counter() - t0)
@@ -0,0 +1,44 @@
+from typing import List, Dict, Any, Tuple
+
+from .. import models
+from ..solver_input import SolverInput, is_lab_room
+
+
+def _minutes(ev: models.TimetableEvent) -> int:
+    return (ev.end.hour * 60 + ev.end.minute) - (ev.start.hour * 60 + ev.start.minute)
+
+
+def seat_utilisation(inp: SolverInput, events: List[models.TimetableEvent]) -> Dict[str, Any]:
+    """Seat-hours of lecture rooms in a timetable: offered (room capacity x duration) vs used
+    (attending students x duration). A booking with more students than seats counts as offered but not
+    used; its students without a seat are reported as overflow. Lab pools are left out."""
+    rooms = {r["id"]: r for r in inp.rooms}
+    sizes = {g["id"]: g.get("size") or 0 for g in inp.groups}
+    # A combined lecture is one event per group: count the room once with all its groups
+    occupancies: Dict[Tuple[Any, ...], List[int]] = {}
+    durations: Dict[Tuple[Any, ...], int] = {}
+    for ev in events:
+        room = rooms.get(ev.room_id)
+        if room is None or is_lab_room(room):
+            continue
+        key = (ev.room_id, ev.course_id, ev.day, ev.start)
+        occupancies.setdefault(key, []).append(ev.group_id)
+        durations[key] = _minutes(ev)
+    offered = used = overflow = overcrowded = 0
+    for key, gids in occupancies.items():
+        seats = rooms[key[0]].get("capacity") or 0
+        audience = sum(sizes.get(g, 0) for g in gids)
+        offered += seats * durations[key]
+        if audience > seats:
+            overflow += (audience - seats) * durations[key]
+            overcrowded += 1
+        else:
+            used += audience * durations[key]
+    return {
+        "seat_hours_offered": round(offered / 60, 1),
+        "seat_hours_used": round(used / 60, 1),
+        "unused_seat_hours": round((offered - used) / 60, 1),
+        "seat_utilisation": round(used / offered, 3) if offered else None,
+        "overflow_seat_hours": round(overflow / 60, 1),
+        "overcrowded_bookings": overcrowded,
+    }
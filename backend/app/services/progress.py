@@ -0,0 +1,140 @@
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import itertools
+import threading
+import time
+
+
+class SolveRun:
+    """One background generation: its progress updates and the coordinator's stop/accept request.
+
+    Updates are appended by the solver thread and read by any number of subscribers; each carries a
+    sequence number so a subscriber can ask for everything after the last update it has seen.
+    """
+
+    def __init__(self, run_id: int, version_name: str, fingerprint: Optional[str] = None) -> None:
+        self.id = run_id
+        self.version_name = version_name
+        # Input fingerprint (solver.input_fingerprint); identical requests made while the run is going attach to it
+        self.fingerprint = fingerprint
+        self.attached = 0
+        self.status = "running"  # running | done | failed | cancelled
+        self.version_id: Optional[int] = None
+        self.error: Optional[Any] = None
+        self.created_at = datetime.utcnow()
+        self.started = time.monotonic()
+        self.updates: List[Dict[str, Any]] = []
+        # None, "accept" (stop and persist the best timetable so far) or "cancel" (stop and discard)
+        self.stop_request: Optional[str] = None
+        self._solver = None
+        self._cond = threading.Condition()
+
+    @property
+    def elapsed(self) -> float:
+        return round(time.monotonic() - self.started, 3)
+
+    @property
+    def finished(self) -> bool:
+        return self.status != "running"
+
+    def publish(self, update: Dict[str, Any]) -> None:
+        with self._cond:
+            self._append(update)
+
+    def _append(self, update: Dict[str, Any]) -> None:
+        # Caller holds self._cond
+        self.updates.append(dict(update, seq=len(self.updates), elapsed=self.elapsed))
+        self._cond.notify_all()
+
+    def since(self, seq: int, timeout: float = 0.0) -> List[Dict[str, Any]]:
+        # Updates with sequence number >= seq, waiting up to timeout for the first one to arrive
+        with self._cond:
+            if len(self.updates) <= seq and not self.finished and timeout > 0:
+                self._cond.wait(timeout)
+            return self.updates[seq:]
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        # Block until the run has finished (True) or the timeout has passed (False)
+        with self._cond:
+            return self._cond.wait_for(lambda: self.finished, timeout)
+
+    def attach(self, solver) -> None:
+        # The CpSolver currently running for this run; a stop request interrupts it
+        with self._cond:
+            self._solver = solver
+            if self.stop_request and solver is not None:
+                solver.StopSearch()
+
+    def request_stop(self, accept: bool) -> None:
+        with self._cond:
+            self.stop_request = "accept" if accept else "cancel"
+            if self._solver is not None:
+                self._solver.StopSearch()
+
+    def finish(self, status: str, version_id: Optional[int] = None, error: Optional[Any] = None) -> None:
+        # The "finished" update is appended together with the status change, so a subscriber that sees the
+        # run finished has it in the updates already
+        with self._cond:
+            self.status = status
+            self.version_id = version_id
+            self.error = error
+            self._solver = None
+            self._append({"type": "finished", "status": status, "version_id": version_id, "error": error})
+
+    def summary(self) -> Dict[str, Any]:
+        last = next((u for u in reversed(self.updates) if u["type"] == "solution"), None)
+        return {
+            "run_id": self.id,
+            "version_name": self.version_name,
+            "status": self.status,
+            "version_id": self.version_id,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "elapsed": self.elapsed,
+            "stop_request": self.stop_request,
+            "fingerprint": self.fingerprint,
+            "attached": self.attached,
+            "latest_solution": last,
+        }
+
+
+class ProgressService:
+    # In-process registry of solve runs; finished runs are kept so late subscribers still see the outcome
+    def __init__(self, keep: int = 50) -> None:
+        self.keep = keep
+        self._runs: Dict[int, SolveRun] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, version_name: str, fingerprint: Optional[str] = None) -> SolveRun:
+        with self._lock:
+            return self._create(version_name, fingerprint)
+
+    def single_flight(self, version_name: str, fingerprint: Optional[str]) -> Tuple[SolveRun, bool]:
+        # The unfinished run with this fingerprint, or a new run; the flag is True when the caller must start it.
+        # Only runs of this process are seen: identical requests served by another API process solve again.
+        # A joined run keeps the version name of the request that started it.
+        with self._lock:
+            if fingerprint:
+                for run in self._runs.values():
+                    if run.fingerprint == fingerprint and not run.finished:
+                        run.attached += 1
+                        return run, False
+            return self._create(version_name, fingerprint), True
+
+    def _create(self, version_name: str, fingerprint: Optional[str]) -> SolveRun:
+        run = SolveRun(next(self._ids), version_name, fingerprint)
+        self._runs[run.id] = run
+        finished = [r.id for r in self._runs.values() if r.finished]
+        for rid in finished[: max(0, len(self._runs) - self.keep)]:
+            del self._runs[rid]
+        return run
+
+    def get(self, run_id: int) -> Optional[SolveRun]:
+        return self._runs.get(run_id)
+
+    def list(self) -> List[SolveRun]:
+        return sorted(self._runs.values(), key=lambda r: r.id, reverse=True)
+
+
+progress_service = ProgressService()
@@ -0,0 +1,253 @@
+"""What-if scenarios: solve variants of the current data side by side without writing versions.
+
+A scenario is a list of overrides (close a room, block a day or window of a room or lecturer, change fields
+of an entity) applied to a copy of the cached reference data. Variants are solved concurrently in a process
+pool, with the pinned events of the base version kept, and compared on feasibility, stage objectives,
+seat-hour utilisation and how many events moved against the base version. Results stay in memory until one
+is promoted to a version.
+"""
+from typing import List, Dict, Any, Optional, Set
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+import copy
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .. import models, schemas
+from ..solver import VarKey, fixed_events, solution_events, solve_input, solver_parameters
+from ..solver_input import SolverInput, build_time_grid, _event_dict
+from ..utils import parse_time
+from .capacity import analyze_capacity
+from .decomposition import _split_workers
+from .metrics import seat_utilisation
+from .solver_worker import WarmState, on_reference_commit
+
+logger = logging.getLogger(__name__)
+
+_KINDS = ("rooms", "groups", "lecturers", "courses")
+
+
+def _blocked(avail: Optional[Dict[str, List[List[str]]]], days: List[str], day: str,
+             start: Optional[str], end: Optional[str]) -> Dict[str, List[List[str]]]:
+    # Availability windows with [start, end) of one day (the whole day without start/end) taken out.
+    # No availability means always available, so it is spelled out per day first.
+    out = {d: [list(w) for w in ws] for d, ws in (avail or {d: [["00:00", "23:59"]] for d in days}).items()}
+    if start is None and end is None:
+        out[day] = []
+        return out
+    lo, hi = parse_time(start or "00:00"), parse_time(end or "23:59")
+    kept = []
+    for s, e in out.get(day) or []:
+        if parse_time(s) < lo:
+            kept.append([s, min(e, start, key=parse_time)])
+        if parse_time(e) > hi:
+            kept.append([max(s, end, key=parse_time), e])
+    out[day] = kept
+    return out
+
+
+def apply_overrides(dataset: Dict[str, Any], overrides: List[schemas.ScenarioOverride],
+                    days: List[str]) -> Dict[str, Any]:
+    """A copy of the dataset with the overrides applied; raises ValueError for an unknown kind, op or id."""
+    out = copy.deepcopy(dataset)
+    for o in overrides:
+        if o.kind not in _KINDS:
+            raise ValueError(f"Unknown entity kind {o.kind!r}; expected one of {', '.join(_KINDS)}")
+        item = next((x for x in out[o.kind] if x["id"] == o.id), None)
+        if item is None:
+            raise ValueError(f"No {o.kind[:-1]} with id {o.id}")
+        if o.op == "close":
+            if o.kind != "rooms":
+                raise ValueError("Only rooms can be closed; block a lecturer's days instead")
+            out["rooms"].remove(item)
+            # Pinned events in the closed room lose their placement and are solved again
+            out["fixed"] = [e for e in out["fixed"] if e["room_id"] != o.id]
+        elif o.op == "unavailable":
+            if o.kind not in ("rooms", "lecturers"):
+                raise ValueError("Only rooms and lecturers have availability")
+            if o.day not in days:
+                raise ValueError(f"Unknown day {o.day!r}")
+            item["availability"] = _blocked(item.get("availability"), days, o.day, o.start, o.end)
+        elif o.op == "update":
+            unknown = set(o.fields) - (set(item) - {"id"})
+            if unknown:
+                raise ValueError(f"Unknown {o.kind[:-1]} fields: {', '.join(sorted(unknown))}")
+            item.update(o.fields)
+        else:
+            raise ValueError(f"Unknown override op {o.op!r}; expected close, unavailable or update")
+    return out
+
+
+def moved_events(base: List[Dict[str, Any]], events: List[Dict[str, Any]]) -> int:
+    # Events whose (course, group, lecturer) has no event at the same day, start and room in the base version
+    def placements(evs):
+        return Counter((e["course_id"], e["group_id"], e["lecturer_id"], e["day"], e["start"], e["room_id"])
+                       for e in evs)
+    return sum((placements(events) - placements(base)).values())
+
+
+def base_hint(inp: SolverInput, base: List[Dict[str, Any]]) -> Set[VarKey]:
+    # Candidate placements that repeat an event of the base version, at most one per base event. Candidates
+    # are tried in start order so repeated sessions take their placements in week order, as the weekly
+    # pattern constraints expect.
+    left = Counter((e["course_id"], e["group_id"], e["lecturer_id"], e["day"], e["start"], e["room_id"])
+                   for e in base)
+    hint: Set[VarKey] = set()
+    for si, s in enumerate(inp.sessions):
+        cands = inp.candidates[si]
+        for ri, ti in cands[np.lexsort((cands[:, 0], cands[:, 1]))] if len(cands) else cands:
+            d, st, _ = inp.grid.slots[ti]
+            key = (s.course_id, s.group_id, s.lecturer_id, d, st.strftime("%H:%M"), inp.rooms[ri]["id"])
+            if left[key] > 0:
+                left[key] -= 1
+                hint.add((si, int(ri), int(ti)))
+                break
+    return hint
+
+
+def evaluate_variant(dataset: Dict[str, Any], params: Dict[str, Any],
+                     base: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Solve one variant (runs in a pool process), starting from the base version's placements where they
+    are still possible; events come back with HH:MM times."""
+    t0 = time.perf_counter()
+    inp = SolverInput(dataset, build_time_grid())
+    out: Dict[str, Any] = {"sessions": len(inp.sessions), "feasible": False, "findings": [], "objectives": {},
+                           "stages": [], "metrics": None, "events": []}
+    findings = analyze_capacity(inp)
+    if findings:
+        out.update(status="infeasible", findings=findings, wall_time=round(time.perf_counter() - t0, 3))
+        return out
+    solution, stats = solve_input(inp, params, hint=base_hint(inp, base) if base else None)
+    out.update(stages=stats, objectives={st["stage"]: st["objective"] for st in stats})
+    if solution is None:
+        out.update(status="no_solution", wall_time=round(time.perf_counter() - t0, 3))
+        return out
+    events = [dict({k: v for k, v in e.items() if k != "id"}, start=parse_time(e["start"]), end=parse_time(e["end"]),
+                   pinned=bool(e.get("pinned"))) for e in inp.fixed]
+    events += solution_events(inp, solution)
+    out.update(
+        status="solved",
+        feasible=True,
+        metrics=seat_utilisation(inp, [models.TimetableEvent(**e) for e in events]),
+        events=[dict(e, start=e["start"].strftime("%H:%M"), end=e["end"].strftime("%H:%M")) for e in events],
+        wall_time=round(time.perf_counter() - t0, 3),
+    )
+    return out
+
+
+class ScenarioService:
+    # Cached reference data, the solver process pool and the evaluated scenarios (newest `keep` are kept)
+    def __init__(self, keep: int = 50) -> None:
+        self.keep = keep
+        self.state: Optional[WarmState] = None
+        self._stale: Set[str] = set()
+        self._results: Dict[int, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def workers(self) -> int:
+        return settings.scenario_workers or os.cpu_count() or 1
+
+    def _reference(self, db: Session) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            if self.state is None:
+                self.state = WarmState()
+                on_reference_commit(self._invalidate)
+                self.state.refresh(db)
+            elif self._stale:
+                self.state.refresh(db, sorted(self._stale))
+                self._stale.clear()
+            return self.state.reference
+
+    def _invalidate(self, kinds: List[str]) -> None:
+        with self._lock:
+            self._stale.update(kinds)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned, not forked: pool processes import the solver themselves and stay up between requests
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def evaluate(self, db: Session, req: schemas.ScenarioRequest) -> Dict[str, Any]:
+        if req.base_version_id is not None:
+            base = db.query(models.Version).filter(models.Version.id == req.base_version_id).first()
+            if base is None:
+                raise ValueError(f"Version {req.base_version_id} not found")
+        else:
+            base = (db.query(models.Version).filter(models.Version.events.any())
+                    .order_by(models.Version.id.desc()).first())
+        kept = fixed_events(db, None, base.id) if base is not None else []
+        base_events = [_event_dict(e) for e in base.events] if base is not None else []
+        dataset = dict(self._reference(db), fixed=[_event_dict(e) for e in kept], scope=None)
+        days = settings.week_days
+        variants = [apply_overrides(dataset, sc.overrides, days) for sc in req.scenarios]
+
+        overrides = {"max_time_in_seconds": req.time_limit} if req.time_limit else None
+        params = _split_workers(solver_parameters(overrides), max(1, min(len(variants), self.workers)))
+        pool = self._executor()
+        futures = [pool.submit(evaluate_variant, v, params, base_events) for v in variants]
+        results = []
+        for sc, fut in zip(req.scenarios, futures):
+            out = fut.result()
+            events = out.pop("events")
+            result = dict(out, name=sc.name, overrides=[o.dict() for o in sc.overrides],
+                          base_version_id=base.id if base is not None else None,
+                          moved_events=moved_events(base_events, events) if base is not None and events else None)
+            with self._lock:
+                result["scenario_id"] = next(self._ids)
+                self._results[result["scenario_id"]] = dict(result, events=events)
+                for sid in sorted(self._results)[: max(0, len(self._results) - self.keep)]:
+                    del self._results[sid]
+            results.append(result)
+        base_summary = None
+        if base is not None:
+            stages = (base.metrics or {}).get("stages") or []
+            base_summary = {"version_id": base.id, "name": base.name, "events": len(base_events),
+                            "objectives": {st["stage"]: st.get("objective") for st in stages},
+                            "metrics": {k: v for k, v in (base.metrics or {}).items() if k != "stages"}}
+        return {"base": base_summary, "scenarios": results}
+
+    def get(self, scenario_id: int) -> Optional[Dict[str, Any]]:
+        return self._results.get(scenario_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [{k: v for k, v in r.items() if k != "events"}
+                for r in sorted(self._results.values(), key=lambda r: r["scenario_id"], reverse=True)]
+
+    def promote(self, db: Session, scenario_id: int, version_name: str) -> models.Version:
+        """Write a solved scenario's timetable as a new version (one transaction); the overrides themselves
+        are not applied to the data."""
+        result = self._results[scenario_id]
+        if not result["feasible"]:
+            raise ValueError(f"Scenario {scenario_id} has no timetable to promote ({result['status']})")
+        version = models.Version(name=version_name, metrics=dict(
+            result["metrics"] or {}, sessions=result["sessions"], stages=result["stages"],
+            scenario={"name": result["name"], "overrides": result["overrides"]}))
+        db.add(version)
+        db.flush()
+        db.add_all([models.TimetableEvent(**dict(e, start=parse_time(e["start"]), end=parse_time(e["end"])),
+                                          version_id=version.id) for e in result["events"]])
+        db.commit()
+        db.refresh(version)
+        return version
+
+
+scenario_service = ScenarioService()
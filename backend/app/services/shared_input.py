@@ -0,0 +1,107 @@
+"""SolverInput arrays in a memory-mapped file, for solver processes working on the same input.
+
+share_input() writes every numpy array of an input (availability masks, room and start tables, ...), the
+candidate tables and the conflict cliques into one file, in /dev/shm when available so it never leaves
+RAM. The remaining attributes (entity dicts, sessions, grid) go into the same file as a single pickle.
+attach_input() in another process maps the file read-only and rebuilds the SolverInput around views of
+it: the page cache holds one copy however many workers attach, and a task only pickles the small handle.
+"""
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+import os
+import pickle
+import tempfile
+import numpy as np
+
+from ..solver_input import SolverInput
+
+logger = logging.getLogger(__name__)
+
+_ALIGN = 64
+# List attributes stored as one flat array plus offsets: candidates (per-session [n, 2] arrays), cliques
+_RAGGED = ("candidates", "cliques")
+# The most recently attached input of this process: workers of one solve attach once and reuse it
+_attached: Optional[Tuple[str, SolverInput]] = None
+
+
+def _flatten(parts: List[Any], width: int) -> Tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(p) for p in parts])
+    shape = (int(offsets[-1]), width) if width else (int(offsets[-1]),)
+    values = np.concatenate([np.asarray(p, dtype=np.int32).reshape((-1, width) if width else (-1,))
+                             for p in parts]) if parts else np.zeros(shape, dtype=np.int32)
+    return values.astype(np.int32, copy=False), offsets
+
+
+class SharedInput:
+    """Owner of a shared input file; the handle is what worker processes receive. Remove it with close()."""
+
+    def __init__(self, inp: SolverInput, directory: Optional[str] = None) -> None:
+        arrays: Dict[str, np.ndarray] = {}
+        objects: Dict[str, Any] = {}
+        for name, value in vars(inp).items():
+            if isinstance(value, np.ndarray):
+                arrays[name] = value
+            elif name not in _RAGGED:
+                objects[name] = value
+        arrays["candidates"], arrays["candidates_offsets"] = _flatten(inp.candidates, 2)
+        arrays["cliques"], arrays["cliques_offsets"] = _flatten(inp.cliques, 0)
+        blob = pickle.dumps(objects, protocol=pickle.HIGHEST_PROTOCOL)
+
+        layout: Dict[str, Tuple[int, str, Tuple[int, ...]]] = {}
+        size = 0
+        for name, arr in arrays.items():
+            layout[name] = (size, arr.dtype.str, arr.shape)
+            size += -(-arr.nbytes // _ALIGN) * _ALIGN
+        objects_at = size
+        size += len(blob)
+
+        if directory is None and os.path.isdir("/dev/shm"):
+            directory = "/dev/shm"
+        fd, self.path = tempfile.mkstemp(prefix="solver-input-", suffix=".bin", dir=directory)
+        os.close(fd)
+        mm = np.memmap(self.path, dtype=np.uint8, mode="w+", shape=(max(size, 1),))
+        for name, arr in arrays.items():
+            offset, dtype, shape = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=mm, offset=offset)[...] = arr
+        mm[objects_at:objects_at + len(blob)] = np.frombuffer(blob, dtype=np.uint8)
+        mm.flush()
+        del mm
+        self.size = size
+        self.handle = {"path": self.path, "arrays": layout, "objects": (objects_at, len(blob))}
+
+    def close(self) -> None:
+        # Processes that still map the file keep their pages until they drop the input
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self) -> "SharedInput":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def share_input(inp: SolverInput, directory: Optional[str] = None) -> SharedInput:
+    shared = SharedInput(inp, directory)
+    logger.debug("Shared solver input in %s (%.1f MB)", shared.path, shared.size / 1e6)
+    return shared
+
+
+def attach_input(handle: Dict[str, Any]) -> SolverInput:
+    """The shared input as a SolverInput whose arrays are read-only views of the mapped file."""
+    global _attached
+    if _attached is not None and _attached[0] == handle["path"]:
+        return _attached[1]
+    mm = np.memmap(handle["path"], dtype=np.uint8, mode="r")
+    arrays = {name: np.ndarray(shape, dtype=dtype, buffer=mm, offset=offset)
+              for name, (offset, dtype, shape) in handle["arrays"].items()}
+    at, length = handle["objects"]
+    inp = SolverInput.__new__(SolverInput)
+    inp.__dict__.update(pickle.loads(mm[at:at + length].tobytes()))
+    for name in _RAGGED:
+        values, offsets = arrays.pop(name), arrays.pop(f"{name}_offsets")
+        setattr(inp, name, [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)])
+    inp.__dict__.update(arrays)
+    _attached = (handle["path"], inp)
+    return inp
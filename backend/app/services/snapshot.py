@@ -0,0 +1,129 @@
+"""Dataset snapshots for solving away from the database.
+
+A snapshot holds everything a generation reads: the reference lists (with course-group and course-lecturer
+links), the events kept from the base version, the grid and solver settings and the CP-SAT parameters.
+It is solved headless (`python -m app.cli.snapshot solve`) into an events file, which is imported back as a
+version in one transaction. Files are gzipped JSON (`.json.gz`) or, with the msgpack package installed,
+MessagePack (`.msgpack`, `.msgpack.gz`).
+"""
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+import gzip
+import json
+import logging
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .. import models
+from ..solver import _FINGERPRINT_SETTINGS, fixed_events, input_fingerprint, solver_parameters
+from ..solver_input import load_dataset
+from ..utils import parse_time
+from .scenarios import evaluate_variant
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the snapshot or events layout changes so older files are refused instead of misread
+SNAPSHOT_FORMAT = 1
+
+
+def write_file(path: str, payload: Dict[str, Any]) -> str:
+    raw_path = path[:-3] if path.endswith(".gz") else path
+    if raw_path.endswith(".msgpack"):
+        # Imported lazily: MessagePack is optional, gzipped JSON needs nothing beyond the standard library
+        import msgpack
+        data = msgpack.packb(payload, use_bin_type=True)
+    else:
+        data = json.dumps(payload).encode("utf-8")
+    if path.endswith(".gz"):
+        data = gzip.compress(data)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def read_file(path: str, kind: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".gz"):
+        data = gzip.decompress(data)
+        path = path[:-3]
+    if path.endswith(".msgpack"):
+        import msgpack
+        payload = msgpack.unpackb(data, raw=False)
+    else:
+        payload = json.loads(data)
+    if payload.get("format") != SNAPSHOT_FORMAT or payload.get("kind") != kind:
+        raise ValueError(f"{path} is not a {kind} file of format {SNAPSHOT_FORMAT}")
+    return payload
+
+
+def export_snapshot(db: Session, base_version_id: Optional[int] = None, pin_event_ids: Optional[List[int]] = None,
+                    department: Optional[str] = None, year: Optional[int] = None) -> Dict[str, Any]:
+    """The dataset a generation with these arguments would solve, plus the settings it would solve it with."""
+    scope = {"department": department, "year": year} if department or year else None
+    kept = fixed_events(db, None, base_version_id, pin_event_ids, scope)
+    request = {"base_version_id": base_version_id, "pin_event_ids": pin_event_ids or [], "department": department,
+               "year": year}
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "kind": "snapshot",
+        "created_at": datetime.utcnow().isoformat(),
+        "request": request,
+        "fingerprint": input_fingerprint(db, **request),
+        "settings": {name: getattr(settings, name) for name in _FINGERPRINT_SETTINGS},
+        "parameters": solver_parameters(),
+        "dataset": load_dataset(db, kept, scope),
+    }
+
+
+def apply_settings(values: Dict[str, Any]) -> None:
+    # Solve with the grid and solver settings of the exporting installation
+    for name, value in values.items():
+        if name in _FINGERPRINT_SETTINGS:
+            setattr(settings, name, [tuple(v) for v in value] if name == "periods" else value)
+
+
+def solve_snapshot(snapshot: Dict[str, Any], overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Solve a snapshot (no database needed) into an events payload; status is solved, infeasible or no_solution."""
+    apply_settings(snapshot["settings"])
+    params = dict(snapshot["parameters"], **(overrides or {}))
+    out = evaluate_variant(snapshot["dataset"], params)
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "kind": "events",
+        "created_at": datetime.utcnow().isoformat(),
+        "snapshot": {"created_at": snapshot["created_at"], "fingerprint": snapshot["fingerprint"],
+                     "request": snapshot["request"]},
+        "status": out["status"],
+        "findings": out["findings"],
+        "metrics": dict(out["metrics"] or {}, sessions=out["sessions"], fixed_events=len(snapshot["dataset"]["fixed"]),
+                        stages=out["stages"]),
+        "events": out["events"],
+    }
+
+
+def import_events(db: Session, payload: Dict[str, Any], version_name: str, force: bool = False) -> models.Version:
+    """Write a solved events file as a new version in one transaction.
+
+    The snapshot's fingerprint must still match the database (same data, kept events and settings); a
+    mismatch means the timetable was solved against stale data and is refused unless forced.
+    """
+    if payload["status"] != "solved":
+        raise ValueError(f"The events file holds no timetable ({payload['status']})")
+    if not force:
+        current = input_fingerprint(db, **payload["snapshot"]["request"])
+        if current != payload["snapshot"]["fingerprint"]:
+            raise ValueError("The data changed since the snapshot was exported; re-export or import with force")
+    version = models.Version(name=version_name, metrics=dict(payload["metrics"], snapshot=payload["snapshot"]))
+    db.add(version)
+    db.flush()
+    rows = [dict(e, start=parse_time(e["start"]), end=parse_time(e["end"]), version_id=version.id)
+            for e in payload["events"]]
+    if rows:
+        db.execute(insert(models.TimetableEvent), rows)
+    db.commit()
+    db.refresh(version)
+    logger.info("Imported %d events as version %s", len(rows), version.id)
+    return version
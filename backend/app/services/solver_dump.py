@@ -0,0 +1,112 @@
+from typing import Dict, List, Tuple, Any, Optional
+from datetime import datetime, time
+import base64
+import gzip
+import json
+import logging
+import os
+
+from ortools.sat.python import cp_model
+from ortools.sat import cp_model_pb2
+
+from ..config import settings
+from ..solver_input import SolverInput
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the dump layout changes so the replay tool can refuse files it cannot read
+DUMP_FORMAT = 1
+
+
+def _fmt(t: time) -> str:
+    return t.strftime("%H:%M")
+
+
+def write_dump(
+    model: cp_model.CpModel,
+    x: Dict[Tuple[int, int, int], cp_model.IntVar],
+    inp: SolverInput,
+    params: Dict[str, Any],
+    version_id: Optional[int] = None,
+    path: Optional[str] = None,
+) -> str:
+    """Write the built model, its session/variable mapping and the solver parameters to a gzipped JSON file."""
+    if path is None:
+        os.makedirs(settings.solver_dump_dir, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        path = os.path.join(settings.solver_dump_dir, f"solve-v{version_id or 0}-{stamp}.json.gz")
+
+    payload = {
+        "format": DUMP_FORMAT,
+        "created_at": datetime.utcnow().isoformat(),
+        "version_id": version_id,
+        "parameters": params,
+        "model": base64.b64encode(model.Proto().SerializeToString()).decode("ascii"),
+        "slots": [[d, _fmt(st), _fmt(en)] for (d, st, en) in inp.grid.slots],
+        "rooms": [{"id": r["id"], "name": r["name"], "capacity": r["capacity"]} for r in inp.rooms],
+        "sessions": [
+            {
+                "course_id": s.course_id,
+                "course_code": s.course_code,
+                "group_id": s.group_id,
+                "group_ids": s.group_ids,
+                "lecturer_id": s.lecturer_id,
+                "minutes": s.minutes,
+                "is_lab": s.is_lab,
+            }
+            for s in inp.sessions
+        ],
+        # [cp-sat variable index, session index, room index, start slot index]
+        "variables": [[var.Index(), si, ri, ti] for (si, ri, ti), var in x.items()],
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(payload, f)
+    logger.info("Wrote solver dump %s (%d sessions, %d variables)", path, len(inp.sessions), len(x))
+    return path
+
+
+def read_dump(path: str) -> Dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("format") != DUMP_FORMAT:
+        raise ValueError(f"Unsupported solver dump format {payload.get('format')!r} in {path}")
+    return payload
+
+
+def model_from_dump(payload: Dict[str, Any]) -> cp_model.CpModel:
+    proto = cp_model_pb2.CpModelProto()
+    proto.ParseFromString(base64.b64decode(payload["model"]))
+    model = cp_model.CpModel()
+    model.Proto().CopyFrom(proto)
+    return model
+
+
+class _Timeline(cp_model.CpSolverSolutionCallback):
+    # Records (wall time, objective) for every improving solution found during a replay
+    def __init__(self) -> None:
+        super().__init__()
+        self.points: List[Tuple[float, float]] = []
+
+    def on_solution_callback(self) -> None:
+        self.points.append((self.WallTime(), self.ObjectiveValue()))
+
+
+def replay(payload: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Solve a dumped model with the given parameters and report timing and objective figures."""
+    # Imported here so the dump module stays importable without the DB-bound solver module
+    from ..solver import apply_solver_parameters
+
+    model = model_from_dump(payload)
+    solver = cp_model.CpSolver()
+    apply_solver_parameters(solver, params)
+    timeline = _Timeline()
+    status = solver.Solve(model, timeline)
+    feasible = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return {
+        "status": solver.StatusName(status),
+        "wall_time": solver.WallTime(),
+        "first_solution_time": timeline.points[0][0] if timeline.points else None,
+        "objective": solver.ObjectiveValue() if feasible else None,
+        "bound": solver.BestObjectiveBound() if feasible else None,
+        "timeline": timeline.points,
+    }
@@ -0,0 +1,331 @@
+"""Long-lived solver worker and the API-side client that talks to it over a local queue.
+
+The worker process keeps the reference data (rooms, groups, lecturers, courses), the time grid and the
+SolverInput of an unpinned, unscoped generation warm between jobs. The API sends it jobs and entity-change
+refreshes on one queue (so a job always sees the changes committed before it was sent), stop requests on
+a second, and gets progress updates back on a queue of its own.
+"""
+from typing import List, Dict, Any, Optional, Callable, Set, Tuple
+from multiprocessing.managers import BaseManager
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .. import models, schemas, crud
+from ..solver import SolveCancelled, generate_timetable, prepare_input
+from ..solver_input import SolverInput, TimeGrid, build_time_grid, load_reference, _event_dict
+from .capacity import InfeasibleInstanceError
+from .progress import SolveRun, progress_service
+
+logger = logging.getLogger(__name__)
+
+# Entity classes whose changes invalidate the warm reference data; course dicts list group and lecturer
+# ids, so those kinds also reload courses
+_CHANGE_KINDS = {models.Room: "rooms", models.StudentGroup: "groups", models.Lecturer: "lecturers",
+                 models.Course: "courses"}
+_DEPENDENT = {"groups": "courses", "lecturers": "courses"}
+
+
+_listeners: List[Callable[[List[str]], None]] = []
+
+
+def on_reference_commit(callback: Callable[[List[str]], None]) -> None:
+    """Call callback(kinds) after every commit (any session of this process) that changed reference entities."""
+    if not _listeners:
+        @event.listens_for(Session, "after_flush")
+        def collect(session, flush_context):
+            for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+                kind = _CHANGE_KINDS.get(type(obj))
+                if kind:
+                    session.info.setdefault("solver_changes", set()).add(kind)
+
+        @event.listens_for(Session, "after_commit")
+        def notify(session):
+            kinds = session.info.pop("solver_changes", None)
+            if kinds:
+                for listener in list(_listeners):
+                    listener(sorted(kinds))
+
+        @event.listens_for(Session, "after_rollback")
+        def discard(session):
+            session.info.pop("solver_changes", None)
+    _listeners.append(callback)
+
+
+def run_generation(run, req: schemas.GenerateRequest, session_factory: Callable[[], Session],
+                   prepare: Callable[..., SolverInput] = prepare_input) -> None:
+    # One generation with its own DB session; the version only survives a successful (or accepted) run
+    db = session_factory()
+    version = None
+    try:
+        version = crud.create_version(db, name=req.version_name)
+        generate_timetable(db, version, dump=req.dump_model, base_version_id=req.base_version_id,
+                           pin_event_ids=req.pin_event_ids, department=req.department, year=req.year,
+                           progress=run, prepare=prepare)
+        run.finish("done", version_id=version.id)
+    except Exception as e:
+        db.rollback()
+        if version is not None:
+            db.delete(version)
+            db.commit()
+        if isinstance(e, SolveCancelled):
+            run.finish("cancelled")
+        elif isinstance(e, InfeasibleInstanceError):
+            run.finish("failed", error={"message": str(e), "findings": e.findings})
+        else:
+            logger.exception("Generation run %s failed", run.id)
+            run.finish("failed", error=str(e))
+    finally:
+        db.close()
+
+
+class WarmState:
+    """Reference data, grid and base SolverInput kept between jobs; refreshed per changed kind."""
+
+    def __init__(self) -> None:
+        self.grid: TimeGrid = build_time_grid()
+        self.reference: Dict[str, List[Dict[str, Any]]] = {}
+        self.base: Optional[SolverInput] = None
+        self.loads = 0
+
+    def refresh(self, db: Session, kinds: Optional[List[str]] = None) -> List[str]:
+        # Reloads the kinds' rows; the base input is only rebuilt when one of them actually changed.
+        # Returns the changed kinds.
+        wanted: Set[str] = set(kinds) if kinds else {"rooms", "groups", "lecturers", "courses"}
+        wanted |= {_DEPENDENT[k] for k in wanted if k in _DEPENDENT}
+        loaded = load_reference(db, sorted(wanted))
+        changed = sorted(k for k, rows in loaded.items() if self.reference.get(k) != rows)
+        if changed:
+            self.reference.update(loaded)
+            self.base = None
+            self.loads += 1
+        return changed
+
+    def prepare(self, db: Session, fixed: Optional[List[models.TimetableEvent]] = None,
+                scope: Optional[Dict[str, Any]] = None) -> SolverInput:
+        # Same contract as solver.prepare_input, served from memory
+        if not self.reference:
+            self.refresh(db)
+        if fixed or scope:
+            dataset = dict(self.reference, fixed=[_event_dict(e) for e in fixed or []], scope=scope)
+            return SolverInput(dataset, self.grid)
+        if self.base is None:
+            self.base = SolverInput(dict(self.reference, fixed=[], scope=None), self.grid)
+        return self.base
+
+
+class _QueueManager(BaseManager):
+    pass
+
+
+def _address() -> Tuple[str, int]:
+    host, _, port = settings.solver_worker_address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class _WorkerRun:
+    """Worker-side stand-in for a SolveRun: forwards updates to the API process that owns the run."""
+
+    def __init__(self, client: str, run_id: int, events: "queue.Queue") -> None:
+        self.id = run_id
+        self.client = client
+        self.events = events
+        self.stop_request: Optional[str] = None
+        self._solver = None
+        self._lock = threading.Lock()
+
+    def publish(self, update: Dict[str, Any]) -> None:
+        self.events.put({"run": self.id, "update": update})
+
+    def attach(self, solver) -> None:
+        with self._lock:
+            self._solver = solver
+            if self.stop_request and solver is not None:
+                solver.StopSearch()
+
+    def request_stop(self, mode: str) -> None:
+        with self._lock:
+            self.stop_request = mode
+            if self._solver is not None:
+                self._solver.StopSearch()
+
+    def finish(self, status: str, version_id: Optional[int] = None, error: Optional[Any] = None) -> None:
+        self.events.put({"run": self.id, "finish": {"status": status, "version_id": version_id, "error": error}})
+
+
+def serve(session_factory: Optional[Callable[[], Session]] = None) -> None:
+    """Worker main loop: serve the queues, warm up, then run jobs one at a time."""
+    if session_factory is None:
+        from ..database import SessionLocal
+        session_factory = SessionLocal
+    jobs: "queue.Queue" = queue.Queue()
+    controls: "queue.Queue" = queue.Queue()
+    outboxes: Dict[str, "queue.Queue"] = {}
+    outbox_lock = threading.Lock()
+
+    def outbox(client: str) -> "queue.Queue":
+        with outbox_lock:
+            return outboxes.setdefault(client, queue.Queue())
+
+    _QueueManager.register("jobs", callable=lambda: jobs)
+    _QueueManager.register("controls", callable=lambda: controls)
+    _QueueManager.register("events", callable=outbox)
+    manager = _QueueManager(address=_address(), authkey=settings.solver_worker_authkey.encode())
+    server = manager.get_server()
+    threading.Thread(target=server.serve_forever, name="solver-worker-queues", daemon=True).start()
+
+    state = WarmState()
+    db = session_factory()
+    try:
+        t0 = time.perf_counter()
+        state.prepare(db)
+        logger.info("Solver worker ready at %s (%d sessions warm in %.2fs)", settings.solver_worker_address,
+                    len(state.base.sessions), time.perf_counter() - t0)
+    finally:
+        db.close()
+
+    running: Dict[Tuple[str, int], _WorkerRun] = {}
+    # Stop requests for queued jobs, applied when the job starts
+    pending: Dict[Tuple[str, int], str] = {}
+    run_lock = threading.Lock()
+
+    def control_loop() -> None:
+        while True:
+            msg = controls.get()
+            key = (msg["client"], msg["run"])
+            with run_lock:
+                run = running.get(key)
+                if run is None:
+                    pending[key] = msg["stop"]
+            if run is not None:
+                run.request_stop(msg["stop"])
+
+    threading.Thread(target=control_loop, name="solver-worker-controls", daemon=True).start()
+
+    while True:
+        msg = jobs.get()
+        if msg["type"] == "refresh":
+            db = session_factory()
+            try:
+                state.refresh(db, msg.get("kinds"))
+            finally:
+                db.close()
+            logger.info("Refreshed %s", ", ".join(msg.get("kinds") or ["all reference data"]))
+        elif msg["type"] == "generate":
+            run = _WorkerRun(msg["client"], msg["run"], outbox(msg["client"]))
+            key = (run.client, run.id)
+            with run_lock:
+                running[key] = run
+                stop = pending.pop(key, None) or msg.get("stop")
+            if stop:
+                run.request_stop(stop)
+            try:
+                run_generation(run, schemas.GenerateRequest(**msg["request"]), session_factory, state.prepare)
+            finally:
+                with run_lock:
+                    running.pop(key, None)
+        elif msg["type"] == "shutdown":
+            return
+
+
+class _RemoteStop:
+    # Attached to a SolveRun in place of a CpSolver: a stop request is forwarded to the worker
+    def __init__(self, client: "SolverWorkerClient", run: SolveRun) -> None:
+        self.client = client
+        self.run = run
+
+    def StopSearch(self) -> None:
+        self.client.controls.put({"client": self.client.id, "run": self.run.id, "stop": self.run.stop_request})
+
+
+class SolverWorkerClient:
+    """API-side handle on the worker: submits runs, forwards entity changes, relays progress to SolveRuns."""
+
+    def __init__(self) -> None:
+        self.id = uuid.uuid4().hex
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.jobs = None
+        self.controls = None
+        self._events = None
+        self._tracking = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.jobs is not None
+
+    def start(self, mode: Optional[str] = None, timeout: float = 60.0) -> None:
+        mode = mode or settings.solver_worker
+        if mode == "off":
+            return
+        if mode == "app":
+            # Spawned, not forked: the worker sets up its own DB engine and imports
+            self.process = multiprocessing.get_context("spawn").Process(target=serve, name="solver-worker",
+                                                                        daemon=True)
+            self.process.start()
+        for name in ("jobs", "controls", "events"):
+            _QueueManager.register(name)
+        manager = _QueueManager(address=_address(), authkey=settings.solver_worker_authkey.encode())
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                manager.connect()
+                break
+            except (ConnectionError, OSError):
+                if time.monotonic() > deadline or (self.process is not None and not self.process.is_alive()):
+                    raise RuntimeError(f"Solver worker at {settings.solver_worker_address} is not reachable")
+                time.sleep(0.2)
+        self.jobs = manager.jobs()
+        self.controls = manager.controls()
+        self._events = manager.events(self.id)
+        threading.Thread(target=self._relay, name="solver-worker-events", daemon=True).start()
+        self._track_changes()
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+        self.process = None
+        self.jobs = None
+
+    def submit(self, run: SolveRun, req: schemas.GenerateRequest) -> None:
+        self.jobs.put({"type": "generate", "client": self.id, "run": run.id, "request": req.dict(),
+                       "stop": run.stop_request})
+        run.attach(_RemoteStop(self, run))
+
+    def refresh(self, kinds: Optional[List[str]] = None) -> None:
+        if self.enabled:
+            self.jobs.put({"type": "refresh", "kinds": sorted(kinds) if kinds else None})
+
+    def _relay(self) -> None:
+        while self.enabled:
+            try:
+                msg = self._events.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                if self.enabled:
+                    logger.error("Lost the connection to the solver worker")
+                return
+            run = progress_service.get(msg["run"])
+            if run is None:
+                continue
+            if "update" in msg:
+                run.publish(msg["update"])
+            else:
+                run.finish(**msg["finish"])
+
+    def _track_changes(self) -> None:
+        # Committed changes to reference entities (any session of this process) become refresh messages
+        if self._tracking:
+            return
+        self._tracking = True
+        on_reference_commit(self.refresh)
+
+
+solver_worker = SolverWorkerClient()
@@ -1,316 +1,635 @@
-from typing import List, Dict, Tuple
-from datetime import datetime, time, timedelta
+from typing import List, Dict, Tuple, Any, Optional, Callable, Set
+import hashlib
+import json
+import logging
+import os
+import numpy as np
 from sqlalchemy.orm import Session
 from ortools.sat.python import cp_model
 from .config import settings
 from . import models
-from .utils import course_year_from_code
-
-Day = str  # e.g., "Mon"
-
-
-def build_timeslots() -> List[Tuple[Day, time, time]]:
-    # Build base day/slot grid from env
-    days = settings.week_days
-    st_h, st_m = map(int, settings.day_start.split(":"))
-    en_h, en_m = map(int, settings.day_end.split(":"))
-    slot = settings.slot_minutes
-    slots: List[Tuple[Day, time, time]] = []
-    for d in days:
-        cur = datetime(2000, 1, 1, st_h, st_m)
-        end = datetime(2000, 1, 1, en_h, en_m)
-        while cur + timedelta(minutes=slot) <= end:
-            slots.append((d, (cur.time()), (cur + timedelta(minutes=slot)).time()))
-            cur += timedelta(minutes=slot)
-    return slots
-
-
-def generate_timetable(db: Session, version: models.Version) -> List[models.TimetableEvent]:
-    # Prepare data
-    rooms: List[models.Room] = db.query(models.Room).all()
-    courses: List[models.Course] = db.query(models.Course).all()
-    groups: List[models.StudentGroup] = db.query(models.StudentGroup).all()
-    lecturers: List[models.Lecturer] = db.query(models.Lecturer).all()
-
-    # Build sessions: for each Course-Group pair with a Lecturer
-    # session tuple: (course, group, lecturer, minutes, requirements)
-    sessions: List[Tuple[models.Course, models.StudentGroup, models.Lecturer, int, Dict]] = []
-    for c in courses:
-        # Skip project courses (handled separately) -- they should not be scheduled into venues
-        if getattr(c, 'is_project', False):
-            continue
-        if not c.groups or not c.lecturers:
+from .services.capacity import check_capacity
+from .services.metrics import seat_utilisation
+from .solver_input import (  # noqa: F401
+    SolverInput, build_sessions, build_time_grid, build_timeslots, in_scope, load_dataset,
+)
+
+logger = logging.getLogger(__name__)
+
+# (session_index, room_index, start_slot_index)
+VarKey = Tuple[int, int, int]
+
+
+def load_solver_preset(path: Optional[str] = None) -> Dict[str, Any]:
+    # Tuned parameters written by app.cli.tune; a missing or unreadable preset simply means CP-SAT defaults
+    path = path or settings.solver_preset_path
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return dict(json.load(f).get("parameters") or {})
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring solver preset %s: %s", path, e)
+        return {}
+
+
+def solver_parameters(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # CP-SAT parameters used for a generation: tuned preset, then env settings, then per-call overrides
+    params: Dict[str, Any] = load_solver_preset()
+    # The budget of a single solve, i.e. the feasibility stage of a staged solve
+    params["max_time_in_seconds"] = settings.solver_feasibility_time_limit
+    if settings.solver_workers:
+        params["num_search_workers"] = settings.solver_workers
+    params.update(overrides or {})
+    return params
+
+
+def apply_solver_parameters(solver: cp_model.CpSolver, params: Dict[str, Any]) -> None:
+    # Set SatParameters fields by name; enum fields accept their symbolic name (e.g. "FIXED_SEARCH")
+    fields = solver.parameters.DESCRIPTOR.fields_by_name
+    for name, value in params.items():
+        field = fields.get(name)
+        if field is None:
+            raise ValueError(f"Unknown CP-SAT parameter: {name}")
+        if field.enum_type is not None and isinstance(value, str):
+            value = field.enum_type.values_by_name[value.upper()].number
+        setattr(solver.parameters, name, value)
+
+
+def prepare_input(
+    db: Session,
+    fixed: Optional[List[models.TimetableEvent]] = None,
+    scope: Optional[Dict[str, Any]] = None,
+) -> SolverInput:
+    return SolverInput(load_dataset(db, fixed, scope), build_time_grid())
+
+
+def fixed_events(
+    db: Session,
+    version: Optional[models.Version],
+    base_version_id: Optional[int] = None,
+    pin_event_ids: Optional[List[int]] = None,
+    scope: Optional[Dict[str, Any]] = None,
+) -> List[models.TimetableEvent]:
+    # Events of the base version (default: latest version with events, so neither the one being generated
+    # nor one another run is still generating) that keep their placement: pinned ones, ones pinned for
+    # this run and, for a scoped run, everything outside the scope
+    if base_version_id is None:
+        q = db.query(models.Version).filter(models.Version.events.any())
+        if version is not None:
+            q = q.filter(models.Version.id != version.id)
+        base = q.order_by(models.Version.id.desc()).first()
+        if base is None:
+            if pin_event_ids or scope:
+                raise ValueError("There is no base version to keep events from")
+            return []
+        base_version_id = base.id
+    events = (db.query(models.TimetableEvent)
+              .filter(models.TimetableEvent.version_id == base_version_id)
+              .order_by(models.TimetableEvent.id).all())
+    wanted = set(pin_event_ids or [])
+    missing = wanted - {e.id for e in events}
+    if missing:
+        raise ValueError(f"Events {sorted(missing)} are not part of version {base_version_id}")
+    kept = []
+    for e in events:
+        background = scope and not in_scope(scope, {"department": e.course.department}, {"year": e.group.year})
+        if e.pinned or e.id in wanted or background:
+            kept.append(e)
+    return kept
+
+
+# Settings that change what a generation produces for the same data
+_FINGERPRINT_SETTINGS = (
+    "week_days", "day_start", "day_end", "slot_minutes", "periods", "period_break_minutes", "lunch_start",
+    "lunch_end", "solver_stage_time_limit", "solver_stages", "solver_lecturer_load", "solver_engine",
+    "solver_day_workers", "solver_redundant_cuts", "solver_weekly_patterns",
+)
+
+
+def input_fingerprint(
+    db: Session,
+    base_version_id: Optional[int] = None,
+    pin_event_ids: Optional[List[int]] = None,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+) -> str:
+    # Hash of everything a generation with these arguments reads: the dataset with its kept events, the
+    # grid and solver settings and the CP-SAT parameters. Equal fingerprints mean interchangeable results.
+    scope = {"department": department, "year": year} if department or year else None
+    kept = fixed_events(db, None, base_version_id, pin_event_ids, scope)
+    payload = {
+        "dataset": load_dataset(db, kept, scope),
+        "settings": {name: getattr(settings, name) for name in _FINGERPRINT_SETTINGS},
+        "params": solver_parameters(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _log_tight_domains(inp: SolverInput, top: int = 5) -> None:
+    sizes = sorted((len(c), si) for si, c in enumerate(inp.candidates))
+    tight = ", ".join(f"{inp.sessions[si].course_code}/{inp.groups[inp.session_group[si]]['name']}={n}"
+                      for n, si in sizes[:top])
+    logger.info("Solving %d sessions with %d candidate placements; tightest: %s",
+                len(inp.sessions), sum(n for n, _ in sizes), tight)
+
+
+class BuiltModel:
+    """CP-SAT model, its placement variables and the named objective expressions staged solving optimises.
+
+    Objectives whose auxiliary variables would only slow down the feasibility stage are registered in
+    `deferred` and added to the model the first time `objective(name)` asks for them. Auxiliary
+    variables in `carry` (weekly pattern choices) are hinted between stages along with x.
+    """
+
+    def __init__(self, model: cp_model.CpModel, x: Dict[VarKey, cp_model.IntVar]) -> None:
+        self.model = model
+        self.x = x
+        self.objectives: Dict[str, Any] = {}
+        self.deferred: Dict[str, Callable[[], Any]] = {}
+        self.carry: List[cp_model.IntVar] = []
+
+    def objective(self, name: str) -> Optional[Any]:
+        if name not in self.objectives and name in self.deferred:
+            expr = self.deferred.pop(name)()
+            if expr is not None:
+                self.objectives[name] = expr
+        return self.objectives.get(name)
+
+
+def _add_redundant_cuts(model: cp_model.CpModel, inp: SolverInput, x: Dict[VarKey, cp_model.IntVar],
+                        session_slot: Dict[Tuple[int, int], List[cp_model.IntVar]]) -> int:
+    # Implied constraints that let CP-SAT prune tightly packed weeks early; returns how many were posted
+    grid = inp.grid
+    posted = 0
+
+    # Per room class and base slot: sessions that can only use rooms of that class cannot outnumber
+    # the class's rooms available in that slot
+    for members in np.unique(inp.room_ok, axis=0) if len(inp.sessions) else []:
+        if not members.any():
             continue
-        # Enforce year-course pairing via code convention if group.year is set
-        c_year_hint = course_year_from_code(c.code)
-        lec = c.lecturers[0]
-        # Lecture sessions according to weekly_hours and session_minutes
-        if c.weekly_hours and c.session_minutes:
-            minutes_needed = c.weekly_hours * 60
-            per_session = c.session_minutes or settings.slot_minutes
-            num_sessions = max(1, (minutes_needed + per_session - 1) // per_session)
-            for g in c.groups:
-                if g.year and c_year_hint and g.year != c_year_hint:
-                    continue
-                req = dict(c.requirements or {})
-                req["_is_lab"] = False
-                for _ in range(num_sessions):
-                    sessions.append((c, g, lec, per_session, req))
-        # Lab sessions if configured
-        if getattr(c, "has_lab", False) and getattr(c, "lab_weekly_sessions", 0) > 0:
-            lab_per_session = c.lab_session_minutes or (3 * settings.slot_minutes)
-            for g in c.groups:
-                if g.year and c_year_hint and g.year != c_year_hint:
-                    continue
-                req = dict(c.lab_requirements or {})
-                req["_is_lab"] = True
-                for _ in range(c.lab_weekly_sessions):
-                    sessions.append((c, g, lec, lab_per_session, req))
-
-    slots = build_timeslots()
-    base_slot_minutes = settings.slot_minutes
-
-
-
-    # Precompute allowed rooms per group:
-    # - If group fits in any room, allow all rooms (even if group is smaller than capacity)
-    # - If group is too big for all rooms, allow only the largest room(s)
-    room_caps = [r.capacity or 0 for r in rooms]
-    max_cap = max(room_caps) if room_caps else 0
-    group_allowed_rooms: Dict[int, List[int]] = {}
-    for g in groups:
-        size = g.size or 0
-        fits_somewhere = any((r.capacity or 0) >= size for r in rooms)
-        if fits_somewhere:
-            acceptable = [i for i, r in enumerate(rooms)]  # allow all rooms
-        else:
-            # group too big for all rooms; allow only the largest room(s)
-            acceptable = [i for i, r in enumerate(rooms) if (r.capacity or 0) == max_cap]
-        group_allowed_rooms[g.id] = acceptable
-
-    # Create virtual lab rooms per group so labs don't use listed lecture venues
-    lab_group_ids = set()
-    for (_c, g, _l, _m, req) in sessions:
-        if req.get("_is_lab"):
-            lab_group_ids.add(g.id)
-    if lab_group_ids:
-        id_to_group = {g.id: g for g in groups}
-        for gid in lab_group_ids:
-            vname = f"LAB-G{gid}"
-            exists = any((r.name or "").upper() == vname.upper() for r in rooms)
-            if not exists:
-                g = id_to_group.get(gid)
-                cap = (g.size if g and g.size else 1000)
-                vr = models.Room(name=vname, capacity=cap, furniture_type="LAB", equipment=[], availability=None)
-                db.add(vr)
-        db.commit()
-        rooms = db.query(models.Room).all()
+        confined = np.flatnonzero(~(inp.room_ok & ~members).any(axis=1) & inp.room_ok.any(axis=1))
+        free = inp.room_capacity[members].sum(axis=0)
+        for b in range(len(grid)):
+            vars_b = [v for si in confined for v in session_slot.get((int(si), b), ())]
+            if len(vars_b) > max(1, int(free[b])):
+                model.Add(sum(vars_b) <= int(free[b]))
+                posted += 1
 
-    model = cp_model.CpModel()
+    # Per atomic student set and day: scheduled minutes cannot exceed the minutes its groups can use that day
+    for members in inp.atom_members():
+        usable_slots = inp.group_avail[inp.session_group_mask[members].any(axis=0)].any(axis=0)
+        for di in range(len(grid.days)):
+            day_slots = np.flatnonzero(grid.day_index == di)
+            usable = int(grid.minutes[day_slots][usable_slots[day_slots]].sum())
+            terms = [(int(inp.session_minutes[si]), x[(int(si), ri, ti)])
+                     for si in members for ri, ti in inp.candidates[si].tolist()
+                     if grid.day_index[ti] == di]
+            if sum(m for m, _ in terms) > usable:
+                model.Add(sum(m * v for m, v in terms) <= usable)
+                posted += 1
+    return posted
 
-    # Variables: x[(session_index, room_index, start_slot_index)] in {0,1}
-    x: Dict[Tuple[int, int, int], cp_model.IntVar] = {}
-
-    # Helper: room requirements
-    def ok_room_session(req: Dict, g: models.StudentGroup, r: models.Room) -> bool:
-        is_lab = bool(req.get("_is_lab"))
-        rname = (r.name or "")
-        is_virtual_lab = rname.startswith("LAB-")
-        if is_lab:
-            # Labs must use virtual lab rooms only
-            return is_virtual_lab
-        # Lectures must not use virtual lab rooms
-        if is_virtual_lab:
-            return False
-    # No hard capacity check: any group can use any room; fallback handled above
-        # Case-insensitive match for lecture requirements
-        req_ft = (req.get("furniture_type") or "").upper()
-        room_ft = (r.furniture_type or "").upper()
-        if req_ft and room_ft != req_ft:
-            return False
-        needed = set([str(x).upper() for x in (req.get("equipment", []) or [])])
-        have = set([str(x).upper() for x in (r.equipment or [])])
-        if not needed.issubset(have):
-            return False
-        return True
 
-    # Helper: availability over an interval
-    def within_availability(avail, day: str, start: time, end: time) -> bool:
-        if not avail:
-            return True
-        windows = avail.get(day) or []
-        for s, e in windows:
-            sh, sm = map(int, s.split(":"))
-            eh, em = map(int, e.split(":"))
-            if time(sh, sm) <= start and end <= time(eh, em):
-                return True
-        return False
-
-    lec_avail = {l.id: l.availability for l in lecturers}
-    room_avail = {r.id: r.availability for r in rooms}
-
-    # Precompute coverage (set of base slot indices covered) for candidate assignments
-    coverage: Dict[Tuple[int, int, int], List[int]] = {}
-
-    # Create variables only for feasible (session, room, start_slot)
-    for si, (c, g, l, minutes, req) in enumerate(sessions):
-        if minutes % base_slot_minutes != 0:
-            # For MVP, enforce durations are multiples of base slot size
-            model.AddBoolOr([])
+def _add_compactness(model: cp_model.CpModel, inp: SolverInput,
+                     session_slot: Dict[Tuple[int, int], List[cp_model.IntVar]]) -> List[cp_model.IntVar]:
+    """Idle base slots between the first and last busy slot of each (resource, day).
+
+    Resources are atomic student sets and lecturers (lectures only). Per resource and slot one occupancy
+    literal equals the sum of the placement variables covering it; per day, first/last position variables
+    are bounded by the occupied positions and idle >= last - first + 1 - busy. Lunch slots are not
+    positions, so a lunch break is not a gap. Fixed events count as constant occupancy.
+    """
+    grid = inp.grid
+    resources: List[Tuple[np.ndarray, np.ndarray, str]] = []
+    for ai, col in enumerate(inp.session_atoms.T):
+        members = np.flatnonzero(col)
+        if len(members) or inp.atom_fixed_busy[ai].any():
+            resources.append((members, inp.atom_fixed_busy[ai], f"a{ai}"))
+    lectures = ~inp.session_is_lab
+    for li in range(len(inp.lecturers)):
+        members = np.flatnonzero(lectures & (inp.session_lecturer == li))
+        if len(members) or inp.lecturer_fixed_busy[li].any():
+            resources.append((members, inp.lecturer_fixed_busy[li], f"l{li}"))
+
+    idle_vars = []
+    for di, day in enumerate(grid.days):
+        positions = [t for t in np.flatnonzero(grid.day_index == di) if grid.start_ok[t]]
+        n = len(positions)
+        if n < 3:
             continue
-        span = minutes // base_slot_minutes  # number of base slots to cover
-        for ri, r in enumerate(rooms):
-            # restrict rooms to those allowed for this group (prefer fitting rooms; else largest rooms)
-            allowed = group_allowed_rooms.get(g.id, [])
-            if ri not in allowed:
-                continue
-            if not ok_room_session(req, g, r):
-                continue
-            for ti, (d, st, en) in enumerate(slots):
-                # Skip lunch window slots
-                try:
-                    ls_h, ls_m = map(int, settings.lunch_start.split(':'))
-                    le_h, le_m = map(int, settings.lunch_end.split(':'))
-                    lunch_start_time = time(ls_h, ls_m)
-                    lunch_end_time = time(le_h, le_m)
-                except Exception:
-                    lunch_start_time = None
-                    lunch_end_time = None
-                if lunch_start_time and lunch_end_time and lunch_start_time <= st < lunch_end_time:
-                    continue
-                # For 5th year groups, Friday is reserved for project work: skip any candidate slot on 'Fri'
-                if getattr(g, 'year', None) == 5 and d == 'Fri':
+        for members, fixed_busy, name in resources:
+            occupancy = []  # per position: literal, True (fixed) or None (never busy)
+            placeable = 0
+            for t in positions:
+                if fixed_busy[t]:
+                    occupancy.append(True)
+                    placeable += 1
                     continue
-                # Enforce lab/lecture room separation
-                is_lab = bool(req.get("_is_lab"))
-                rname = (r.name or "")
-                if is_lab and not rname.startswith("LAB-"):
+                covering = [v for si in members for v in session_slot.get((int(si), int(t)), ())]
+                if not covering:
+                    occupancy.append(None)
                     continue
-                if not is_lab and rname.startswith("LAB-"):
-                    continue
-                # Check that span contiguous slots exist within the same day and align contiguously
-                ok = True
-                last_end = en
-                covered = [ti]
-                cur_end = en
-                for off in range(1, span):
-                    idx2 = ti + off
-                    if idx2 >= len(slots):
-                        ok = False
-                        break
-                    d2, st2, en2 = slots[idx2]
-                    if d2 != d or st2 != cur_end:
-                        ok = False
-                        break
-                    covered.append(idx2)
-                    cur_end = en2
-                    last_end = en2
-                if not ok:
-                    continue
-                # Availability checks for full interval
-                # For labs, do not enforce lecturer availability; still enforce room availability
-                is_lab = bool(req.get("_is_lab"))
-                if (not is_lab) and (not within_availability(lec_avail.get(l.id), d, st, last_end)):
+                o = model.NewBoolVar(f"occ_{name}_t{t}")
+                model.Add(sum(covering) == o)
+                occupancy.append(o)
+                placeable += 1
+            if placeable < 2:
+                continue
+            first = model.NewIntVar(0, n - 1, f"first_{name}_{day}")
+            last = model.NewIntVar(0, n - 1, f"last_{name}_{day}")
+            active = model.NewBoolVar(f"active_{name}_{day}")
+            idle = model.NewIntVar(0, n - 2, f"idle_{name}_{day}")
+            busy = []
+            fixed_count = 0
+            for p, o in enumerate(occupancy):
+                if o is None:
                     continue
-                if not within_availability(room_avail.get(r.id), d, st, last_end):
+                if o is True:
+                    model.Add(first <= p)
+                    model.Add(last >= p)
+                    model.Add(active == 1)
+                    fixed_count += 1
                     continue
-                var = model.NewBoolVar(f"x_s{si}_r{ri}_t{ti}")
-                x[(si, ri, ti)] = var
-                coverage[(si, ri, ti)] = covered
+                model.Add(first <= p).OnlyEnforceIf(o)
+                model.Add(last >= p).OnlyEnforceIf(o)
+                model.AddImplication(o, active)
+                busy.append(o)
+            # Inactive days have no gaps: the n * (1 - active) term switches the bound off
+            model.Add(idle >= last - first + 1 - sum(busy) - fixed_count - n * (1 - active))
+            idle_vars.append(idle)
+    return idle_vars
+
+
+def _add_weekly_patterns(model: cp_model.CpModel, inp: SolverInput,
+                         session_start: Dict[Tuple[int, int], List[cp_model.IntVar]],
+                         same_hour: bool) -> List[cp_model.IntVar]:
+    # One pattern variable per (block, pattern); member i is placed on its pattern day (or, with same_hour,
+    # at its pattern start slot) exactly when the pattern is chosen, whatever room it takes.
+    # Returns the pattern variables.
+    out = []
+    day_index = inp.grid.day_index
+    for bi, (members, days, starts) in enumerate(inp.session_patterns(same_hour)):
+        p = [model.NewBoolVar(f"pattern_b{bi}_{k}") for k in range(len(days))]
+        model.AddExactlyOne(p)
+        out.extend(p)
+        keys = days if starts is None else starts
+        for i, si in enumerate(members):
+            chosen: Dict[int, List[cp_model.IntVar]] = {}
+            for k, key in enumerate(keys[:, i].tolist()):
+                chosen.setdefault(key, []).append(p[k])
+            placed: Dict[int, List[cp_model.IntVar]] = {}
+            for t in np.unique(inp.candidates[si][:, 1]).tolist():
+                key = t if starts is not None else int(day_index[t])
+                placed.setdefault(key, []).extend(session_start[(si, t)])
+            for key, vars_k in placed.items():
+                model.Add(sum(vars_k) == sum(chosen.get(key, [])))
+    return out
+
+
+def build_model(inp: SolverInput, redundant_cuts: Optional[bool] = None,
+                weekly_patterns: Optional[str] = None) -> BuiltModel:
+    sessions = inp.sessions
+    grid = inp.grid
+    model = cp_model.CpModel()
+
+    # Variables: x[(session_index, room_index, start_slot_index)] in {0,1}, only for feasible candidates
+    x: Dict[VarKey, cp_model.IntVar] = {}
+    by_session: Dict[int, List[cp_model.IntVar]] = {si: [] for si in range(len(sessions))}
+    # Variables covering each base slot, per room and per session
+    room_slot: Dict[Tuple[int, int], List[cp_model.IntVar]] = {}
+    session_slot: Dict[Tuple[int, int], List[cp_model.IntVar]] = {}
+    # Variables per (session, start slot), over all rooms
+    session_start: Dict[Tuple[int, int], List[cp_model.IntVar]] = {}
+    # Lecture variables per (lecturer, day) with the session's minutes, for the daily load constraint
+    lecturer_day: Dict[Tuple[int, int], List[Tuple[int, cp_model.IntVar]]] = {}
+    for si, cands in enumerate(inp.candidates):
+        span = int(inp.session_span[si])
+        lecture = not inp.session_is_lab[si]
+        li, minutes = int(inp.session_lecturer[si]), int(inp.session_minutes[si])
+        for ri, ti in cands.tolist():
+            var = model.NewBoolVar(f"x_s{si}_r{ri}_t{ti}")
+            x[(si, ri, ti)] = var
+            by_session[si].append(var)
+            session_start.setdefault((si, ti), []).append(var)
+            for b in grid.covered(ti, span):
+                room_slot.setdefault((ri, b), []).append(var)
+                session_slot.setdefault((si, b), []).append(var)
+            if lecture:
+                lecturer_day.setdefault((li, int(grid.day_index[ti])), []).append((minutes, var))
 
     # Each session assigned exactly once
-    for si, _ in enumerate(sessions):
-        vars_si = [var for (s, r, t), var in x.items() if s == si]
+    for si, vars_si in by_session.items():
         if not vars_si:
             model.AddBoolOr([])  # force UNSAT if no feasible placement
         else:
-            model.Add(sum(vars_si) == 1)
-
-    # No double booking: room by base slot
-    for ri, _ in enumerate(rooms):
-        for b in range(len(slots)):
-            vars_rb = [var for (s, r, t), var in x.items() if r == ri and b in coverage[(s, r, t)]]
-            if vars_rb:
-                model.Add(sum(vars_rb) <= 1)
-
-    # No double booking: group and lecturer by base slot
-    sess_group: Dict[int, int] = {si: g.id for si, (_, g, _, _, _) in enumerate(sessions)}
-    sess_lec: Dict[int, int] = {si: l.id for si, (_, _, l, _, _) in enumerate(sessions)}
-    # Labs do not block lecturer time; only lectures count for lecturer no-overlap
-    nonlab_sessions = {si for si, (_c, _g, _l, _m, req) in enumerate(sessions) if not req.get("_is_lab")}
-
-    for b in range(len(slots)):
-        # groups
-        for gid in set(sess_group.values()):
-            vars_gb = [var for (s, r, t), var in x.items() if sess_group[s] == gid and b in coverage[(s, r, t)]]
-            if vars_gb:
-                model.Add(sum(vars_gb) <= 1)
-        # lecturers
-        for lid in set(sess_lec.values()):
-            vars_lb = [var for (s, r, t), var in x.items() if s in nonlab_sessions and sess_lec[s] == lid and b in coverage[(s, r, t)]]
-            if vars_lb:
-                model.Add(sum(vars_lb) <= 1)
-
-    # Soft constraints: discourage scheduling multiple sessions of the same course-group on the same day
-    penalty = []
-    sess_course: Dict[int, int] = {si: c.id for si, (c, _, _, _, _) in enumerate(sessions)}
-
-    for si in range(len(sessions)):
-        for sj in range(si + 1, len(sessions)):
-            if sess_course[si] == sess_course[sj] and sess_group[si] == sess_group[sj]:
-                # Introduce penalties if both sessions are placed on the same day (any rooms, any start)
-                for (s1, r1, t1), v1 in x.items():
-                    if s1 != si:
-                        continue
-                    d1, _, _ = slots[t1]
-                    for (s2, r2, t2), v2 in x.items():
-                        if s2 != sj:
-                            continue
-                        d2, _, _ = slots[t2]
-                        if d1 == d2:
-                            p = model.NewBoolVar(f"pen_s{si}_s{sj}_d{d1}_t{t1}_{t2}")
-                            model.AddBoolAnd([v1, v2]).OnlyEnforceIf(p)
-                            model.AddBoolOr([v1.Not(), v2.Not()]).OnlyEnforceIf(p.Not())
-                            penalty.append(p)
-
-    if penalty:
-        model.Minimize(sum(penalty))
+            model.AddExactlyOne(vars_si)
 
+    # No double booking: room by base slot; lab pools host up to their concurrent capacity
+    for (ri, b), vars_b in room_slot.items():
+        cap = int(inp.room_capacity[ri, b])
+        if len(vars_b) <= cap:
+            continue
+        if cap == 1:
+            model.AddAtMostOne(vars_b)
+        else:
+            model.Add(sum(vars_b) <= cap)
+
+    # No double booking: groups and lecturers, posted once per merged conflict clique and base slot
+    for clique in inp.cliques:
+        for b in range(len(grid)):
+            vars_b = [v for si in clique for v in session_slot.get((si, b), ())]
+            if len(vars_b) > 1:
+                model.AddAtMostOne(vars_b)
+
+    if settings.solver_redundant_cuts if redundant_cuts is None else redundant_cuts:
+        logger.debug("Posted %d redundant capacity cuts", _add_redundant_cuts(model, inp, x, session_slot))
+
+    built = BuiltModel(model, x)
+
+    # Repeated sessions of a course-group: "days" (one per day), "hours" (one per day, same hour) or "off"
+    patterns = settings.solver_weekly_patterns if weekly_patterns is None else weekly_patterns
+    if patterns in ("days", "hours"):
+        built.carry.extend(_add_weekly_patterns(model, inp, session_start, patterns == "hours"))
+        logger.debug("Added %d weekly pattern variables", len(built.carry))
+
+    # Lecturer max_daily_load: lecture minutes per (lecturer, day), as a hard limit or, in soft mode,
+    # overload minutes collected into the "lecturer_load" objective
+    mode = settings.solver_lecturer_load
+    overload = []
+    for (li, di), terms in lecturer_day.items() if mode in ("hard", "soft") else ():
+        cap = inp.lecturer_daily_cap(li, di)
+        most = sum(m for m, _ in terms)
+        if cap is None or most <= cap:
+            continue
+        load = sum(m * v for m, v in terms)
+        if mode == "hard":
+            model.Add(load <= cap)
+        else:
+            o = model.NewIntVar(0, most - cap, f"overload_l{li}_{grid.days[di]}")
+            model.Add(load - cap <= o)
+            overload.append(o)
+    if overload:
+        built.objectives["lecturer_load"] = sum(overload)
+
+    # Soft constraint ("spread"): discourage multiple sessions of the same course-group on the same day.
+    # Per (course, group, day) an excess variable counts sessions beyond the first on that day.
+    by_course_group: Dict[Tuple[int, int], List[int]] = {}
+    for si, s in enumerate(sessions):
+        by_course_group.setdefault((s.course_id, s.group_id), []).append(si)
+    excess = []
+    for (cid, gid), members in by_course_group.items():
+        if len(members) < 2:
+            continue
+        for di, d in enumerate(grid.days):
+            day_vars = [x[(si, ri, ti)] for si in members for ri, ti in inp.candidates[si].tolist()
+                        if grid.day_index[ti] == di]
+            if len(day_vars) < 2:
+                continue
+            e = model.NewIntVar(0, len(members) - 1, f"spread_c{cid}_g{gid}_{d}")
+            model.Add(e >= sum(day_vars) - 1)
+            excess.append(e)
+    if excess:
+        built.objectives["spread"] = sum(excess)
+
+    # Soft constraint ("room_fit"): unused seats x minutes of every lecture placement, so small groups take
+    # small rooms and large rooms stay free for large cohorts (labs use lab pools and are left out)
+    waste_terms = []
+    for si, cands in enumerate(inp.candidates):
+        if inp.session_is_lab[si] or not len(cands):
+            continue
+        for (ri, ti), w in zip(cands.tolist(), inp.candidate_waste(si).tolist()):
+            if w:
+                waste_terms.append(w * x[(si, ri, ti)])
+    if waste_terms:
+        built.objectives["room_fit"] = sum(waste_terms)
+
+    # Soft constraint ("compactness"): idle slots inside student and lecturer days, added when its stage starts
+    def compactness():
+        idle = _add_compactness(model, inp, session_slot)
+        return sum(idle) if idle else None
+    built.deferred["compactness"] = compactness
+
+    # Dumps and single-shot replays see the first configured objective
+    for name in settings.solver_stages:
+        expr = built.objective(name)
+        if expr is not None:
+            model.Minimize(expr)
+            break
+
+    return built
+
+
+def _stage_stats(name: str, solver: cp_model.CpSolver, status: int) -> Dict[str, Any]:
+    found = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+    return {
+        "stage": name,
+        "status": solver.StatusName(status),
+        "wall_time": round(solver.WallTime(), 3),
+        "objective": solver.ObjectiveValue() if found and name != "feasibility" else None,
+        "bound": solver.BestObjectiveBound() if found and name != "feasibility" else None,
+    }
+
+
+class SolveCancelled(RuntimeError):
+    """Raised when a coordinator cancels a running generation."""
+
+
+class _ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Publishes every improving solution of one stage to a SolveRun (see services/progress.py)."""
+
+    def __init__(self, progress, stage: str, x_index: np.ndarray) -> None:
+        super().__init__()
+        self.progress = progress
+        self.stage = stage
+        self.x_index = x_index
+        self.solutions = 0
+
+    def on_solution_callback(self) -> None:
+        self.solutions += 1
+        values = np.asarray(self.response_proto.solution, dtype=np.int64)
+        has_objective = self.stage != "feasibility"
+        self.progress.publish({
+            "type": "solution",
+            "stage": self.stage,
+            "solution": self.solutions,
+            "objective": self.ObjectiveValue() if has_objective else None,
+            "bound": self.BestObjectiveBound() if has_objective else None,
+            "stage_time": round(self.WallTime(), 3),
+            "placed": int(values[self.x_index].sum()) if len(values) else 0,
+        })
+
+
+def _solve_stage(model: cp_model.CpModel, params: Dict[str, Any], name: str, progress,
+                 x_index: np.ndarray) -> Tuple[cp_model.CpSolver, int]:
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 20.0
-    status = solver.Solve(model)
+    apply_solver_parameters(solver, params)
+    if progress is None:
+        return solver, solver.Solve(model)
+    progress.publish({"type": "stage", "stage": name})
+    progress.attach(solver)
+    try:
+        return solver, solver.Solve(model, _ProgressCallback(progress, name, x_index))
+    finally:
+        progress.attach(None)
+
+
+def solve_staged(built: BuiltModel, params: Dict[str, Any], progress=None, hint: Optional[Set[VarKey]] = None,
+                 stages: Optional[List[str]] = None) -> Tuple[Optional[Dict[VarKey, bool]], List[Dict[str, Any]]]:
+    """Find any feasible timetable first, then optimise the objectives in SOLVER_STAGES (or `stages`) order.
+
+    Every objective stage is hinted with the previous solution and runs under its own time limit; once a
+    stage finishes its value is locked in with a constraint so later stages cannot trade it away.
+    Returns the final assignment (None if stage one found nothing) and per-stage statistics.
+    With a progress run, improving solutions are published to it and a stop request ends the solve:
+    "accept" returns the best assignment found so far, "cancel" raises SolveCancelled.
+    A hint (placements to start from, e.g. an earlier timetable) guides the feasibility stage.
+    """
+    model = built.model
+    stats: List[Dict[str, Any]] = []
+    x_index = np.array([v.Index() for v in built.x.values()], dtype=np.int64)
+
+    def stopped() -> bool:
+        if progress is None or not progress.stop_request:
+            return False
+        if progress.stop_request == "cancel":
+            raise SolveCancelled("Generation was cancelled")
+        return True
+
+    model.ClearObjective()
+    if hint:
+        for k, v in built.x.items():
+            model.AddHint(v, int(k in hint))
+    solver, status = _solve_stage(model, params, "feasibility", progress, x_index)
+    stats.append(_stage_stats("feasibility", solver, status))
+    stopped()
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, stats
+    solution = {k: solver.BooleanValue(v) for k, v in built.x.items()}
+    carried = [solver.Value(v) for v in built.carry]
+
+    for name in settings.solver_stages if stages is None else stages:
+        expr = built.objective(name)
+        if expr is None or stopped():
+            continue
+        model.ClearHints()
+        for k, v in built.x.items():
+            model.AddHint(v, int(solution[k]))
+        for v, value in zip(built.carry, carried):
+            model.AddHint(v, value)
+        model.Minimize(expr)
+        stage_params = dict(params, max_time_in_seconds=settings.solver_stage_time_limit)
+        solver, status = _solve_stage(model, stage_params, name, progress, x_index)
+        stats.append(_stage_stats(name, solver, status))
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            # Nothing better than the hint within this stage's budget; keep the previous solution
+            continue
+        solution = {k: solver.BooleanValue(v) for k, v in built.x.items()}
+        carried = [solver.Value(v) for v in built.carry]
+        model.Add(expr <= int(round(solver.ObjectiveValue())))
+    stopped()
+    model.ClearObjective()
+    model.ClearHints()
+    return solution, stats
+
+
+def solve_input(inp: SolverInput, params: Dict[str, Any], progress=None, dump_version_id: Optional[int] = None,
+                hint: Optional[Set[VarKey]] = None) -> Tuple[Optional[Dict[VarKey, bool]], List[Dict[str, Any]]]:
+    # Solve with the configured engine; returns the assignment (None if nothing feasible was found) and
+    # per-stage statistics. Only the monolithic engine uses the hint: it starts the search and a first
+    # "stability" stage keeps as many hinted placements as possible before the configured objectives.
+    if settings.solver_engine == "decomposed":
+        # Imported lazily: the decomposition builds on this module's model builder and staged solve
+        from .services.decomposition import solve_decomposed
+        if dump_version_id is not None:
+            logger.warning("Model dumps are only written by the monolithic engine")
+        return solve_decomposed(inp, params, progress)
+    built = build_model(inp)
+    if dump_version_id is not None:
+        # Imported lazily: dumps are a debugging aid and not needed on the regular generation path
+        from .services.solver_dump import write_dump
+        write_dump(built.model, built.x, inp, params, version_id=dump_version_id)
+    if not hint:
+        return solve_staged(built, params, progress)
+    kept = [built.x[k] for k in hint if k in built.x]
+    built.objectives["stability"] = len(kept) - sum(kept)
+    return solve_staged(built, params, progress, hint, ["stability"] + settings.solver_stages)
+
+
+def solution_events(inp: SolverInput, solution: Dict[VarKey, bool]) -> List[Dict[str, Any]]:
+    # TimetableEvent fields of the placed sessions; a combined lecture becomes one event per attending
+    # group, all in the same room and slot
+    assigned: Dict[int, Tuple[int, int]] = {}
+    for (si, ri, ti), value in solution.items():
+        if value:
+            assigned[si] = (ri, ti)
+    events: List[Dict[str, Any]] = []
+    for si, s in enumerate(inp.sessions):
+        if si not in assigned:
+            continue
+        r_idx, t_idx = assigned[si]
+        d, st, _ = inp.grid.slots[t_idx]
+        end = inp.grid.end_time(t_idx, s.minutes)
+        for gid in s.group_ids:
+            events.append({"course_id": s.course_id, "room_id": inp.rooms[r_idx]["id"], "group_id": gid,
+                           "lecturer_id": s.lecturer_id, "day": d, "start": st, "end": end})
+    return events
+
+
+def generate_timetable(
+    db: Session,
+    version: models.Version,
+    dump: bool = False,
+    params: Optional[Dict[str, Any]] = None,
+    base_version_id: Optional[int] = None,
+    pin_event_ids: Optional[List[int]] = None,
+    department: Optional[str] = None,
+    year: Optional[int] = None,
+    progress=None,
+    prepare: Callable[..., SolverInput] = prepare_input,
+) -> List[models.TimetableEvent]:
+    # A department (and optional year) scope re-solves only that scope's sessions; all other events of
+    # the base version are fixed background and are copied into the new version.
+    # prepare(db, fixed=, scope=) builds the SolverInput; the solver worker passes its warm cache.
+    scope = {"department": department, "year": year} if department or year else None
+    kept = fixed_events(db, version, base_version_id, pin_event_ids, scope)
+    inp = prepare(db, fixed=kept, scope=scope)
+    if kept:
+        logger.info("Keeping %d events of the base version fixed", len(kept))
+    # Refuse trivially infeasible instances before spending the CP-SAT budget
+    check_capacity(inp)
+    _log_tight_domains(inp)
+
+    solution, stats = solve_input(inp, solver_parameters(params), progress, dump_version_id=version.id if dump else None)
+    for st in stats:
+        logger.info("Solve stage %(stage)s: %(status)s in %(wall_time)ss objective=%(objective)s", st)
+    if solution is None:
         raise RuntimeError("No feasible timetable could be generated with current data and constraints")
 
-    # Build events
+    # Build events: kept ones are carried over unchanged, the rest come from the solution
     events: List[models.TimetableEvent] = []
-    for si, (c, g, l, minutes, _req) in enumerate(sessions):
-        # Find assigned (room, start_slot)
-        assigned = None
-        for (s, r, t), var in x.items():
-            if s == si and solver.BooleanValue(var):
-                assigned = (r, t)
-                break
-        if assigned is None:
-            continue
-        r_idx, t_idx = assigned
-        room = rooms[r_idx]
-        d, st, _ = slots[t_idx]
-        span = minutes // base_slot_minutes
-        _, _, end = slots[t_idx + span - 1]
+    for p in kept:
         ev = models.TimetableEvent(
-            course_id=c.id,
-            room_id=room.id,
-            group_id=g.id,
-            lecturer_id=l.id,
-            day=d,
-            start=st,
-            end=end,
+            course_id=p.course_id,
+            room_id=p.room_id,
+            group_id=p.group_id,
+            lecturer_id=p.lecturer_id,
+            day=p.day,
+            start=p.start,
+            end=p.end,
             version_id=version.id,
+            pinned=p.pinned,
         )
         db.add(ev)
         events.append(ev)
+    for fields in solution_events(inp, solution):
+        ev = models.TimetableEvent(**fields, version_id=version.id)
+        db.add(ev)
+        events.append(ev)
 
+    version.metrics = dict(seat_utilisation(inp, events), sessions=len(inp.sessions), fixed_events=len(kept),
+                           stages=stats)
+    db.add(version)
     db.commit()
     for e in events:
         db.refresh(e)
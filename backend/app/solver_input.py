@@ -0,0 +1,752 @@
+from typing import List, Dict, Tuple, Any, Optional
+from dataclasses import dataclass, field, replace
+from datetime import datetime, time, timedelta
+import copy
+import itertools
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .config import settings
+from . import models
+from .utils import course_year_from_code, parse_time
+
+Day = str  # e.g., "Mon"
+Slot = Tuple[Day, time, time]
+
+
+# -------------------------
+# Time grid
+# -------------------------
+
+class TimeGrid:
+    """Base slots of the week plus the per-slot arrays the model builder and analyzers share.
+
+    Slots are either uniform (SLOT_MINUTES) or, with periods=True, a school's period table whose periods
+    may differ in length. A session then takes as many periods as it needs at the longest period length
+    and may only start where those periods hold its whole duration.
+    """
+
+    def __init__(self, slots: List[Slot], lunch: Optional[Tuple[time, time]] = None,
+                 periods: bool = False, break_minutes: int = 0) -> None:
+        self.slots = slots
+        self.periods = periods
+        self.days: List[Day] = []
+        for d, _, _ in slots:
+            if d not in self.days:
+                self.days.append(d)
+        self.day_index = np.array([self.days.index(d) for d, _, _ in slots], dtype=np.int32)
+        self.minutes = np.array([(en.hour * 60 + en.minute) - (st.hour * 60 + st.minute) for _, st, en in slots],
+                                dtype=np.int32)
+        # Sessions may not start inside the lunch window (they may run into it, as before)
+        if lunch:
+            self.start_ok = np.array([not (lunch[0] <= st < lunch[1]) for _, st, _ in slots], dtype=bool)
+        else:
+            self.start_ok = np.ones(len(slots), dtype=bool)
+        # follows[t]: slot t+1 starts on the same day when slot t ends (periods: after at most a short break)
+        self.follows = np.zeros(len(slots), dtype=bool)
+        for t in range(len(slots) - 1):
+            d, _, en = slots[t]
+            d2, st2, _ = slots[t + 1]
+            gap = (st2.hour * 60 + st2.minute) - (en.hour * 60 + en.minute)
+            self.follows[t] = d2 == d and 0 <= gap <= (break_minutes if periods else 0)
+        self._runs: Dict[int, np.ndarray] = {}
+        self._fits: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @property
+    def slot_minutes(self) -> int:
+        return int(self.minutes[0]) if len(self.minutes) else settings.slot_minutes
+
+    def span_for(self, minutes: int) -> int:
+        # Number of base slots a session covers; 0 when the duration does not fit the grid
+        if minutes <= 0:
+            return 0
+        if self.periods:
+            longest = int(self.minutes.max()) if len(self.minutes) else 0
+            return -(-minutes // longest) if longest else 0
+        if minutes % self.slot_minutes != 0:
+            return 0
+        return minutes // self.slot_minutes
+
+    def fits(self, minutes: int) -> np.ndarray:
+        # fits(minutes)[t]: a session of this length can start at t (its run of slots holds the whole duration)
+        if minutes not in self._fits:
+            span = self.span_for(minutes)
+            T = len(self.slots)
+            ok = self.runs(span).copy() if span else np.zeros(T, dtype=bool)
+            if self.periods and span:
+                ok &= self.run_minutes(span) >= minutes
+            self._fits[minutes] = ok
+        return self._fits[minutes]
+
+    def run_minutes(self, span: int) -> np.ndarray:
+        # run_minutes(span)[t]: minutes of slots t .. t+span-1 (meaningful where runs(span) holds)
+        T = len(self.slots)
+        total = np.zeros(T, dtype=np.int64)
+        for off in range(span):
+            total[: T - off] += self.minutes[off:]
+        return total
+
+    def end_time(self, ti: int, minutes: int) -> time:
+        # A session ends after its own duration, which on a period grid may be before its last period ends
+        _, st, _ = self.slots[ti]
+        return (datetime(2000, 1, 1, st.hour, st.minute) + timedelta(minutes=minutes)).time()
+
+    def runs(self, span: int) -> np.ndarray:
+        # runs(span)[t]: slots t .. t+span-1 exist, lie on one day and are back to back
+        if span not in self._runs:
+            T = len(self.slots)
+            ok = np.zeros(T, dtype=bool)
+            n = T - span + 1
+            if span > 0 and n > 0:
+                ok[:n] = True
+                for off in range(span - 1):
+                    ok[:n] &= self.follows[off: off + n]
+            self._runs[span] = ok
+        return self._runs[span]
+
+    def window(self, mask: np.ndarray, span: int) -> np.ndarray:
+        # Along the last axis: True at t when mask holds on every slot of the run starting at t
+        out = mask & self.runs(span)
+        for off in range(1, span):
+            shifted = np.zeros_like(mask)
+            shifted[..., : mask.shape[-1] - off] = mask[..., off:]
+            out &= shifted
+        return out
+
+    def availability_mask(self, avail: Optional[Dict[str, List[List[str]]]]) -> np.ndarray:
+        # A slot is available when it lies inside one of the day's windows; no availability means always available
+        if not avail:
+            return np.ones(len(self.slots), dtype=bool)
+        mask = np.zeros(len(self.slots), dtype=bool)
+        for t, (d, st, en) in enumerate(self.slots):
+            for s, e in avail.get(d) or []:
+                if parse_time(s) <= st and en <= parse_time(e):
+                    mask[t] = True
+                    break
+        return mask
+
+    def covered(self, ti: int, span: int) -> range:
+        return range(ti, ti + span)
+
+    def overlapping(self, day: Day, start: time, end: time) -> np.ndarray:
+        # Slots of the day that intersect [start, end); fixed events need not align with the grid
+        return np.array([d == day and st < end and start < en for d, st, en in self.slots], dtype=bool)
+
+
+def build_timeslots() -> List[Slot]:
+    # Build base day/slot grid from env: the period table when configured, else uniform slots
+    days = settings.week_days
+    if settings.periods:
+        periods = sorted((parse_time(st), parse_time(en)) for st, en in settings.periods)
+        return [(d, st, en) for d in days for st, en in periods]
+    st_h, st_m = map(int, settings.day_start.split(":"))
+    en_h, en_m = map(int, settings.day_end.split(":"))
+    slot = settings.slot_minutes
+    slots: List[Slot] = []
+    for d in days:
+        cur = datetime(2000, 1, 1, st_h, st_m)
+        end = datetime(2000, 1, 1, en_h, en_m)
+        while cur + timedelta(minutes=slot) <= end:
+            slots.append((d, (cur.time()), (cur + timedelta(minutes=slot)).time()))
+            cur += timedelta(minutes=slot)
+    return slots
+
+
+def build_time_grid() -> TimeGrid:
+    if settings.periods:
+        # The period table already leaves lunch out; LUNCH_START/LUNCH_END only apply to uniform slots
+        return TimeGrid(build_timeslots(), periods=True, break_minutes=settings.period_break_minutes)
+    try:
+        lunch = (parse_time(settings.lunch_start), parse_time(settings.lunch_end))
+    except Exception:
+        lunch = None
+    return TimeGrid(build_timeslots(), lunch)
+
+
+# -------------------------
+# Dataset (plain dicts, independent of the DB session)
+# -------------------------
+
+def _room_dict(r: models.Room) -> Dict[str, Any]:
+    return {
+        "id": r.id,
+        "name": r.name,
+        "capacity": r.capacity,
+        "building": r.building,
+        "furniture_type": r.furniture_type,
+        "equipment": r.equipment,
+        "availability": r.availability,
+        "concurrent_sessions": r.concurrent_sessions,
+    }
+
+
+def _group_dict(g: models.StudentGroup) -> Dict[str, Any]:
+    return {
+        "id": g.id,
+        "name": g.name,
+        "size": g.size,
+        "year": g.year,
+        "department": g.department,
+        "lecture_group": g.lecture_group,
+        "subgroup": g.subgroup,
+        "track": g.track,
+    }
+
+
+def _lecturer_dict(l: models.Lecturer) -> Dict[str, Any]:
+    return {
+        "id": l.id,
+        "name": l.name,
+        "department": l.department,
+        "max_daily_load": l.max_daily_load,
+        "availability": l.availability,
+    }
+
+
+def _course_dict(c: models.Course) -> Dict[str, Any]:
+    return {
+        "id": c.id,
+        "code": c.code,
+        "name": c.name,
+        "department": c.department,
+        "weekly_hours": c.weekly_hours,
+        "session_minutes": c.session_minutes,
+        "requirements": c.requirements,
+        "is_project": c.is_project,
+        "combined_lecture": c.combined_lecture,
+        "has_lab": c.has_lab,
+        "lab_weekly_sessions": c.lab_weekly_sessions,
+        "lab_session_minutes": c.lab_session_minutes,
+        "lab_requirements": c.lab_requirements,
+        "group_ids": [g.id for g in c.groups],
+        "lecturer_ids": [l.id for l in c.lecturers],
+    }
+
+
+def _event_dict(e: models.TimetableEvent) -> Dict[str, Any]:
+    return {
+        "id": e.id,
+        "course_id": e.course_id,
+        "room_id": e.room_id,
+        "group_id": e.group_id,
+        "lecturer_id": e.lecturer_id,
+        "day": e.day,
+        "start": e.start.strftime("%H:%M"),
+        "end": e.end.strftime("%H:%M"),
+        "pinned": bool(e.pinned),
+    }
+
+
+# Reference data kinds: the model class and dict converter of each dataset list
+REFERENCE_KINDS = {
+    "rooms": (models.Room, _room_dict),
+    "groups": (models.StudentGroup, _group_dict),
+    "lecturers": (models.Lecturer, _lecturer_dict),
+    "courses": (models.Course, _course_dict),
+}
+
+
+def load_reference(db: Session, kinds: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    # Reference lists (all kinds by default), each ordered by id
+    out = {}
+    for kind in kinds or list(REFERENCE_KINDS):
+        model, to_dict = REFERENCE_KINDS[kind]
+        out[kind] = [to_dict(obj) for obj in db.query(model).order_by(model.id).all()]
+    return out
+
+
+def load_dataset(db: Session, fixed: Optional[List[models.TimetableEvent]] = None,
+                 scope: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Everything the solver reads from the DB, as plain (picklable, JSON-able) dicts.
+    # "fixed" holds events that keep their placement: they replace sessions and occupy their slots.
+    # "scope" ({"department", "year"}) limits which sessions are generated at all.
+    return dict(load_reference(db), fixed=[_event_dict(e) for e in fixed or []], scope=scope)
+
+
+# -------------------------
+# Sessions
+# -------------------------
+
+@dataclass
+class SessionSpec:
+    course_id: int
+    course_code: str
+    group_id: int
+    lecturer_id: int
+    minutes: int
+    is_lab: bool
+    requirements: Dict[str, Any] = field(default_factory=dict)
+    # All groups attending; more than one for a combined lecture (group_id is the first of them)
+    group_ids: List[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.group_ids:
+            self.group_ids = [self.group_id]
+
+
+def in_scope(scope: Optional[Dict[str, Any]], course: Dict[str, Any], group: Dict[str, Any]) -> bool:
+    # A course-group pair belongs to a department scope through the course's owning department
+    if not scope:
+        return True
+    if scope.get("department") and (course.get("department") or "").upper() != scope["department"].upper():
+        return False
+    if scope.get("year") and group.get("year") != scope["year"]:
+        return False
+    return True
+
+
+def build_sessions(dataset: Dict[str, List[Dict[str, Any]]]) -> List[SessionSpec]:
+    # Build sessions: for each Course-Group pair with a Lecturer
+    groups_by_id = {g["id"]: g for g in dataset["groups"]}
+    scope = dataset.get("scope")
+    sessions: List[SessionSpec] = []
+    for c in dataset["courses"]:
+        # Skip project courses (handled separately) -- they should not be scheduled into venues
+        if c.get("is_project"):
+            continue
+        groups = [groups_by_id[gid] for gid in c["group_ids"]
+                  if gid in groups_by_id and in_scope(scope, c, groups_by_id[gid])]
+        if not groups or not c["lecturer_ids"]:
+            continue
+        # Enforce year-course pairing via code convention if group.year is set
+        c_year_hint = course_year_from_code(c["code"])
+        lec_id = c["lecturer_ids"][0]
+        # Lecture sessions according to weekly_hours and session_minutes
+        if c["weekly_hours"] and c["session_minutes"]:
+            minutes_needed = c["weekly_hours"] * 60
+            per_session = c["session_minutes"] or settings.slot_minutes
+            num_sessions = max(1, (minutes_needed + per_session - 1) // per_session)
+            lecture_groups = [g for g in groups if not (g["year"] and c_year_hint and g["year"] != c_year_hint)]
+            if c.get("combined_lecture") and lecture_groups:
+                # One session per lecture for all attached groups; subgroups ride along with their cohort
+                gids = [g["id"] for g in _outermost(lecture_groups)]
+                for _ in range(num_sessions):
+                    sessions.append(SessionSpec(c["id"], c["code"], gids[0], lec_id, per_session, False,
+                                                dict(c.get("requirements") or {}), gids))
+            else:
+                for g in lecture_groups:
+                    for _ in range(num_sessions):
+                        sessions.append(SessionSpec(c["id"], c["code"], g["id"], lec_id, per_session, False,
+                                                    dict(c.get("requirements") or {})))
+        # Lab sessions if configured
+        if c.get("has_lab") and (c.get("lab_weekly_sessions") or 0) > 0:
+            lab_per_session = c.get("lab_session_minutes") or (3 * settings.slot_minutes)
+            for g in groups:
+                if g["year"] and c_year_hint and g["year"] != c_year_hint:
+                    continue
+                for _ in range(c["lab_weekly_sessions"]):
+                    sessions.append(SessionSpec(c["id"], c["code"], g["id"], lec_id, lab_per_session, True,
+                                                dict(c.get("lab_requirements") or {})))
+    return _without_fixed(sessions, dataset.get("fixed") or [])
+
+
+def _contains(outer: Dict[str, Any], inner: Dict[str, Any]) -> bool:
+    # Same cohort and every hierarchy level set on outer is equal on inner
+    if not (outer.get("department") and outer.get("year")):
+        return False
+    if (outer["department"], outer["year"]) != (inner.get("department"), inner.get("year")):
+        return False
+    return all(not outer.get(level) or outer[level] == inner.get(level) for level in _GROUP_LEVELS)
+
+
+def _outermost(groups: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Drop groups contained in another listed group (e.g. subgroups when their cohort is listed too);
+    # of rows with identical patterns the first is kept
+    kept = []
+    for i, g in enumerate(groups):
+        if not any(j != i and _contains(o, g) and (j < i or not _contains(g, o)) for j, o in enumerate(groups)):
+            kept.append(g)
+    return kept
+
+
+def _event_minutes(ev: Dict[str, Any]) -> int:
+    st, en = parse_time(ev["start"]), parse_time(ev["end"])
+    return (en.hour * 60 + en.minute) - (st.hour * 60 + st.minute)
+
+
+def _without_fixed(sessions: List[SessionSpec], fixed: List[Dict[str, Any]]) -> List[SessionSpec]:
+    # Each fixed event stands in for its group's place in one session of its course with the same duration.
+    # The events of one combined lecture (one per group, same placement) use up the same session; groups of
+    # it without a fixed event keep the lecture as a smaller combined session.
+    remaining: List[Optional[SessionSpec]] = list(sessions)
+    matched: Dict[Tuple[int, str, str], Tuple[int, List[int]]] = {}
+    for ev in fixed:
+        minutes = _event_minutes(ev)
+        key = (ev["course_id"], ev["day"], ev["start"])
+        if key in matched and ev["group_id"] in matched[key][1]:
+            i = matched[key][0]
+        else:
+            i = next((i for i, s in enumerate(remaining) if s is not None and s.course_id == ev["course_id"]
+                      and ev["group_id"] in s.group_ids and s.minutes == minutes), None)
+            if i is None:
+                continue
+            matched[key] = (i, list(remaining[i].group_ids))
+        s = remaining[i]
+        if s is None or ev["group_id"] not in s.group_ids:
+            continue
+        rest = [gid for gid in s.group_ids if gid != ev["group_id"]]
+        remaining[i] = replace(s, group_id=rest[0], group_ids=rest) if rest else None
+    return [s for s in remaining if s is not None]
+
+
+# -------------------------
+# Group hierarchy
+# -------------------------
+
+_GROUP_LEVELS = ("lecture_group", "track", "subgroup")
+
+
+def group_atoms(groups: List[Dict[str, Any]]) -> np.ndarray:
+    """Atomic student sets: atoms[g, a] says group row g contains student set a.
+
+    Rows of one cohort (same department and year) are patterns over lecture group, track and subgroup,
+    an unset level meaning "all of them". The cohort's atoms are the combinations of the values its rows
+    use and a row covers the atoms matching its pattern, so two rows share an atom exactly when they may
+    share students (the cohort and its subgroup A, track ET and subgroup A, but not subgroups A and B).
+    Rows without department or year are atoms of their own.
+    """
+    G = len(groups)
+    cohorts: Dict[Tuple[str, int], List[int]] = {}
+    for gi, g in enumerate(groups):
+        if g.get("department") and g.get("year"):
+            cohorts.setdefault((g["department"].upper(), g["year"]), []).append(gi)
+    columns: List[np.ndarray] = []
+    grouped = np.zeros(G, dtype=bool)
+    for members in cohorts.values():
+        grouped[members] = True
+        values = [sorted({groups[gi][level] for gi in members if groups[gi].get(level)}) or [None]
+                  for level in _GROUP_LEVELS]
+        for combo in itertools.product(*values):
+            col = np.zeros(G, dtype=bool)
+            for gi in members:
+                g = groups[gi]
+                col[gi] = all(not g.get(level) or g[level] == v for level, v in zip(_GROUP_LEVELS, combo))
+            columns.append(col)
+    for gi in np.flatnonzero(~grouped):
+        col = np.zeros(G, dtype=bool)
+        col[gi] = True
+        columns.append(col)
+    if not columns:
+        return np.zeros((G, 0), dtype=bool)
+    # Combinations no row tells apart are one atom
+    return np.unique(np.stack(columns, axis=1), axis=1)
+
+
+# -------------------------
+# Solver input
+# -------------------------
+
+def is_lab_room(r: Dict[str, Any]) -> bool:
+    return (r.get("furniture_type") or "").upper() == "LAB"
+
+
+def room_accepts(req: Dict[str, Any], is_lab: bool, r: Dict[str, Any]) -> bool:
+    # Labs must use lab rooms only; lectures must not use them
+    if is_lab != is_lab_room(r):
+        return False
+    # Seats are not checked here: SolverInput.room_ok narrows the accepted rooms to those that seat the audience
+    # Case-insensitive match for lecture requirements
+    req_ft = (req.get("furniture_type") or "").upper()
+    room_ft = (r.get("furniture_type") or "").upper()
+    if req_ft and room_ft != req_ft:
+        return False
+    needed = set([str(x).upper() for x in (req.get("equipment", []) or [])])
+    have = set([str(x).upper() for x in (r.get("equipment") or [])])
+    return needed.issubset(have)
+
+
+class SolverInput:
+    """Sessions plus precomputed availability masks and candidate placements for one solve.
+
+    Masks are boolean numpy arrays over the grid's base slots:
+    room_avail [R, T], lecturer_avail [L, T], group_avail [G, T]; room_ok [S, R] says which rooms a
+    session may use and session_starts [S, T] where it may start. candidates[s] lists the feasible
+    (room index, start slot index) pairs of session s. room_capacity [R, T] counts the sessions a room
+    can still host at once (lab pools host several; fixed events use some up). group_atoms [G, A] maps
+    group rows to atomic student sets; no-overlap is posted per atom and fixed events occupy atoms, so a
+    cohort's lecture also blocks its subgroups.
+    """
+
+    def __init__(self, dataset: Dict[str, List[Dict[str, Any]]], grid: TimeGrid,
+                 sessions: Optional[List[SessionSpec]] = None) -> None:
+        self.dataset = dataset
+        self.grid = grid
+        self.rooms = dataset["rooms"]
+        self.groups = dataset["groups"]
+        self.lecturers = dataset["lecturers"]
+        self.courses = dataset["courses"]
+        self.room_index = {r["id"]: i for i, r in enumerate(self.rooms)}
+        self.group_index = {g["id"]: i for i, g in enumerate(self.groups)}
+        self.lecturer_index = {l["id"]: i for i, l in enumerate(self.lecturers)}
+        self.sessions = sessions if sessions is not None else build_sessions(dataset)
+
+        T = len(grid)
+        fri = np.array([d == "Fri" for d, _, _ in grid.slots], dtype=bool)
+        self.room_avail = np.array([grid.availability_mask(r.get("availability")) for r in self.rooms],
+                                   dtype=bool).reshape(len(self.rooms), T)
+        self.room_concurrency = np.array([max(1, r.get("concurrent_sessions") or 1) for r in self.rooms],
+                                         dtype=np.int32)
+        self.room_capacity = self.room_avail * self.room_concurrency[:, None]
+        self.lecturer_avail = np.array([grid.availability_mask(l.get("availability")) for l in self.lecturers],
+                                       dtype=bool).reshape(len(self.lecturers), T)
+        # For 5th year groups, Friday is reserved for project work
+        self.group_avail = np.array([~fri if g.get("year") == 5 else np.ones(T, dtype=bool) for g in self.groups],
+                                    dtype=bool).reshape(len(self.groups), T)
+        self.group_atoms = group_atoms(self.groups)
+        # Lecturer daily lecture load: cap in minutes (0 = unlimited) and minutes already taken by fixed events
+        self.lecturer_max_daily = np.array([l.get("max_daily_load") or 0 for l in self.lecturers], dtype=np.int32)
+        self.lecturer_fixed_load = np.zeros((len(self.lecturers), len(grid.days)), dtype=np.int32)
+        self.fixed = dataset.get("fixed") or []
+        self._occupy_fixed()
+
+        S = len(self.sessions)
+        self.session_group = np.array([self.group_index[s.group_id] for s in self.sessions], dtype=np.int32)
+        # session_group_mask [S, G]: every group attending (several for a combined lecture)
+        self.session_group_mask = np.zeros((S, len(self.groups)), dtype=bool)
+        for si, s in enumerate(self.sessions):
+            self.session_group_mask[si, [self.group_index[gid] for gid in s.group_ids]] = True
+        self.session_lecturer = np.array([self.lecturer_index[s.lecturer_id] for s in self.sessions], dtype=np.int32)
+        self.session_minutes = np.array([s.minutes for s in self.sessions], dtype=np.int32)
+        self.session_span = np.array([grid.span_for(s.minutes) for s in self.sessions], dtype=np.int32)
+        self.session_is_lab = np.array([s.is_lab for s in self.sessions], dtype=bool)
+
+        # Allowed rooms per session: acceptable rooms (lab rooms for labs, lecture rooms with the required
+        # furniture and equipment otherwise) that seat the whole audience, or the largest acceptable room(s)
+        # when none does. utils.check_conflicts accepts that fallback for an oversize audience.
+        caps = np.array([r.get("capacity") or 0 for r in self.rooms], dtype=np.int64)
+        self.room_seats = caps
+        sizes = np.array([g.get("size") or 0 for g in self.groups], dtype=np.int64)
+        # Students attending each session (all groups of a combined lecture)
+        self.session_audience = self.session_group_mask.astype(np.int64) @ sizes
+        self.room_ok = np.zeros((S, len(self.rooms)), dtype=bool)
+        for si, s in enumerate(self.sessions):
+            audience = int(self.session_audience[si])
+            accepts = np.array([room_accepts(s.requirements, s.is_lab, r) for r in self.rooms], dtype=bool)
+            fits = accepts & (caps >= audience)
+            if not fits.any() and accepts.any():
+                fits = accepts & (caps == caps[accepts].max())
+            self.room_ok[si] = fits
+
+        # Start slots per session: grid start rule, contiguous run, group and (for lectures) lecturer windows
+        self.session_starts = np.zeros((S, T), dtype=bool)
+        for si in range(S):
+            span = int(self.session_span[si])
+            if span == 0:
+                continue
+            ok = grid.start_ok & grid.fits(int(self.session_minutes[si]))
+            ok &= grid.window(self.group_avail[self.session_group_mask[si]].all(axis=0), span)
+            # For labs, do not enforce lecturer availability; still enforce room availability
+            if not self.session_is_lab[si]:
+                ok &= grid.window(self.lecturer_avail[self.session_lecturer[si]], span)
+            self.session_starts[si] = ok
+
+        room_windows: Dict[int, np.ndarray] = {}
+        self.candidates: List[np.ndarray] = []
+        for si in range(S):
+            span = int(self.session_span[si])
+            if span == 0:
+                self.candidates.append(np.zeros((0, 2), dtype=np.int32))
+                continue
+            if span not in room_windows:
+                room_windows[span] = grid.window(self.room_avail, span)
+            mask = room_windows[span] & self.room_ok[si][:, None] & self.session_starts[si][None, :]
+            self.candidates.append(np.argwhere(mask).astype(np.int32))
+
+        self.cliques = conflict_cliques(self.resource_sessions())
+
+    def _occupy_fixed(self) -> None:
+        # Fixed events are constants, not variables: remove their slots from the resources they hold.
+        # Group time is tracked per atom, then every group loses the slots any of its atoms lost.
+        atom_busy = np.zeros((self.group_atoms.shape[1], len(self.grid)), dtype=bool)
+        lecturer_busy = np.zeros((len(self.lecturers), len(self.grid)), dtype=bool)
+        rooms_taken = set()
+        lectures_taken = set()
+        for ev in self.fixed:
+            busy = self.grid.overlapping(ev["day"], parse_time(ev["start"]), parse_time(ev["end"]))
+            ri = self.room_index.get(ev["room_id"])
+            # A combined lecture is one event per group in the same lecture room; it takes the room once
+            key = (ev["room_id"], ev["course_id"], ev["day"], ev["start"])
+            if ri is not None and not (key in rooms_taken and not is_lab_room(self.rooms[ri])):
+                rooms_taken.add(key)
+                self.room_capacity[ri] = np.maximum(self.room_capacity[ri] - busy, 0)
+                self.room_avail[ri] = self.room_capacity[ri] > 0
+            gi = self.group_index.get(ev["group_id"])
+            if gi is not None:
+                atom_busy[self.group_atoms[gi]] |= busy
+            li = self.lecturer_index.get(ev["lecturer_id"])
+            # Labs do not block lecturer time
+            if li is not None and not (ri is not None and is_lab_room(self.rooms[ri])):
+                self.lecturer_avail[li] &= ~busy
+                lecturer_busy[li] |= busy
+                lecture = (ev["lecturer_id"], ev["course_id"], ev["day"], ev["start"])
+                if lecture not in lectures_taken and ev["day"] in self.grid.days:
+                    lectures_taken.add(lecture)
+                    self.lecturer_fixed_load[li, self.grid.days.index(ev["day"])] += _event_minutes(ev)
+        if self.fixed and atom_busy.any():
+            self.group_avail &= ~((self.group_atoms.astype(np.int32) @ atom_busy.astype(np.int32)) > 0)
+        # Kept for objectives that look at whole days (compactness)
+        self.atom_fixed_busy = atom_busy
+        self.lecturer_fixed_busy = lecturer_busy
+
+    def subset(self, indices: List[int], day: Optional[int] = None) -> "SolverInput":
+        """A view over some sessions (and, with day, only their placements on that day index).
+
+        Resources, fixed events and the grid are shared with this input; per-session arrays and
+        candidates are sliced, so session i of the view is session indices[i] here.
+        """
+        view = copy.copy(self)
+        idx = np.asarray(indices, dtype=np.int64)
+        view.sessions = [self.sessions[i] for i in indices]
+        for name in ("session_group", "session_group_mask", "session_lecturer", "session_minutes", "session_span",
+                     "session_is_lab", "session_audience", "room_ok", "session_starts"):
+            setattr(view, name, getattr(self, name)[idx])
+        view.candidates = [self.candidates[i] for i in indices]
+        if day is not None:
+            on_day = self.grid.day_index == day
+            view.session_starts = view.session_starts & on_day[None, :]
+            view.candidates = [c[on_day[c[:, 1]]] for c in view.candidates]
+        view.cliques = conflict_cliques(view.resource_sessions())
+        return view
+
+    def candidate_waste(self, si: int) -> np.ndarray:
+        # Unused seats x minutes of each candidate placement of session si. A student without a seat costs more
+        # than the largest room can waste, so a too small room never looks like a fit (room_ok only leaves one
+        # when no acceptable room seats the audience).
+        rooms = self.candidates[si][:, 0]
+        free = self.room_seats[rooms] - self.session_audience[si]
+        cost = np.where(free >= 0, free, -free * (int(self.room_seats.max()) + 1))
+        return cost * int(self.session_minutes[si])
+
+    def lecturer_daily_cap(self, li: int, di: int) -> Optional[int]:
+        # Lecture minutes lecturer li may still get on day di; None when max_daily_load is not set
+        cap = int(self.lecturer_max_daily[li])
+        if not cap:
+            return None
+        return max(0, cap - int(self.lecturer_fixed_load[li, di]))
+
+    @property
+    def session_atoms(self) -> np.ndarray:
+        # [S, A]: atomic student sets each session occupies
+        return (self.session_group_mask.astype(np.int32) @ self.group_atoms.astype(np.int32)) > 0
+
+    def atom_members(self) -> List[np.ndarray]:
+        # Sessions per atom, one entry per distinct session set (atoms sharing all sessions collapse)
+        seen = set()
+        out = []
+        for col in self.session_atoms.T:
+            members = np.flatnonzero(col)
+            key = members.tobytes()
+            if len(members) and key not in seen:
+                seen.add(key)
+                out.append(members)
+        return out
+
+    def resource_sessions(self) -> List[List[int]]:
+        # Sessions that can never overlap because they share a resource: each atomic student set, and
+        # each lecturer's lectures (labs do not block lecturer time)
+        by_lecturer: Dict[int, List[int]] = {}
+        for si in range(len(self.sessions)):
+            if not self.session_is_lab[si]:
+                by_lecturer.setdefault(int(self.session_lecturer[si]), []).append(si)
+        return [m.tolist() for m in self.atom_members()] + list(by_lecturer.values())
+
+    def session_patterns(self, same_hour: bool = False) -> List[Tuple[List[int], np.ndarray, Optional[np.ndarray]]]:
+        """Weekly patterns for repeated sessions: (members, days, starts) per course-group block.
+
+        A block is the interchangeable sessions of one course and audience (same kind, length and
+        lecturer). Under pattern p member i goes on day days[p, i], one member per day, so the same-day
+        spreading rule holds by construction and the members' order is fixed. With same_hour a pattern
+        also fixes one time of day for all members and starts[p, i] is member i's start slot (otherwise
+        starts is None and each member picks its hour). Only patterns every member can take are kept, and
+        days already holding a fixed session of the block are skipped. Blocks with no pattern left are
+        not returned (their sessions stay free).
+        """
+        grid = self.grid
+        slot_at = {(int(grid.day_index[t]), st): t for t, (_, st, _) in enumerate(grid.slots)}
+        times = sorted({st for _, st, _ in grid.slots})
+        blocks: Dict[Tuple[Any, ...], List[int]] = {}
+        for si, s in enumerate(self.sessions):
+            blocks.setdefault((s.course_id, tuple(s.group_ids), s.is_lab, s.minutes, s.lecturer_id), []).append(si)
+        fixed_days: Dict[Tuple[int, int, int], set] = {}
+        for ev in self.fixed:
+            if ev["day"] in grid.days:
+                fixed_days.setdefault((ev["course_id"], ev["group_id"], _event_minutes(ev)), set()).add(
+                    grid.days.index(ev["day"]))
+
+        out = []
+        for (cid, gids, _, minutes, _), members in blocks.items():
+            k = len(members)
+            if k < 2:
+                continue
+            taken = set().union(*(fixed_days.get((cid, g, minutes), set()) for g in gids))
+            days = [di for di in range(len(grid.days)) if di not in taken]
+            # Start slots with at least one room for each member (members are interchangeable, so one mask)
+            can = np.zeros(len(grid), dtype=bool)
+            can[self.candidates[members[0]][:, 1]] = True
+            can_day = np.zeros(len(grid.days), dtype=bool)
+            can_day[grid.day_index[can]] = True
+            rows, starts = [], []
+            for combo in weekly_patterns(days, k):
+                if not same_hour:
+                    if can_day[list(combo)].all():
+                        rows.append(combo)
+                    continue
+                for st in times:
+                    ts = [slot_at.get((di, st)) for di in combo]
+                    if all(t is not None and can[t] for t in ts):
+                        rows.append(combo)
+                        starts.append(ts)
+            if rows:
+                out.append((members, np.array(rows, dtype=np.int32),
+                            np.array(starts, dtype=np.int32) if same_hour else None))
+        return out
+
+
+def weekly_patterns(days: List[int], k: int) -> List[Tuple[int, ...]]:
+    # Day combinations for k sessions a week, one per day, widest spacing first (Mon/Wed/Fri before Mon/Tue/Wed)
+    combos = list(itertools.combinations(days, k))
+    return sorted(combos, key=lambda c: -min((b - a for a, b in zip(c, c[1:])), default=0))
+
+
+def conflict_cliques(resources: List[List[int]]) -> List[List[int]]:
+    """Merge per-resource conflict sets into fewer, larger cliques of the session conflict graph.
+
+    Two sessions conflict when some resource set contains both. Each resource set is grown greedily
+    into a maximal clique (adding sessions that conflict with every member), then duplicate and
+    subsumed cliques are dropped. Every resource set stays covered by at least one clique, so one
+    at-most-one per (clique, slot) replaces the per-resource constraints.
+    """
+    adj: Dict[int, set] = {}
+    for members in resources:
+        for s in members:
+            adj.setdefault(s, set()).update(members)
+    for s, ns in adj.items():
+        ns.discard(s)
+
+    grown = []
+    for members in sorted(resources, key=len, reverse=True):
+        if len(members) < 2:
+            continue
+        clique = set(members)
+        common = set.intersection(*(adj[s] for s in members)) - clique
+        # Prefer candidates with many neighbours: they keep the common neighbourhood large
+        for s in sorted(common, key=lambda v: -len(adj[v])):
+            if s in common:
+                clique.add(s)
+                common &= adj[s]
+        grown.append(frozenset(clique))
+
+    cliques: List[frozenset] = []
+    for c in sorted(set(grown), key=len, reverse=True):
+        if not any(c <= kept for kept in cliques):
+            cliques.append(c)
+    return [sorted(c) for c in cliques]
+
+
+def build_solver_input(db: Session, grid: Optional[TimeGrid] = None,
+                       fixed: Optional[List[models.TimetableEvent]] = None,
+                       scope: Optional[Dict[str, Any]] = None) -> SolverInput:
+    return SolverInput(load_dataset(db, fixed, scope), grid or build_time_grid())
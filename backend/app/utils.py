@@ -56,10 +56,34 @@ def check_lecturer_availability(db: Session, lecturer_id: int, day: int, start_t
     return existing is None
 
 
+def _largest_accepting_room(db: Session, event: models.TimetableEvent, lab: bool) -> int:
+    # Seats of the largest room the solver would accept for the event's session; an audience no such room
+    # seats is placed in one of the largest (SolverInput.room_ok), which is not a capacity conflict
+    from .solver_input import room_accepts  # solver_input imports this module
+    req = (event.course.lab_requirements if lab else event.course.requirements) or {}
+    return max((r.capacity or 0 for r in db.query(models.Room).all()
+                if room_accepts(req, lab, {"furniture_type": r.furniture_type, "equipment": r.equipment})),
+               default=0)
+
+
 def check_conflicts(db: Session, event: models.TimetableEvent) -> List[str]:
     errors = []
-    # Room capacity
-    if event.room and event.group and event.room.capacity < event.group.size:
+    # Other events of the same timetable that day; a combined lecture is one event per group sharing course,
+    # room, day and start, and in a lecture room those events are a single booking
+    q = db.query(models.TimetableEvent).filter(models.TimetableEvent.day == event.day)
+    if event.version_id is not None:
+        q = q.filter(models.TimetableEvent.version_id == event.version_id)
+    existing = [ev for ev in q.all() if ev.id != event.id]
+    lab_room = bool(event.room) and (event.room.furniture_type or "").upper() == "LAB"
+
+    def same_lecture(ev: models.TimetableEvent) -> bool:
+        return not lab_room and (ev.course_id, ev.room_id, ev.start) == (event.course_id, event.room_id, event.start)
+
+    siblings = [ev for ev in existing if same_lecture(ev) and ev.group_id != event.group_id]
+    # Room capacity (all groups of a combined lecture together)
+    audience = sum((ev.group.size or 0) for ev in [event] + siblings if ev.group)
+    if event.room and event.group and event.room.capacity < audience and \
+            event.room.capacity < _largest_accepting_room(db, event, lab_room):
         errors.append("Room capacity is less than group size")
     # Requirements
     req = event.course.requirements or {}
@@ -91,17 +115,19 @@ def check_conflicts(db: Session, event: models.TimetableEvent) -> List[str]:
         errors.append("Lecturer not available in selected slot")
 
     # Double-bookings
-    existing = db.query(models.TimetableEvent).filter(models.TimetableEvent.day == event.day).all()
+    room_bookings = set()
     for ev in existing:
-        if ev.id == event.id:
-            continue
         if overlaps(event.start, event.end, ev.start, ev.end):
-            if ev.room_id == event.room_id:
-                errors.append("Room already booked at that time")
+            if ev.room_id == event.room_id and not same_lecture(ev):
+                # Other combined lectures in the room count once too
+                room_bookings.add(ev.id if lab_room else (ev.course_id, ev.start))
             if ev.group_id == event.group_id:
                 errors.append("Group already has a class at that time")
-            if ev.lecturer_id == event.lecturer_id:
+            if ev.lecturer_id == event.lecturer_id and not same_lecture(ev):
                 errors.append("Lecturer already teaching at that time")
+    # Lab pools host several sessions at once
+    if len(room_bookings) >= ((event.room.concurrent_sessions if event.room else None) or 1):
+        errors.append("Room already booked at that time")
 
     return list(sorted(set(errors)))
 
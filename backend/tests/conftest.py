@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings  # noqa: E402
+from app.database import Base, get_db  # noqa: E402
+import app.models  # noqa: E402,F401  (registers the tables on Base.metadata)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A SQLite file with the application schema; a file (not :memory:) so background threads get their own
+    # connections to the same data
+    engine = create_engine(f"sqlite:///{tmp_path / 'timetable.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    # The API on the test database, with a fresh run registry and generations inside the API process
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routers import timetable
+    from app.services.progress import ProgressService
+
+    def test_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(settings, "solver_worker", "off")
+    monkeypatch.setattr(timetable, "SessionLocal", session_factory)
+    monkeypatch.setattr(timetable, "progress_service", ProgressService())
+    app.dependency_overrides[get_db] = test_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture(autouse=True)
+def quick_solver(monkeypatch, tmp_path):
+    # Small instances: short budgets and a single search worker keep solves fast and repeatable
+    monkeypatch.setattr(settings, "solver_time_limit", 10.0)
+    monkeypatch.setattr(settings, "solver_feasibility_time_limit", 10.0)
+    monkeypatch.setattr(settings, "solver_stage_time_limit", 2.0)
+    monkeypatch.setattr(settings, "solver_workers", 1)
+    monkeypatch.setattr(settings, "solver_engine", "monolithic")
+    monkeypatch.setattr(settings, "solver_day_executor", "threads")
+    monkeypatch.setattr(settings, "solver_dump_dir", str(tmp_path / "dumps"))
+    monkeypatch.setattr(settings, "solver_preset_path", str(tmp_path / "solver_preset.json"))
+
+
+@pytest.fixture
+def faculty(db):
+    """Two departments with two cohorts each (three lecture courses per cohort, one with a lab), lecture rooms
+    of several sizes and one lab pool; returns the created rows by kind."""
+    from app import crud, schemas
+
+    rooms = [crud.create_room(db, schemas.RoomCreate(name=f"R{seats}", capacity=seats, furniture_type="LECTURE",
+                                                     equipment=["PROJECTOR"]))
+             for seats in (40, 60, 80, 120, 200)]
+    rooms.append(crud.create_room(db, schemas.RoomCreate(name="LAB1", capacity=60, furniture_type="LAB",
+                                                         concurrent_sessions=2)))
+    groups, lecturers, courses = [], [], []
+    for d, dept in enumerate(("CSE", "EEE")):
+        dept_lecturers = [crud.create_lecturer(db, schemas.LecturerCreate(name=f"{dept}-L{k}", department=dept))
+                          for k in range(3)]
+        lecturers += dept_lecturers
+        for y, year in enumerate((3, 4)):
+            group = crud.create_group(db, schemas.StudentGroupCreate(name=f"{dept}-{year}", size=50 + 20 * (d + y),
+                                                                     year=year, department=dept))
+            groups.append(group)
+            for k in range(3):
+                courses.append(crud.create_course(db, schemas.CourseCreate(
+                    code=f"{dept} {year}00{k}", name=f"{dept} course {year}{k}", department=dept, weekly_hours=2,
+                    has_lab=k == 0, lab_weekly_sessions=1 if k == 0 else 0, lab_session_minutes=120,
+                    group_ids=[group.id], lecturer_ids=[dept_lecturers[k].id])))
+    return {"rooms": rooms, "groups": groups, "lecturers": lecturers, "courses": courses}
@@ -0,0 +1,36 @@
+import pytest
+
+from app import crud, models, schemas
+from app.services.capacity import InfeasibleInstanceError, analyze_capacity
+from app.solver import generate_timetable, prepare_input
+
+
+def test_feasible_faculty_has_no_findings(client, faculty):
+    assert client.get("/api/timetable/analysis/capacity").json() == {"feasible": True, "findings": []}
+
+
+def test_overbooked_lecturer_is_reported_and_generation_refused(client, db, faculty):
+    # CSE-L0 teaches two 2-hour courses but is only available for one hour a week
+    lecturer = faculty["lecturers"][0]
+    lecturer.availability = {"Mon": [["08:00", "09:00"]]}
+    db.commit()
+
+    findings = analyze_capacity(prepare_input(db))
+    assert [(f["kind"], f["lecturer_id"], f["supply_minutes"]) for f in findings if f["kind"] == "lecturer"] == \
+        [("lecturer", lecturer.id, 60)]
+
+    resp = client.post("/api/timetable/generate", json={"version_name": "refused"})
+    assert resp.status_code == 422
+    assert any(f["kind"] == "lecturer" for f in resp.json()["detail"]["findings"])
+    assert db.query(models.TimetableEvent).count() == 0
+
+
+def test_session_without_a_room_is_refused_before_solving(db, faculty):
+    group = faculty["groups"][0]
+    crud.create_course(db, schemas.CourseCreate(code="CSE 3999", name="Clean room", weekly_hours=1,
+                                                requirements={"furniture_type": "CLEANROOM"},
+                                                group_ids=[group.id], lecturer_ids=[faculty["lecturers"][1].id]))
+    with pytest.raises(InfeasibleInstanceError) as exc:
+        generate_timetable(db, crud.create_version(db, "refused"))
+    sessions = [f for f in exc.value.findings if f["kind"] == "session"]
+    assert len(sessions) == 1 and "CSE 3999" in sessions[0]["message"]
@@ -0,0 +1,36 @@
+from itertools import combinations
+
+from app import crud
+from app.solver import generate_timetable, prepare_input
+from app.solver_input import conflict_cliques
+from app.utils import check_conflicts
+
+
+def test_pairwise_conflicts_merge_into_one_clique():
+    # Three sessions sharing a resource pairwise (e.g. two groups and their common lecturer) form a triangle
+    assert conflict_cliques([[0, 1], [1, 2], [0, 2]]) == [[0, 1, 2]]
+
+
+def test_subsumed_sets_are_dropped_and_disjoint_sets_kept():
+    cliques = conflict_cliques([[0, 1, 2], [1, 2], [3, 4], [5]])
+    assert sorted(cliques) == [[0, 1, 2], [3, 4]]
+
+
+def test_cliques_cover_every_resource_of_the_faculty(db, faculty):
+    inp = prepare_input(db)
+    conflicts = {pair for members in inp.resource_sessions() for pair in combinations(sorted(members), 2)}
+    covered = {pair for clique in inp.cliques for pair in combinations(clique, 2)}
+    # Every pair that shares a resource sits in some clique, and every clique only joins conflicting sessions
+    assert conflicts == covered
+    assert len(inp.cliques) <= len(inp.resource_sessions())
+
+
+def test_generated_timetable_has_no_double_bookings(db, faculty):
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+    assert events
+    # Labs do not block lecturer time in the model (check_conflicts counts them), so lecturers are checked
+    # over lectures only
+    assert [msg for ev in events for msg in check_conflicts(db, ev) if not msg.startswith("Lecturer")] == []
+    lectures = [ev for ev in events if ev.room.furniture_type != "LAB"]
+    assert not [(a.id, b.id) for a, b in combinations(lectures, 2)
+                if a.lecturer_id == b.lecturer_id and a.day == b.day and a.start < b.end and b.start < a.end]
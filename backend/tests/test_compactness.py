@@ -0,0 +1,39 @@
+from app import crud, schemas
+from app.config import settings
+from app.solver import generate_timetable
+
+# Start positions of a day on the default grid; 13:00 is lunch and not a position
+POSITIONS = [8, 9, 10, 11, 12, 14, 15, 16]
+
+
+def _seed(db, lectures, availability):
+    crud.create_room(db, schemas.RoomCreate(name="R100", capacity=100, furniture_type="LECTURE"))
+    group = crud.create_group(db, schemas.StudentGroupCreate(name="CSE-3", size=50, year=3, department="CSE"))
+    lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="L0", availability=availability))
+    for k in range(lectures):
+        crud.create_course(db, schemas.CourseCreate(code=f"CSE 300{k}", name=f"Course {k}", weekly_hours=1,
+                                                    group_ids=[group.id], lecturer_ids=[lecturer.id]))
+
+
+def _generate(db, monkeypatch):
+    monkeypatch.setattr(settings, "solver_stages", ["compactness"])
+    version = crud.create_version(db, "v1")
+    events = generate_timetable(db, version)
+    return events, version.metrics["stages"][-1]
+
+
+def test_lectures_of_a_day_have_no_gaps(db, monkeypatch):
+    _seed(db, 3, {"Mon": [["08:00", "17:00"]]})
+    events, stage = _generate(db, monkeypatch)
+
+    assert (stage["stage"], stage["objective"]) == ("compactness", 0)
+    positions = sorted(POSITIONS.index(e.start.hour) for e in events)
+    assert positions == list(range(positions[0], positions[0] + 3))
+
+
+def test_lunch_is_not_a_gap(db, monkeypatch):
+    _seed(db, 2, {"Mon": [["12:00", "13:00"], ["14:00", "15:00"]]})
+    events, stage = _generate(db, monkeypatch)
+
+    assert sorted(e.start.hour for e in events) == [12, 14]
+    assert stage["objective"] == 0
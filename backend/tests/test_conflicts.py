@@ -0,0 +1,38 @@
+from datetime import time
+
+from app import crud, models, schemas
+from app.utils import check_conflicts
+
+
+def _combined_lecture(db):
+    hall = crud.create_room(db, schemas.RoomCreate(name="HALL", capacity=200, furniture_type="LECTURE"))
+    groups = [crud.create_group(db, schemas.StudentGroupCreate(name=name, size=80, year=3, department=name[:3]))
+              for name in ("CSE-3", "EEE-3")]
+    lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="L0"))
+    course = crud.create_course(db, schemas.CourseCreate(code="MAT 3000", name="Maths", weekly_hours=1,
+                                                         combined_lecture=True, group_ids=[g.id for g in groups],
+                                                         lecturer_ids=[lecturer.id]))
+    version = crud.create_version(db, "v1")
+    events = [models.TimetableEvent(course_id=course.id, room_id=hall.id, group_id=g.id, lecturer_id=lecturer.id,
+                                    day="Mon", start=time(9), end=time(10), version_id=version.id) for g in groups]
+    db.add_all(events)
+    db.commit()
+    return hall, lecturer, version, events
+
+
+def test_events_of_a_combined_lecture_are_one_booking(db):
+    _, _, _, events = _combined_lecture(db)
+    for ev in events:
+        assert check_conflicts(db, ev) == []
+
+
+def test_another_lecture_in_the_same_room_is_a_double_booking(db):
+    hall, lecturer, version, _ = _combined_lecture(db)
+    group = crud.create_group(db, schemas.StudentGroupCreate(name="MEC-3", size=30, year=3, department="MEC"))
+    course = crud.create_course(db, schemas.CourseCreate(code="MEC 3001", name="Statics", weekly_hours=1,
+                                                         group_ids=[group.id], lecturer_ids=[lecturer.id]))
+    ev = models.TimetableEvent(course_id=course.id, room_id=hall.id, group_id=group.id, lecturer_id=lecturer.id,
+                               day="Mon", start=time(9), end=time(10), version_id=version.id)
+    db.add(ev)
+    db.flush()
+    assert check_conflicts(db, ev) == ["Lecturer already teaching at that time", "Room already booked at that time"]
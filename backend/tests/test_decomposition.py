@@ -0,0 +1,75 @@
+from collections import Counter
+
+import pytest
+
+from app.config import settings
+from app.services.decomposition import solve_decomposed
+from app.solver import SolveCancelled, prepare_input, solver_parameters
+
+
+class Recorder:
+    """Progress target that records updates and carries a fixed stop request."""
+
+    def __init__(self, stop_request=None):
+        self.stop_request = stop_request
+        self.updates = []
+        self.solvers = []
+
+    def publish(self, update):
+        self.updates.append(update)
+
+    def attach(self, solver):
+        self.solvers.append(solver)
+
+
+def _check_complete(inp, solution):
+    placed = Counter(si for si, _, _ in solution)
+    assert sorted(placed) == list(range(len(inp.sessions))) and set(placed.values()) == {1}
+
+
+def test_decomposed_solve_places_every_session_and_reports_each_phase(db, faculty):
+    inp = prepare_input(db)
+    progress = Recorder()
+    solution, stats = solve_decomposed(inp, solver_parameters(), progress)
+
+    _check_complete(inp, solution)
+    assert [u["stage"] for u in progress.updates if u["type"] == "stage"][:2] == ["days", "slots"]
+    solutions = [u for u in progress.updates if u["type"] == "solution"]
+    assert solutions[0]["stage"] == "days"
+    assert solutions[-1]["placed"] == len(inp.sessions)
+    assert any(st["stage"].endswith("/room_fit") for st in stats)
+
+
+def test_accept_finishes_with_feasible_placements_only(db, faculty):
+    inp = prepare_input(db)
+    solution, stats = solve_decomposed(inp, solver_parameters(), Recorder("accept"))
+
+    _check_complete(inp, solution)
+    assert {st["stage"].split("/")[-1] for st in stats} == {"days", "feasibility"}
+
+
+def test_cancel_stops_the_solve(db, faculty):
+    with pytest.raises(SolveCancelled):
+        solve_decomposed(prepare_input(db), solver_parameters(), Recorder("cancel"))
+
+
+def test_decomposed_run_reports_solutions(client, faculty, monkeypatch):
+    monkeypatch.setattr(settings, "solver_engine", "decomposed")
+    run = client.post("/api/timetable/runs", json={"version_name": "decomposed"}).json()
+    summary = client.get(f"/api/timetable/runs/{run['run_id']}").json()
+
+    assert summary["status"] == "done"
+    assert summary["latest_solution"]["placed"] > 0
+
+
+def test_day_solve_processes_use_the_parents_runtime_settings(db, faculty, monkeypatch):
+    # Spawned day solves start from the environment's settings; a value changed at runtime must reach them
+    monkeypatch.setattr(settings, "solver_day_executor", "processes")
+    monkeypatch.setattr(settings, "solver_day_workers", 2)
+    monkeypatch.setattr(settings, "solver_stages", ["room_fit"])
+    inp = prepare_input(db)
+    solution, stats = solve_decomposed(inp, solver_parameters())
+
+    _check_complete(inp, solution)
+    day_stages = {st["stage"].split("/")[1] for st in stats if "/" in st["stage"]}
+    assert day_stages == {"feasibility", "room_fit"}
@@ -0,0 +1,27 @@
+from app.solver import prepare_input
+from app.services.domains import profile_domains
+
+
+def test_domains_rank_the_tightest_sessions_first(client, db, faculty):
+    # CSE-L1 can only teach on Monday mornings: their lectures have the smallest domains
+    lecturer = faculty["lecturers"][1]
+    lecturer.availability = {"Mon": [["08:00", "12:00"]]}
+    db.commit()
+
+    report = client.get("/api/timetable/analysis/domains", params={"limit": 4}).json()
+    assert len(report["sessions"]) == 4
+    sizes = [s["candidates"] for s in report["sessions"]]
+    assert sizes == sorted(sizes)
+    assert {s["lecturer_id"] for s in report["sessions"][:2]} == {lecturer.id}
+    assert report["unplaceable"] == 0
+
+
+def test_lab_pool_offers_a_slot_per_concurrent_session(db, faculty):
+    inp = prepare_input(db)
+    report = profile_domains(inp)
+    rooms = {r["room"]: r for r in report["rooms"]}
+    assert rooms["LAB1"]["slots_available"] == 2 * rooms["R40"]["slots_available"]
+    # Only the four lab sessions can use the lab, and no lab session can use a lecture room
+    assert rooms["LAB1"]["sessions"] == 4
+    assert all(s["rooms"] == 1 for s in report["sessions"] if s["is_lab"])
+    assert report["candidates_total"] == sum(len(c) for c in inp.candidates)
@@ -0,0 +1,48 @@
+from app import crud, schemas
+from app.solver import generate_timetable
+from app.solver_input import group_atoms
+
+
+def _group(name, department="CSE", year=3, **levels):
+    return dict({"name": name, "department": department, "year": year, "lecture_group": None, "subgroup": None,
+                 "track": None}, **levels)
+
+
+def _shares(atoms, a, b):
+    return bool((atoms[a] & atoms[b]).any())
+
+
+def test_subgroups_share_students_with_their_cohort_only():
+    groups = [_group("CSE-3"), _group("CSE-3A", subgroup="A"), _group("CSE-3B", subgroup="B"),
+              _group("CSE-3 ET", track="ET"), _group("EEE-3", department="EEE")]
+    atoms = group_atoms(groups)
+
+    assert _shares(atoms, 0, 1) and _shares(atoms, 0, 2) and _shares(atoms, 0, 3)
+    assert not _shares(atoms, 1, 2)
+    # Track ET takes students from both subgroups
+    assert _shares(atoms, 3, 1) and _shares(atoms, 3, 2)
+    assert not any(_shares(atoms, 4, g) for g in range(4))
+
+
+def test_subgroup_labs_run_side_by_side_but_not_during_the_cohort_lecture(db):
+    # The lab pool is open for one two-hour window, so both subgroup labs must share it; the lecturer is only
+    # in on Monday morning, so the cohort lecture has to avoid that window
+    crud.create_room(db, schemas.RoomCreate(name="HALL", capacity=100, furniture_type="LECTURE"))
+    crud.create_room(db, schemas.RoomCreate(name="POOL", capacity=40, furniture_type="LAB", concurrent_sessions=2,
+                                            availability={"Mon": [["08:00", "10:00"]]}))
+    cohort = crud.create_group(db, schemas.StudentGroupCreate(name="CSE-3", size=60, year=3, department="CSE"))
+    lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="L0", availability={"Mon": [["08:00", "12:00"]]}))
+    crud.create_course(db, schemas.CourseCreate(code="CSE 3001", name="Lecture", weekly_hours=2,
+                                                group_ids=[cohort.id], lecturer_ids=[lecturer.id]))
+    for k, sub in enumerate("AB"):
+        g = crud.create_group(db, schemas.StudentGroupCreate(name=f"CSE-3{sub}", size=30, year=3, department="CSE",
+                                                             subgroup=sub))
+        crud.create_course(db, schemas.CourseCreate(code=f"CSE 300{k + 2}", name=f"Lab {sub}", weekly_hours=0,
+                                                    has_lab=True, lab_weekly_sessions=1, lab_session_minutes=120,
+                                                    group_ids=[g.id], lecturer_ids=[lecturer.id]))
+
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+    labs = [e for e in events if e.room.name == "POOL"]
+    lectures = [e for e in events if e.room.name == "HALL"]
+    assert [(e.day, str(e.start)) for e in labs] == [("Mon", "08:00:00")] * 2
+    assert len(lectures) == 2 and all(e.start >= labs[0].end for e in lectures)
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import models, schemas
+from app.config import settings
+from app.services import job_queue
+from app.services.solver_worker import WarmState
+
+
+def _enqueue(db, name="job", fingerprint=None):
+    return job_queue.enqueue(db, schemas.GenerateRequest(version_name=name), fingerprint)
+
+
+def _expire(db, job):
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+
+
+def test_claim_leases_the_oldest_queued_job_once(db):
+    first, second = _enqueue(db, "a"), _enqueue(db, "b")
+
+    claimed = job_queue.claim(db, "w1")
+    assert claimed.id == first.id
+    assert (claimed.status, claimed.lease_owner, claimed.attempts) == ("running", "w1", 1)
+    assert claimed.lease_expires_at > datetime.utcnow()
+    assert job_queue.claim(db, "w2").id == second.id
+    assert job_queue.claim(db, "w3") is None
+
+
+def test_heartbeat_extends_the_lease_and_returns_the_stop_request(db):
+    _enqueue(db)
+    job = job_queue.claim(db, "w1")
+    _expire(db, job)
+
+    assert job_queue.heartbeat(db, job.id, "w1", {"type": "solution", "objective": 3}) is None
+    db.refresh(job)
+    assert job.lease_expires_at > datetime.utcnow() and job.progress["objective"] == 3
+    job_queue.request_stop(db, job.id, "accept")
+    assert job_queue.heartbeat(db, job.id, "w1") == "accept"
+    with pytest.raises(job_queue.LeaseLost):
+        job_queue.heartbeat(db, job.id, "w2")
+
+
+def test_expired_job_is_requeued_and_run_again(db, session_factory, faculty):
+    job = _enqueue(db)
+    job_queue.claim(db, "dead")
+    _expire(db, job)
+
+    assert job_queue.work(session_factory, owner="w1", once=True) == 1
+    db.refresh(job)
+    assert (job.status, job.attempts, job.lease_owner) == ("done", 2, None)
+    assert job.version_id is not None
+    assert db.query(models.TimetableEvent).filter(models.TimetableEvent.version_id == job.version_id).count() > 0
+    # The worker that lost the lease can no longer record an outcome
+    assert job_queue.finish(db, job.id, "dead", "done") is False
+
+
+def test_requeue_drops_an_accept_meant_for_the_lost_attempt(db, session_factory, faculty):
+    job = _enqueue(db)
+    job_queue.claim(db, "dead")
+    job_queue.request_stop(db, job.id, "accept")
+    _expire(db, job)
+
+    job_queue.requeue_expired(db)
+    db.refresh(job)
+    assert (job.status, job.stop_request) == ("queued", None)
+    job_queue.work(session_factory, owner="w1", once=True)
+    db.refresh(job)
+    assert job.status == "done" and job.version_id is not None
+
+
+def test_cancel_survives_the_requeue(db):
+    job = _enqueue(db)
+    job_queue.claim(db, "dead")
+    job_queue.request_stop(db, job.id, "cancel")
+    _expire(db, job)
+
+    job_queue.requeue_expired(db)
+    db.refresh(job)
+    assert job.status == "cancelled"
+
+
+def test_job_fails_after_its_last_attempt_expires(db, monkeypatch):
+    monkeypatch.setattr(settings, "solver_job_max_attempts", 1)
+    job = _enqueue(db)
+    job_queue.claim(db, "dead")
+    _expire(db, job)
+
+    job_queue.requeue_expired(db)
+    db.refresh(job)
+    assert job.status == "failed" and "1 attempts" in job.error
+
+
+def test_enqueue_returns_the_active_job_with_the_same_fingerprint(db):
+    first = _enqueue(db, "a", fingerprint="f1")
+    assert _enqueue(db, "b", fingerprint="f1").id == first.id
+    job_queue.request_stop(db, first.id, "cancel")
+    assert _enqueue(db, "c", fingerprint="f1").id != first.id
+
+
+def test_accept_is_refused_until_the_job_runs(client, db):
+    job = _enqueue(db)
+
+    assert client.post(f"/api/timetable/jobs/{job.id}/accept").status_code == 409
+    db.refresh(job)
+    assert (job.status, job.stop_request) == ("queued", None)
+    assert client.post(f"/api/timetable/jobs/{job.id}/cancel").json()["status"] == "cancelled"
+    assert client.post(f"/api/timetable/jobs/{job.id}/cancel").status_code == 409
+
+
+def test_worker_that_lost_the_lease_discards_its_version(db, session_factory, faculty):
+    job = _enqueue(db)
+    job_queue.claim(db, "w1")
+    db.expunge(job)
+    # Another worker took the job over while w1 was still solving
+    taken = db.query(models.SolveJob).get(job.id)
+    taken.lease_owner = "w2"
+    db.commit()
+
+    outcome = job_queue.run_job(job, "w1", session_factory, WarmState())
+    assert outcome["status"] == "done"
+    db.refresh(taken)
+    assert (taken.status, taken.lease_owner, taken.version_id) == ("running", "w2", None)
+    assert db.query(models.Version).count() == 0
+    assert db.query(models.TimetableEvent).count() == 0
@@ -0,0 +1,70 @@
+import pytest
+
+from app import crud, schemas
+from app.services.capacity import InfeasibleInstanceError
+from app.solver import generate_timetable
+from app.utils import check_conflicts
+
+
+def _seed(db, group_size):
+    crud.create_room(db, schemas.RoomCreate(name="HALL", capacity=300, furniture_type="LECTURE"))
+    crud.create_room(db, schemas.RoomCreate(name="LAB40", capacity=40, furniture_type="LAB", concurrent_sessions=2))
+    crud.create_room(db, schemas.RoomCreate(name="LAB60", capacity=60, furniture_type="LAB"))
+    group = crud.create_group(db, schemas.StudentGroupCreate(name="CSE-3", size=group_size, year=3, department="CSE"))
+    lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="L0", department="CSE"))
+    crud.create_course(db, schemas.CourseCreate(code="CSE 3001", name="Circuits", weekly_hours=1, has_lab=True,
+                                                lab_weekly_sessions=2, lab_session_minutes=120,
+                                                group_ids=[group.id], lecturer_ids=[lecturer.id]))
+
+
+def _labs(events):
+    return [e for e in events if e.room.furniture_type == "LAB"]
+
+
+def test_group_larger_than_every_lab_takes_the_largest_lab(db):
+    _seed(db, 250)
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+
+    assert [e.room.name for e in _labs(events)] == ["LAB60", "LAB60"]
+    for e in events:
+        assert check_conflicts(db, e) == []
+
+
+def test_lab_group_only_gets_lab_rooms_that_seat_it(db):
+    # 45 students fit the lecture hall but not LAB40
+    _seed(db, 45)
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+
+    assert [e.room.name for e in _labs(events)] == ["LAB60", "LAB60"]
+    for e in events:
+        assert check_conflicts(db, e) == []
+
+
+def _pool_with_one_window(db, groups):
+    # One lab pool for two sessions at a time, open for a single two-hour window
+    crud.create_room(db, schemas.RoomCreate(name="HALL", capacity=300, furniture_type="LECTURE"))
+    crud.create_room(db, schemas.RoomCreate(name="POOL", capacity=60, furniture_type="LAB", concurrent_sessions=2,
+                                            availability={"Mon": [["08:00", "10:00"]]}))
+    for k in range(groups):
+        group = crud.create_group(db, schemas.StudentGroupCreate(name=f"CSE-{k}", size=30, year=k + 1,
+                                                                 department="CSE"))
+        lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name=f"L{k}", department="CSE"))
+        crud.create_course(db, schemas.CourseCreate(code=f"CSE {k + 1}001", name=f"Lab {k}", weekly_hours=0,
+                                                    has_lab=True, lab_weekly_sessions=1, lab_session_minutes=120,
+                                                    group_ids=[group.id], lecturer_ids=[lecturer.id]))
+
+
+def test_lab_pool_hosts_its_concurrent_sessions_at_once(db):
+    _pool_with_one_window(db, 2)
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+
+    assert sorted((e.room.name, e.day, str(e.start)) for e in events) == [("POOL", "Mon", "08:00:00")] * 2
+    for e in events:
+        assert check_conflicts(db, e) == []
+
+
+def test_lab_pool_refuses_more_sessions_than_it_hosts(db):
+    _pool_with_one_window(db, 3)
+    with pytest.raises(InfeasibleInstanceError) as exc:
+        generate_timetable(db, crud.create_version(db, "v1"))
+    assert [f["kind"] for f in exc.value.findings] == ["room_class"]
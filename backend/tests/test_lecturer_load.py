@@ -0,0 +1,54 @@
+from collections import Counter
+
+import pytest
+
+from app import crud, schemas
+from app.config import settings
+from app.services.capacity import InfeasibleInstanceError
+from app.solver import generate_timetable
+
+
+def _seed(db, availability=None):
+    # One lecturer allowed 60 lecture minutes a day teaching four one-hour lectures a week
+    crud.create_room(db, schemas.RoomCreate(name="R100", capacity=100, furniture_type="LECTURE"))
+    lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="L0", max_daily_load=60, availability=availability))
+    for k in range(2):
+        group = crud.create_group(db, schemas.StudentGroupCreate(name=f"CSE-{k + 3}", size=50, year=k + 3,
+                                                                 department="CSE"))
+        crud.create_course(db, schemas.CourseCreate(code=f"CSE {k + 3}001", name=f"Course {k}", weekly_hours=2,
+                                                    group_ids=[group.id], lecturer_ids=[lecturer.id]))
+
+
+def test_hard_daily_load_spreads_lectures_over_the_week(db):
+    _seed(db)
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+    assert len(events) == 4
+    assert set(Counter(e.day for e in events).values()) == {1}
+
+
+def test_hard_daily_load_refuses_a_week_too_short_for_it(db):
+    _seed(db, availability={"Mon": [["08:00", "17:00"]], "Tue": [["08:00", "17:00"]]})
+    with pytest.raises(InfeasibleInstanceError) as exc:
+        generate_timetable(db, crud.create_version(db, "v1"))
+    assert [f["kind"] for f in exc.value.findings] == ["lecturer"]
+    assert "at most 60 min/day" in exc.value.findings[0]["message"]
+
+
+def test_soft_daily_load_minimises_the_overload(db, monkeypatch):
+    monkeypatch.setattr(settings, "solver_lecturer_load", "soft")
+    monkeypatch.setattr(settings, "solver_stages", ["lecturer_load"])
+    _seed(db, availability={"Mon": [["08:00", "17:00"]], "Tue": [["08:00", "17:00"]]})
+    version = crud.create_version(db, "v1")
+    events = generate_timetable(db, version)
+
+    assert sorted(Counter(e.day for e in events).values()) == [2, 2]
+    # Two days of 120 lecture minutes against a 60-minute allowance
+    stage = version.metrics["stages"][-1]
+    assert (stage["stage"], stage["objective"]) == ("lecturer_load", 120)
+
+
+def test_load_limit_off_ignores_max_daily_load(db, monkeypatch):
+    monkeypatch.setattr(settings, "solver_lecturer_load", "off")
+    _seed(db, availability={"Mon": [["08:00", "17:00"]]})
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+    assert {e.day for e in events} == {"Mon"}
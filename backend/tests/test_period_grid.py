@@ -0,0 +1,41 @@
+from datetime import time
+
+import pytest
+
+from app import crud
+from app.config import settings
+from app.solver import generate_timetable
+from app.solver_input import build_time_grid
+
+PERIODS = [("08:00", "09:30"), ("09:45", "11:15"), ("11:15", "12:45"), ("14:00", "15:30")]
+
+
+@pytest.fixture
+def periods(monkeypatch):
+    monkeypatch.setattr(settings, "periods", PERIODS)
+
+
+def _starts(grid, mask):
+    return [str(st)[:5] for (d, st, _), ok in zip(grid.slots, mask) if ok and d == "Mon"]
+
+
+def test_period_table_is_the_grid(periods):
+    grid = build_time_grid()
+    assert len(grid) == len(settings.week_days) * len(PERIODS)
+    assert _starts(grid, grid.fits(90)) == ["08:00", "09:45", "11:15", "14:00"]
+
+
+def test_long_sessions_run_across_short_breaks_only(periods):
+    grid = build_time_grid()
+    assert grid.span_for(120) == 2
+    # 08:00 and 09:45 are 15 minutes apart; 11:15 to 14:00 is lunch
+    assert _starts(grid, grid.fits(120)) == ["08:00", "09:45"]
+    assert grid.end_time(0, 120) == time(10, 0)
+
+
+def test_generated_events_start_on_periods(db, faculty, periods):
+    events = generate_timetable(db, crud.create_version(db, "periods"))
+    period_starts = {time.fromisoformat(st) for st, _ in PERIODS}
+    assert events and all(e.start in period_starts for e in events)
+    labs = [e for e in events if e.room.furniture_type == "LAB"]
+    assert labs and all(e.start in (time(8), time(9, 45)) for e in labs)
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+GENERATE = "/api/timetable/generate"
+
+
+def _generate(client, name, **fields):
+    resp = client.post(GENERATE, json=dict(fields, version_name=name))
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _placement(ev):
+    return ev["course_id"], ev["group_id"], ev["room_id"], ev["day"], ev["start"], ev["end"]
+
+
+def _shift(hhmmss, hours):
+    return (datetime.strptime(hhmmss, "%H:%M:%S") + timedelta(hours=hours)).strftime("%H:%M:%S")
+
+
+def test_a_moved_and_pinned_event_keeps_its_place(client, faculty):
+    first = _generate(client, "v1")
+    ev = next(e for e in first if e["room_id"] != faculty["rooms"][-1].id)
+    # Move it somewhere the solver is unlikely to choose on its own: the largest hall late on Friday
+    hall = faculty["rooms"][4].id
+    length = (datetime.strptime(ev["end"], "%H:%M:%S") - datetime.strptime(ev["start"], "%H:%M:%S")).seconds // 3600
+    for start in ("15:00:00", "14:00:00", "13:00:00"):
+        move = {"day": "Fri", "start": start, "end": _shift(start, length), "room_id": hall}
+        if client.post(f"/api/timetable/events/{ev['id']}/move", json=move).status_code == 200:
+            break
+    else:
+        raise AssertionError("no free late slot on Friday")
+    moved = client.post(f"/api/timetable/events/{ev['id']}/pin").json()
+    assert moved["pinned"] and moved["day"] == "Fri"
+
+    second = _generate(client, "v2")
+    kept = [e for e in second if e["pinned"]]
+    assert [_placement(e) for e in kept] == [_placement(moved)]
+    assert len(second) == len(first)
+
+
+def test_pin_event_ids_keep_events_for_one_run_only(client, faculty):
+    first = _generate(client, "v1")
+    chosen = first[:2]
+    second = _generate(client, "v2", base_version_id=chosen[0]["version_id"], pin_event_ids=[e["id"] for e in chosen])
+    placements = {_placement(e) for e in second}
+    assert all(_placement(e) in placements for e in chosen)
+    # Run-only pins are kept in place but not marked as pinned
+    assert not any(e["pinned"] for e in second)
+
+
+def test_unknown_pinned_event_is_rejected(client, faculty):
+    first = _generate(client, "v1")
+    resp = client.post(GENERATE, json={"version_name": "v2", "base_version_id": first[0]["version_id"],
+                                       "pin_event_ids": [max(e["id"] for e in first) + 1]})
+    assert resp.status_code == 400
@@ -0,0 +1,54 @@
+from collections import Counter
+
+from app import crud, schemas
+from app.solver import generate_timetable
+
+
+def _seed(db):
+    crud.create_room(db, schemas.RoomCreate(name="HALL", capacity=200, furniture_type="LECTURE"))
+    crud.create_room(db, schemas.RoomCreate(name="R100", capacity=100, furniture_type="LECTURE"))
+    cse = crud.create_group(db, schemas.StudentGroupCreate(name="CSE-3", size=90, year=3, department="CSE"))
+    eee = crud.create_group(db, schemas.StudentGroupCreate(name="EEE-3", size=80, year=3, department="EEE"))
+    lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="L0", department="MAT"))
+    crud.create_course(db, schemas.CourseCreate(code="MAT 3000", name="Maths", weekly_hours=3, combined_lecture=True,
+                                                group_ids=[cse.id, eee.id], lecturer_ids=[lecturer.id]))
+    return cse, eee
+
+
+def _lectures(events):
+    return Counter(e.group.name for e in events)
+
+
+def test_pinning_one_group_of_a_combined_lecture_keeps_the_others(db):
+    cse, _ = _seed(db)
+    first = generate_timetable(db, crud.create_version(db, "v1"))
+    assert _lectures(first) == {"CSE-3": 3, "EEE-3": 3}
+
+    pinned = next(e for e in first if e.group_id == cse.id)
+    second = generate_timetable(db, crud.create_version(db, "v2"), base_version_id=first[0].version_id,
+                                pin_event_ids=[pinned.id])
+    assert _lectures(second) == {"CSE-3": 3, "EEE-3": 3}
+    assert any((e.group_id, e.day, e.start, e.room_id) == (cse.id, pinned.day, pinned.start, pinned.room_id)
+               for e in second)
+
+
+def test_pinning_every_group_of_a_combined_lecture_uses_up_the_session(db):
+    _seed(db)
+    first = generate_timetable(db, crud.create_version(db, "v1"))
+    lecture = (first[0].day, first[0].start)
+    siblings = [e.id for e in first if (e.day, e.start) == lecture]
+    assert len(siblings) == 2
+
+    second = generate_timetable(db, crud.create_version(db, "v2"), base_version_id=first[0].version_id,
+                                pin_event_ids=siblings)
+    assert _lectures(second) == {"CSE-3": 3, "EEE-3": 3}
+
+
+def test_combined_lecture_seats_every_group_together(db):
+    _seed(db)
+    events = generate_timetable(db, crud.create_version(db, "v1"))
+
+    by_slot = Counter((e.day, e.start, e.room.name) for e in events)
+    # 170 students only fit the hall; each lecture is one booking for both groups
+    assert sorted(by_slot.values()) == [2, 2, 2]
+    assert {room for _, _, room in by_slot} == {"HALL"}
@@ -0,0 +1,91 @@
+import json
+import threading
+
+from app import models, schemas
+from app.services.progress import SolveRun
+from app.services.solver_worker import run_generation
+
+
+def _sse_events(client, run_id):
+    events = []
+    with client.stream("GET", f"/api/timetable/runs/{run_id}/events") as response:
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+def test_finished_update_is_there_as_soon_as_the_run_is_finished():
+    # Subscribers read the run between lock releases: whenever the lock is released on a finished run, the
+    # "finished" update must already be the last one
+    run = SolveRun(1, "v")
+    released = []
+
+    class CheckedCondition(threading.Condition):
+        def __exit__(self, *exc):
+            released.append((run.finished, run.updates[-1]["type"] if run.updates else None))
+            return super().__exit__(*exc)
+
+    run._cond = CheckedCondition()
+    run.publish({"type": "stage", "stage": "feasibility"})
+    run.finish("done", version_id=1)
+
+    assert released[-1] == (True, "finished")
+    assert all(last == "finished" for finished, last in released if finished)
+
+
+def test_wait_returns_when_the_run_finishes():
+    run = SolveRun(1, "v")
+    assert run.wait(0.01) is False
+    threading.Timer(0.05, run.finish, args=("done",)).start()
+    assert run.wait(5) is True
+
+
+def test_run_streams_stages_solutions_and_a_final_finished_event(client, faculty):
+    run = client.post("/api/timetable/runs", json={"version_name": "streamed"}).json()
+    events = _sse_events(client, run["run_id"])
+
+    types = [e["type"] for e in events]
+    assert "stage" in types and "solution" in types
+    assert types[-1] == "finished" and events[-1]["status"] == "done"
+    assert [e["seq"] for e in events] == list(range(len(events)))
+    summary = client.get(f"/api/timetable/runs/{run['run_id']}").json()
+    assert summary["latest_solution"] is not None and summary["version_id"] == events[-1]["version_id"]
+
+
+def test_generate_returns_the_events_of_the_finished_run(client, faculty):
+    response = client.post("/api/timetable/generate", json={"version_name": "sync"})
+
+    assert response.status_code == 200
+    assert response.headers["X-Version-Name"] == "sync" and response.headers["X-Joined-Run"] == "0"
+    assert {e["version_id"] for e in response.json()} == {int(response.headers["X-Version-Id"])}
+
+
+def test_accepted_run_saves_the_first_feasible_timetable(session_factory, faculty):
+    run = SolveRun(1, "accepted")
+    run.request_stop(accept=True)
+    run_generation(run, schemas.GenerateRequest(version_name="accepted"), session_factory)
+
+    assert run.status == "done"
+    assert [u["stage"] for u in run.updates if u["type"] == "stage"] == ["feasibility"]
+    db = session_factory()
+    assert db.query(models.TimetableEvent).filter_by(version_id=run.version_id).count() > 0
+    db.close()
+
+
+def test_cancelled_run_leaves_no_version(session_factory, faculty):
+    run = SolveRun(1, "cancelled")
+    run.request_stop(accept=False)
+    run_generation(run, schemas.GenerateRequest(version_name="cancelled"), session_factory)
+
+    assert run.status == "cancelled" and run.version_id is None
+    db = session_factory()
+    assert db.query(models.Version).count() == 0
+    db.close()
+
+
+def test_finished_run_cannot_be_stopped(client, faculty):
+    run = client.post("/api/timetable/runs", json={"version_name": "done"}).json()
+    assert client.get(f"/api/timetable/runs/{run['run_id']}").json()["status"] == "done"
+    assert client.post(f"/api/timetable/runs/{run['run_id']}/accept").status_code == 409
+    assert client.post(f"/api/timetable/runs/{run['run_id']}/cancel").status_code == 409
@@ -0,0 +1,60 @@
+from collections import defaultdict
+from datetime import time
+
+from app import crud, models, schemas
+from app.config import settings
+from app.services.metrics import seat_utilisation
+from app.solver import generate_timetable, prepare_input
+
+
+def _seed(db):
+    for name, seats in (("R30", 30), ("R60", 60), ("R120", 120)):
+        crud.create_room(db, schemas.RoomCreate(name=name, capacity=seats, furniture_type="LECTURE"))
+    groups = {name: crud.create_group(db, schemas.StudentGroupCreate(name=name, size=size, year=3, department=name[:3]))
+              for name, size in (("CSE-3", 90), ("EEE-3", 80), ("MEC-3", 25))}
+    for k, (name, group) in enumerate(groups.items()):
+        lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name=f"L{k}", department=name[:3]))
+        crud.create_course(db, schemas.CourseCreate(code=f"{name[:3]} 300{k}", name=f"Course {k}", weekly_hours=3,
+                                                    group_ids=[group.id], lecturer_ids=[lecturer.id]))
+    return groups
+
+
+def test_every_lecture_fits_its_room(db):
+    _seed(db)
+    version = crud.create_version(db, "fit")
+    events = generate_timetable(db, version)
+
+    audience = defaultdict(int)
+    for e in events:
+        audience[(e.room_id, e.course_id, e.day, e.start)] += e.group.size
+    rooms = {r.id: r for r in crud.get_rooms(db)}
+    assert audience
+    for (room_id, *_), students in audience.items():
+        assert students <= rooms[room_id].capacity, (rooms[room_id].name, students)
+    assert version.metrics["overflow_seat_hours"] == 0
+    assert version.metrics["seat_utilisation"] <= 1
+
+
+def test_overfilled_room_counts_as_overflow(db):
+    groups = _seed(db)
+    inp = prepare_input(db)
+    small = next(r for r in inp.rooms if r["name"] == "R60")
+    course = crud.get_courses(db)[0]
+    event = models.TimetableEvent(course_id=course.id, room_id=small["id"], group_id=groups["CSE-3"].id,
+                                  lecturer_id=course.lecturers[0].id, day="Mon", start=time(9), end=time(10))
+
+    metrics = seat_utilisation(inp, [event])
+    assert metrics["overflow_seat_hours"] == 30
+    assert metrics["overcrowded_bookings"] == 1
+    assert metrics["seat_hours_used"] == 0
+    assert metrics["seat_utilisation"] == 0
+
+
+def test_room_fit_stage_gives_small_groups_the_smallest_room(db, monkeypatch):
+    monkeypatch.setattr(settings, "solver_stages", ["room_fit"])
+    _seed(db)
+    events = generate_timetable(db, crud.create_version(db, "fit"))
+
+    # MEC-3 (25 students) fits all three rooms; CSE-3 and EEE-3 only fit R120
+    assert {e.room.name for e in events if e.group.name == "MEC-3"} == {"R30"}
+    assert {e.room.name for e in events if e.group.name != "MEC-3"} == {"R120"}
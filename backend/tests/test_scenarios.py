@@ -0,0 +1,60 @@
+import pytest
+
+from app.config import settings
+from app.routers import timetable
+from app.services.scenarios import ScenarioService
+
+SCENARIOS = "/api/timetable/scenarios"
+
+
+@pytest.fixture
+def scenarios(client, monkeypatch):
+    # A fresh service whose spawned pool processes read quick solver settings from the environment
+    for name, value in (("SOLVER_WORKERS", "1"), ("SOLVER_STAGES", "room_fit"), ("SOLVER_STAGE_TIME_LIMIT", "2"),
+                        ("SOLVER_TIME_LIMIT", "10")):
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(settings, "scenario_workers", 2)
+    service = ScenarioService()
+    monkeypatch.setattr(timetable, "scenario_service", service)
+    yield service
+    service.shutdown()
+
+
+def _room(faculty, name):
+    return next(r for r in faculty["rooms"] if r.name == name)
+
+
+def test_scenarios_report_moved_events_against_the_base_version(client, faculty, scenarios):
+    base = client.post("/api/timetable/generate", json={"version_name": "base"}).json()
+    # Close the lecture room the base version uses most
+    used = [e["room_id"] for e in base if e["room_id"] != _room(faculty, "LAB1").id]
+    closed = max(set(used), key=used.count)
+    body = {"scenarios": [{"name": "as is"},
+                          {"name": "closed", "overrides": [{"op": "close", "kind": "rooms", "id": closed}]}]}
+    resp = client.post(SCENARIOS, json=body)
+    assert resp.status_code == 200, resp.text
+    result = resp.json()
+
+    assert result["base"]["events"] == len(base)
+    same, moved = result["scenarios"]
+    assert (same["status"], same["moved_events"]) == ("solved", 0)
+    assert moved["status"] == "solved" and moved["moved_events"] >= used.count(closed)
+    events = client.get(f"{SCENARIOS}/{moved['scenario_id']}").json()["events"]
+    assert len(events) == len(base) and closed not in {e["room_id"] for e in events}
+    assert [s["name"] for s in client.get(SCENARIOS).json()] == ["closed", "as is"]
+
+    version = client.post(f"{SCENARIOS}/{moved['scenario_id']}/promote", json={"version_name": "no room"}).json()
+    assert version["name"] == "no room"
+    promoted = client.get("/api/timetable/events", params={"version_id": version["id"]}).json()
+    assert len(promoted) == len(base) and closed not in {e["room_id"] for e in promoted}
+
+
+def test_infeasible_scenario_reports_findings_and_cannot_be_promoted(client, faculty, scenarios):
+    lab = _room(faculty, "LAB1").id
+    body = {"scenarios": [{"name": "no lab", "overrides": [{"op": "close", "kind": "rooms", "id": lab}]}]}
+    result = client.post(SCENARIOS, json=body).json()["scenarios"][0]
+
+    assert (result["status"], result["feasible"]) == ("infeasible", False)
+    assert {f["kind"] for f in result["findings"]} == {"session"}
+    resp = client.post(f"{SCENARIOS}/{result['scenario_id']}/promote", json={"version_name": "x"})
+    assert resp.status_code == 409
@@ -0,0 +1,32 @@
+from app import crud
+from app.solver import generate_timetable
+
+GENERATE = "/api/timetable/generate"
+
+
+def _placement(ev):
+    return ev.course_id, ev.group_id, ev.room_id, ev.lecturer_id, ev.day, ev.start, ev.end
+
+
+def test_scoped_run_keeps_everything_outside_the_scope(db, faculty):
+    base = generate_timetable(db, crud.create_version(db, "v1"))
+    eee3 = {g.id for g in faculty["groups"] if g.name == "EEE-3"}
+
+    version = crud.create_version(db, "EEE-3 only")
+    scoped = generate_timetable(db, version, department="eee", year=3)
+
+    def outside(events):
+        return sorted(_placement(e) for e in events if e.group_id not in eee3)
+
+    assert outside(scoped) == outside(base)
+    assert sum(e.group_id in eee3 for e in scoped) == sum(e.group_id in eee3 for e in base)
+    db.refresh(version)
+    # Only the scope's sessions were solved: three courses of 2 lecture hours plus one lab
+    assert version.metrics["sessions"] == 3 * 2 + 1
+    assert version.metrics["fixed_events"] == len(base) - sum(e.group_id in eee3 for e in base)
+
+
+def test_department_scope_needs_a_base_version(client, faculty):
+    resp = client.post(GENERATE, json={"version_name": "scoped", "department": "CSE"})
+    assert resp.status_code == 400
+    assert "base version" in resp.json()["detail"]
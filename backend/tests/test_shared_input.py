@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from app.config import settings
+from app.services.decomposition import solve_decomposed
+from app.services.shared_input import attach_input, share_input
+from app.solver import build_model, prepare_input, solver_parameters
+
+
+def test_attached_input_matches_the_shared_one(db, faculty, tmp_path):
+    inp = prepare_input(db)
+    with share_input(inp, str(tmp_path)) as shared:
+        assert os.path.dirname(shared.path) == str(tmp_path)
+        attached = attach_input(shared.handle)
+
+        assert attached is not inp
+        assert [s.course_code for s in attached.sessions] == [s.course_code for s in inp.sessions]
+        for name, value in vars(inp).items():
+            if isinstance(value, np.ndarray):
+                assert np.array_equal(getattr(attached, name), value), name
+        assert not attached.room_ok.flags.writeable
+        assert all(np.array_equal(a, b) for a, b in zip(attached.candidates, inp.candidates))
+        assert [list(c) for c in attached.cliques] == inp.cliques
+        assert len(build_model(attached).x) == len(build_model(inp).x)
+    assert not os.path.exists(shared.path)
+
+
+def test_process_day_solves_leave_no_shared_file_behind(db, faculty, monkeypatch):
+    monkeypatch.setattr(settings, "solver_day_executor", "processes")
+    monkeypatch.setattr(settings, "solver_day_workers", 2)
+    shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+    def shared_files():
+        return {f for f in os.listdir(shm) if f.startswith("solver-input-")} if shm else set()
+
+    before = shared_files()
+    solution, _ = solve_decomposed(prepare_input(db), solver_parameters())
+    assert solution is not None
+    assert shared_files() == before
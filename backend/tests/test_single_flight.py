@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from app.routers import timetable
+
+GENERATE = "/api/timetable/generate"
+
+
+@pytest.fixture
+def held(client, monkeypatch):
+    # Runs started by a request wait for `release` before generating, so later requests find them unfinished
+    release = threading.Event()
+    generate = timetable._run_generation
+
+    def held_generation(run, req):
+        release.wait(30)
+        generate(run, req)
+
+    monkeypatch.setattr(timetable, "_run_generation", held_generation)
+    yield release
+    release.set()
+
+
+def _in_thread(fn, *args, **kwargs):
+    out = {}
+    thread = threading.Thread(target=lambda: out.update(response=fn(*args, **kwargs)))
+    thread.start()
+    return thread, out
+
+
+def _wait_for_runs(count):
+    deadline = time.monotonic() + 10
+    while len(timetable.progress_service.list()) < count:
+        assert time.monotonic() < deadline, "run was not registered"
+        time.sleep(0.01)
+
+
+def test_identical_generate_joins_the_running_generation(client, faculty, held):
+    first, out_first = _in_thread(client.post, GENERATE, json={"version_name": "first"})
+    _wait_for_runs(1)
+    second, out_second = _in_thread(client.post, GENERATE, json={"version_name": "second"})
+    deadline = time.monotonic() + 10
+    while not timetable.progress_service.list()[0].attached:
+        assert time.monotonic() < deadline, "second request did not attach"
+        time.sleep(0.01)
+    held.set()
+    first.join(60)
+    second.join(60)
+
+    a, b = out_first["response"], out_second["response"]
+    assert a.status_code == b.status_code == 200
+    assert (a.headers["X-Joined-Run"], b.headers["X-Joined-Run"]) == ("0", "1")
+    assert a.headers["X-Version-Id"] == b.headers["X-Version-Id"]
+    assert b.headers["X-Version-Name"] == "first"
+    assert a.json() == b.json()
+    assert len(client.get("/api/timetable/versions").json()) == 1
+
+
+def test_runs_with_other_input_or_after_the_first_finished_start_their_own(client, faculty, held):
+    # TestClient runs a started run's background task before it returns, so starting requests go in threads
+    runs = "/api/timetable/runs"
+    first, out_first = _in_thread(client.post, runs, json={"version_name": "all"})
+    _wait_for_runs(1)
+    joined = client.post(runs, json={"version_name": "again"}).json()
+    dumped, out_dumped = _in_thread(client.post, runs, json={"version_name": "dumped", "dump_model": True})
+    _wait_for_runs(2)
+    held.set()
+    first.join(60)
+    dumped.join(60)
+
+    started = out_first["response"].json()
+    assert started["joined_existing_run"] is False
+    assert joined["joined_existing_run"] is True and joined["run_id"] == started["run_id"]
+    assert joined["version_name"] == "all" and joined["requested_version_name"] == "again"
+    # Dumping requests always solve on their own
+    assert out_dumped["response"].json()["joined_existing_run"] is False
+
+    assert client.get(f"{runs}/{started['run_id']}").json()["status"] == "done"
+    later = client.post(runs, json={"version_name": "later"}).json()
+    assert later["joined_existing_run"] is False and later["run_id"] != started["run_id"]
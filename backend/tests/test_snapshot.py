@@ -0,0 +1,69 @@
+import pytest
+
+from app import crud, models, schemas
+from app.cli import snapshot as snapshot_cli
+from app.config import settings
+from app.services.snapshot import export_snapshot, import_events, read_file, solve_snapshot, write_file
+from app.solver import _FINGERPRINT_SETTINGS
+
+
+@pytest.fixture(autouse=True)
+def restore_settings(monkeypatch):
+    # Solving a snapshot applies its settings to this process
+    for name in _FINGERPRINT_SETTINGS:
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+
+
+def _round_trip(db, tmp_path):
+    write_file(str(tmp_path / "dataset.json.gz"), export_snapshot(db))
+    snapshot = read_file(str(tmp_path / "dataset.json.gz"), "snapshot")
+    write_file(str(tmp_path / "events.json.gz"), solve_snapshot(snapshot, {"num_search_workers": 1}))
+    return read_file(str(tmp_path / "events.json.gz"), "events")
+
+
+def test_snapshot_solves_headless_and_imports_as_a_version(db, faculty, tmp_path):
+    events = _round_trip(db, tmp_path)
+    assert events["status"] == "solved" and events["events"]
+
+    version = import_events(db, events, "batch")
+    assert version.name == "batch" and version.metrics["snapshot"]["fingerprint"]
+    assert db.query(models.TimetableEvent).filter_by(version_id=version.id).count() == len(events["events"])
+
+
+def test_import_refuses_a_snapshot_of_changed_data(db, faculty, tmp_path):
+    events = _round_trip(db, tmp_path)
+    crud.create_room(db, schemas.RoomCreate(name="R300", capacity=300, furniture_type="LECTURE"))
+
+    with pytest.raises(ValueError, match="data changed"):
+        import_events(db, events, "stale")
+    assert db.query(models.Version).count() == 0
+    assert import_events(db, events, "forced", force=True).name == "forced"
+
+
+def test_snapshot_carries_the_exporting_settings(db, faculty, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "periods", [("08:00", "09:30"), ("09:45", "11:15"), ("11:15", "12:45")])
+    snapshot = export_snapshot(db)
+    monkeypatch.setattr(settings, "periods", [])
+
+    events = solve_snapshot(snapshot, {"num_search_workers": 1})
+    assert events["status"] == "solved"
+    assert {e["start"] for e in events["events"]} <= {"08:00", "09:45", "11:15"}
+
+
+def test_files_of_the_wrong_kind_are_refused(db, faculty, tmp_path):
+    path = str(tmp_path / "dataset.json.gz")
+    write_file(path, export_snapshot(db))
+    with pytest.raises(ValueError):
+        read_file(path, "events")
+
+
+def test_cli_solve_exits_non_zero_on_an_infeasible_snapshot(db, faculty, tmp_path):
+    lab = next(r for r in faculty["rooms"] if r.name == "LAB1")
+    db.delete(lab)
+    db.commit()
+    write_file(str(tmp_path / "dataset.json.gz"), export_snapshot(db))
+
+    with pytest.raises(SystemExit) as exc:
+        snapshot_cli.main(["solve", str(tmp_path / "dataset.json.gz"), str(tmp_path / "events.json.gz")])
+    assert exc.value.code == 2
+    assert read_file(str(tmp_path / "events.json.gz"), "events")["status"] == "infeasible"
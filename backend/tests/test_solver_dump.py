@@ -0,0 +1,48 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from app import crud
+from app.cli import replay as replay_cli
+from app.config import settings
+from app.services.solver_dump import read_dump, replay
+from app.solver import generate_timetable
+
+
+def _dump(db):
+    version = crud.create_version(db, "dumped")
+    generate_timetable(db, version, dump=True)
+    files = os.listdir(settings.solver_dump_dir)
+    assert len(files) == 1 and files[0].startswith(f"solve-v{version.id}-")
+    return os.path.join(settings.solver_dump_dir, files[0])
+
+
+def test_dump_records_the_model_and_replays_to_a_solution(db, faculty):
+    payload = read_dump(_dump(db))
+
+    assert len(payload["rooms"]) == len(faculty["rooms"])
+    assert {s["course_code"] for s in payload["sessions"]} == {c.code for c in faculty["courses"]}
+    assert payload["variables"] and payload["parameters"]["num_search_workers"] == 1
+
+    result = replay(payload, {"max_time_in_seconds": 10.0, "num_search_workers": 1})
+    assert result["status"] in ("OPTIMAL", "FEASIBLE")
+    assert result["first_solution_time"] is not None
+
+
+def test_replay_cli_prints_a_row_per_seed(db, faculty, capsys):
+    path = _dump(db)
+    replay_cli.main([path, "--time-limit", "5", "--workers", "1", "--seeds", "1,2"])
+
+    rows = capsys.readouterr().out.splitlines()[2:]  # after the header and its rule
+    assert len(rows) == 2
+    assert all("OPTIMAL" in row or "FEASIBLE" in row for row in rows)
+
+
+def test_dump_of_another_format_is_refused(tmp_path):
+    path = tmp_path / "old.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({"format": 0}, f)
+    with pytest.raises(ValueError):
+        read_dump(str(path))
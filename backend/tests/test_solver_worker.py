@@ -0,0 +1,81 @@
+import multiprocessing
+import socket
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.config import settings
+from app.services import solver_worker as worker_module
+from app.services.progress import ProgressService
+from app.services.solver_worker import SolverWorkerClient, WarmState, serve
+
+
+def test_warm_state_reuses_the_base_input_until_reference_data_changes(db, faculty):
+    state = WarmState()
+    base = state.prepare(db)
+    assert state.prepare(db) is base and state.loads == 1
+
+    assert state.refresh(db, ["rooms"]) == []
+    assert state.prepare(db) is base
+
+    crud.create_room(db, schemas.RoomCreate(name="R300", capacity=300, furniture_type="LECTURE"))
+    assert state.refresh(db, ["rooms"]) == ["rooms"]
+    fresh = state.prepare(db)
+    assert fresh is not base and "R300" in [r["name"] for r in fresh.rooms]
+
+
+def _serve(url):
+    # Worker process entry: the test database instead of the configured Postgres
+    serve(sessionmaker(autocommit=False, autoflush=False, bind=create_engine(url)))
+
+
+@pytest.fixture
+def worker(session_factory, monkeypatch):
+    # A spawned worker on a free local port; spawned processes read their settings from the environment
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        address = f"127.0.0.1:{s.getsockname()[1]}"
+    for name, value in (("SOLVER_WORKER_ADDRESS", address), ("SOLVER_WORKERS", "1"), ("SOLVER_STAGES", "room_fit"),
+                        ("SOLVER_STAGE_TIME_LIMIT", "2"), ("SOLVER_TIME_LIMIT", "10")):
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(settings, "solver_worker_address", address)
+    monkeypatch.setattr(worker_module, "progress_service", ProgressService())
+    process = multiprocessing.get_context("spawn").Process(target=_serve, args=(str(session_factory.kw["bind"].url),),
+                                                           daemon=True)
+    process.start()
+    client = SolverWorkerClient()
+    try:
+        client.start(mode="external")
+        yield client
+    finally:
+        client.stop()
+        process.terminate()
+        process.join()
+
+
+def _generate(client, name):
+    run = worker_module.progress_service.create(name)
+    client.submit(run, schemas.GenerateRequest(version_name=name))
+    assert run.wait(60)
+    assert run.status == "done", run.error
+    return run
+
+
+def test_worker_generates_and_follows_reference_changes(session_factory, faculty, worker):
+    db = session_factory()
+    try:
+        first = _generate(worker, "v1")
+        assert any(u["type"] == "solution" for u in first.updates)
+        assert db.query(models.TimetableEvent).filter_by(version_id=first.version_id).count() > 0
+
+        # Committed after the worker warmed up: the commit hook tells it to reload before the next job
+        group = crud.create_group(db, schemas.StudentGroupCreate(name="MEC-3", size=40, year=3, department="MEC"))
+        lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="MEC-L0", department="MEC"))
+        crud.create_course(db, schemas.CourseCreate(code="MEC 3001", name="Statics", weekly_hours=1,
+                                                    group_ids=[group.id], lecturer_ids=[lecturer.id]))
+        second = _generate(worker, "v2")
+        assert db.query(models.TimetableEvent).filter_by(version_id=second.version_id, group_id=group.id).count() == 1
+    finally:
+        db.close()
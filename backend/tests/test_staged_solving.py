@@ -0,0 +1,41 @@
+from app import crud
+from app.config import settings
+from app.solver import build_model, generate_timetable, prepare_input, solve_staged, solver_parameters
+
+
+def _room_fit(inp, solution):
+    # Value of the room_fit objective for an assignment
+    total = 0
+    for si, cands in enumerate(inp.candidates):
+        if inp.session_is_lab[si]:
+            continue
+        for (ri, ti), w in zip(cands.tolist(), inp.candidate_waste(si).tolist()):
+            total += w * solution.get((si, ri, ti), False)
+    return total
+
+
+def test_stages_run_in_the_configured_order_after_feasibility(db, faculty, monkeypatch):
+    monkeypatch.setattr(settings, "solver_stages", ["room_fit", "spread"])
+    inp = prepare_input(db)
+    solution, stats = solve_staged(build_model(inp), solver_parameters())
+
+    assert [st["stage"] for st in stats] == ["feasibility", "room_fit", "spread"]
+    assert stats[0]["objective"] is None
+    assert all(st["status"] in ("OPTIMAL", "FEASIBLE") for st in stats)
+    # spread ran after room_fit was locked in, so it cannot have given seats back
+    assert _room_fit(inp, solution) <= stats[1]["objective"]
+
+
+def test_explicit_empty_stage_list_only_looks_for_feasibility(db, faculty):
+    inp = prepare_input(db)
+    solution, stats = solve_staged(build_model(inp), solver_parameters(), stages=[])
+    assert [st["stage"] for st in stats] == ["feasibility"]
+    assert sum(solution.values()) == len(inp.sessions)
+
+
+def test_generation_records_stage_statistics_on_the_version(db, faculty, monkeypatch):
+    monkeypatch.setattr(settings, "solver_stages", ["room_fit"])
+    version = crud.create_version(db, "staged")
+    generate_timetable(db, version)
+    db.refresh(version)
+    assert [st["stage"] for st in version.metrics["stages"]] == ["feasibility", "room_fit"]
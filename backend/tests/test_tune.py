@@ -0,0 +1,42 @@
+import json
+import os
+
+from app import crud
+from app.cli import tune
+from app.config import settings
+from app.solver import generate_timetable, solver_parameters
+
+
+def _dump(db):
+    generate_timetable(db, crud.create_version(db, "dumped"), dump=True)
+    return [os.path.join(settings.solver_dump_dir, name) for name in os.listdir(settings.solver_dump_dir)]
+
+
+def test_random_mode_samples_distinct_configurations():
+    configs = tune.configurations("random", 5, [1, 2], seed=3)
+    assert len(configs) == 5
+    assert len({tune._label(cfg) for cfg in configs}) == 5
+    assert configs == tune.configurations("random", 5, [1, 2], seed=3)
+    assert len(tune.configurations("grid", 5, [1], seed=3)) == 5 * 3 * 2 * 4
+
+
+def test_tuned_preset_is_picked_up_by_solver_parameters(db, faculty):
+    dumps = _dump(db)
+    assert "search_branching" not in solver_parameters()
+
+    tune.main(dumps + ["--samples", "2", "--workers", "1", "--time-limit", "5", "--param", "log_search_progress=false"])
+
+    with open(settings.solver_preset_path) as f:
+        preset = json.load(f)
+    assert preset["corpus"] == dumps
+    params = solver_parameters()
+    for name, value in preset["parameters"].items():
+        if name != "num_search_workers":  # SOLVER_WORKERS still wins over the preset
+            assert params[name] == value
+    assert params["log_search_progress"] is False
+    assert params["max_time_in_seconds"] == settings.solver_feasibility_time_limit
+
+
+def test_dry_run_writes_no_preset(db, faculty):
+    tune.main(_dump(db) + ["--samples", "1", "--workers", "1", "--time-limit", "5", "--dry-run"])
+    assert not os.path.exists(settings.solver_preset_path)
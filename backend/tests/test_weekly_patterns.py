@@ -0,0 +1,38 @@
+from app import crud, schemas
+from app.config import settings
+from app.solver import generate_timetable
+
+
+def _generate(db, monkeypatch, patterns, availability=None):
+    # Feasibility only, so the placements come from the pattern constraints rather than the spread objective
+    monkeypatch.setattr(settings, "solver_weekly_patterns", patterns)
+    monkeypatch.setattr(settings, "solver_stages", [])
+    crud.create_room(db, schemas.RoomCreate(name="R100", capacity=100, furniture_type="LECTURE"))
+    group = crud.create_group(db, schemas.StudentGroupCreate(name="CSE-3", size=50, year=3, department="CSE"))
+    lecturer = crud.create_lecturer(db, schemas.LecturerCreate(name="L0", availability=availability))
+    crud.create_course(db, schemas.CourseCreate(code="CSE 3001", name="Course", weekly_hours=3,
+                                                group_ids=[group.id], lecturer_ids=[lecturer.id]))
+    return generate_timetable(db, crud.create_version(db, "v1"))
+
+
+def test_day_patterns_put_repeated_sessions_on_distinct_days(db, monkeypatch):
+    events = _generate(db, monkeypatch, "days")
+    assert len({e.day for e in events}) == 3
+
+
+def test_hour_patterns_also_keep_the_same_start(db, monkeypatch):
+    events = _generate(db, monkeypatch, "hours")
+    assert len({e.day for e in events}) == 3
+    assert len({e.start for e in events}) == 1
+
+
+def test_without_patterns_sessions_may_share_a_day(db, monkeypatch):
+    events = _generate(db, monkeypatch, "off", availability={"Mon": [["08:00", "17:00"]]})
+    assert {e.day for e in events} == {"Mon"}
+
+
+def test_sessions_without_a_possible_pattern_are_placed_freely(db, monkeypatch):
+    # Three sessions cannot go on distinct days of a two-day week; the block drops its pattern instead of
+    # making the timetable infeasible
+    events = _generate(db, monkeypatch, "days", availability={"Mon": [["08:00", "17:00"]], "Tue": [["08:00", "17:00"]]})
+    assert len(events) == 3 and {e.day for e in events} <= {"Mon", "Tue"}